@@ -0,0 +1,304 @@
+"""
+End-to-end /api/chat benchmark.
+
+Usage: python -m benchmarks.chat_e2e [--requests 40] [--concurrency 4]
+       [--output results.json] [--baseline benchmarks/baselines/chat_e2e.json]
+
+Runs benchmarks.fake_ollama in a subprocess, swaps appscript for the fake
+tool backend and serves the real src.main app with uvicorn on a local
+port. Tool-using requests (unique messages, so neither the intent fast
+path, the plan cache nor coalescing answers them) are then sent over HTTP
+for each scenario:
+- agent: the pydantic-ai agent (run_agent_non_streaming / run_agent_streaming)
+- orchestrator: orchestrate_with_retry / orchestrate_streaming
+each non-streaming and streaming.
+
+Per scenario the report has throughput, p50/p99 latency, time to the
+first delta chunk (streaming) and the peak traced memory per request.
+Allocations are measured in a separate sequential pass with tracemalloc
+(app and client share this process), so tracing does not skew timings.
+
+With --baseline, metrics worse than the baseline by more than
+--tolerance are listed under "regressions" and the exit code is 1.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+from benchmarks import fake_tools
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baselines", "chat_e2e.json")
+ENGINES = ("agent", "orchestrator")
+APPS = ("Safari", "Notes", "TextEdit", "Music", "Calendar")
+
+# Metric path in a scenario result, and whether higher values are better
+COMPARED_METRICS: Tuple[Tuple[str, bool], ...] = (
+    ("throughput_rps", True),
+    ("latency_ms.p50", False),
+    ("latency_ms.p99", False),
+    ("ttft_ms.p50", False),
+    ("ttft_ms.p99", False),
+    ("alloc_kib_per_request", False),
+)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_up(url: str, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            httpx.get(url, timeout=1.0)
+            return
+        except httpx.TransportError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.05)
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))], 2)
+
+
+def _summary(values: List[float]) -> Optional[Dict[str, Any]]:
+    if not values:
+        return None
+    return {'p50': _percentile(values, 50), 'p99': _percentile(values, 99), 'mean': round(sum(values) / len(values), 2)}
+
+
+class AppServer:
+    """src.main served by uvicorn on a background thread"""
+
+    def __init__(self, app: Any, port: int):
+        import uvicorn
+        self.url = f"http://127.0.0.1:{port}"
+        self._server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    def __enter__(self) -> "AppServer":
+        self._thread.start()
+        _wait_until_up(self.url + "/health")
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._server.should_exit = True
+        self._thread.join(timeout=10)
+
+
+def use_engine(main_module: Any, engine: str, fake_host: str) -> None:
+    """Point /api/chat at the pydantic-ai agent or the legacy orchestrator"""
+    from src.agents import pydantic_agent
+    from src.llm.ollama_adapter import OllamaAdapter
+    from src.models.config import OrchestratorConfig
+    from src.orchestrator.orchestrator import orchestrate_streaming, orchestrate_with_retry
+
+    if engine == "agent":
+        main_module.run_agent_non_streaming = pydantic_agent.run_agent_non_streaming
+        main_module.run_agent_streaming = pydantic_agent.run_agent_streaming
+        return
+    # Created lazily: the pooled async client belongs to the server's event loop
+    config = OrchestratorConfig()
+    client = OllamaAdapter.from_config(config, model=pydantic_agent.MODEL_NAME, base_url=fake_host)
+    main_module.run_agent_non_streaming = (
+        lambda message, conversation_id=None: orchestrate_with_retry(message, client, config, conversation_id)
+    )
+    main_module.run_agent_streaming = (
+        lambda message, conversation_id=None: orchestrate_streaming(message, client, config, conversation_id)
+    )
+
+
+async def _one_request(client: httpx.AsyncClient, url: str, message: str, stream: bool) -> Tuple[bool, float, Optional[float]]:
+    """(ok, latency_ms, ttft_ms) of one chat request"""
+    start = time.perf_counter()
+    ttft = None
+    if not stream:
+        response = await client.post(url, json={"message": message, "stream": False})
+        ok = response.status_code == 200 and bool(response.json().get("reply"))
+        return ok, (time.perf_counter() - start) * 1000, None
+    ok = False
+    async with client.stream("POST", url, json={"message": message, "stream": True}) as response:
+        async for line in response.aiter_lines():
+            if not line:
+                continue
+            chunk = json.loads(line)
+            if chunk.get("type") == "delta" and ttft is None:
+                ttft = (time.perf_counter() - start) * 1000
+            elif chunk.get("type") == "final":
+                ok = response.status_code == 200 and bool(chunk.get("message"))
+    return ok, (time.perf_counter() - start) * 1000, ttft
+
+
+async def run_scenario(base_url: str, name: str, stream: bool, requests: int, concurrency: int, alloc_requests: int) -> Dict[str, Any]:
+    url = base_url + "/api/chat"
+    messages = [f"Could you get {APPS[i % len(APPS)]} up on screen? ({name} #{i})" for i in range(requests + alloc_requests + 2)]
+    latencies: List[float] = []
+    ttfts: List[float] = []
+    errors = 0
+
+    async with httpx.AsyncClient(timeout=60.0, limits=httpx.Limits(max_connections=concurrency)) as client:
+        # Warm-up (connections, lazily created pools and caches)
+        for message in messages[:2]:
+            await _one_request(client, url, message, stream)
+
+        pending = iter(messages[2:2 + requests])
+
+        async def worker() -> None:
+            nonlocal errors
+            for message in pending:
+                try:
+                    ok, latency, ttft = await _one_request(client, url, message, stream)
+                except httpx.HTTPError:
+                    ok, latency, ttft = False, 0.0, None
+                if not ok:
+                    errors += 1
+                    continue
+                latencies.append(latency)
+                if ttft is not None:
+                    ttfts.append(ttft)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+        allocations: List[float] = []
+        tracemalloc.start()
+        try:
+            for message in messages[2 + requests:]:
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                await _one_request(client, url, message, stream)
+                allocations.append((tracemalloc.get_traced_memory()[1] - before) / 1024)
+        finally:
+            tracemalloc.stop()
+
+    return {
+        'requests': requests,
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else None,
+        'latency_ms': _summary(latencies),
+        'ttft_ms': _summary(ttfts),
+        'alloc_kib_per_request': round(sum(allocations) / len(allocations), 1) if allocations else None,
+    }
+
+
+def _metric(result: Dict[str, Any], path: str) -> Optional[float]:
+    value: Any = result
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[Dict[str, Any]]:
+    """Metrics worse than the baseline by more than tolerance (a fraction)"""
+    regressions = []
+    for scenario, result in results['scenarios'].items():
+        reference = baseline.get('scenarios', {}).get(scenario)
+        if reference is None:
+            continue
+        for path, higher_is_better in COMPARED_METRICS:
+            current, expected = _metric(result, path), _metric(reference, path)
+            if not current or not expected:
+                continue
+            change = (current - expected) / expected
+            if (-change if higher_is_better else change) > tolerance:
+                regressions.append({
+                    'scenario': scenario, 'metric': path,
+                    'baseline': expected, 'current': current, 'change': round(change, 3),
+                })
+    return regressions
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    fake_port = _free_port()
+    fake_host = f"http://127.0.0.1:{fake_port}"
+    fake = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.fake_ollama", "--port", str(fake_port),
+         "--profile", args.profile],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    try:
+        _wait_until_up(fake_host)
+        os.environ["OLLAMA_BASE_URL"] = fake_host + "/v1"
+        fake_tools.install(latency_ms=args.tool_latency_ms)
+
+        # src.main configures logging on import: keep stdout for the report
+        with contextlib.redirect_stdout(sys.stderr):
+            import src.main as main_module
+        from src.utils.logger import setup_logging
+        # Keep the real logging cost, but off stdout and out of logs/baby_ai.jsonl
+        log_dir = tempfile.mkdtemp(prefix="chat_e2e_")
+        setup_logging(log_level="INFO", log_file=os.path.join(log_dir, "baby_ai.jsonl"), console_stream=sys.stderr)
+
+        scenarios: Dict[str, Any] = {}
+        with AppServer(main_module.app, _free_port()) as server:
+            for engine in ENGINES:
+                use_engine(main_module, engine, fake_host)
+                for stream in (False, True):
+                    name = f"{engine}/{'stream' if stream else 'non_stream'}"
+                    scenarios[name] = asyncio.run(run_scenario(
+                        server.url, name, stream, args.requests, args.concurrency, args.alloc_requests,
+                    ))
+    finally:
+        fake.terminate()
+        fake.wait(timeout=10)
+
+    return {
+        'config': {
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+            'profile': args.profile,
+            'tool_latency_ms': args.tool_latency_ms,
+            'python': sys.version.split()[0],
+        },
+        'scenarios': scenarios,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="End-to-end /api/chat benchmark against a fake model server")
+    parser.add_argument("--requests", type=int, default=40, help="Timed requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--alloc-requests", type=int, default=5, help="Sequential requests measured with tracemalloc")
+    parser.add_argument("--profile", default="bench", help="Fake model latency profile (see benchmarks.fake_ollama)")
+    parser.add_argument("--tool-latency-ms", type=float, default=2.0, help="Fake Apple Event round-trip")
+    parser.add_argument("--output", help="Save the results as JSON")
+    parser.add_argument("--baseline", nargs="?", const=DEFAULT_BASELINE, help="Compare against a saved result")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative slowdown before flagging")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            results['regressions'] = compare(results, json.load(f), args.tolerance)
+        exit_code = 1 if results['regressions'] else 0
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    print(json.dumps(results, indent=2))
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,451 @@
+"""
+Deterministic stand-in for the Ollama server.
+
+Usage: python -m benchmarks.fake_ollama [--port 11434] [--profile laptop|profile.json]
+       [--load-ms N] [--prefill-ms-per-token N] [--tokens-per-second N]
+       [--thinking-tokens N] [--parallel N] [--max-queue N]
+
+Speaks the two protocols the backend uses:
+- /api/chat, /api/generate, /api/ps (native NDJSON API of OllamaAdapter)
+- /v1/chat/completions (OpenAI-compatible API of Agent('ollama:...'))
+
+Replies are scripted: the last user message is matched against tool rules
+(by default: a known app name -> open_app/close_app), anything else,
+including a tool result, gets a plain text reply of a fixed length. No
+randomness is involved, so runs are reproducible.
+
+Timing follows a latency profile, modelled on how Ollama serves a request:
+- at most `parallel` requests run at once (OLLAMA_NUM_PARALLEL); others
+  wait in a queue of `max_queue` and beyond that get 503
+- a model that is not resident is loaded first (load_ms, once for all
+  waiting requests) and stays resident for keep_alive
+- the prompt is prefilled at prefill_ms_per_token, except the prefix the
+  slot already holds from its previous request (prompt caching)
+- thinking and reply tokens are streamed at tokens_per_second, capped by
+  num_predict / max_tokens
+GET /fake/stats reports loads, queueing and token counts.
+"""
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+import uvicorn
+
+DEFAULT_APPS = ("Safari", "Notes", "TextEdit", "Music", "Calendar", "Mail", "Terminal", "Finder")
+_APP_GROUP = "(?P<app>" + "|".join(re.escape(app) for app in DEFAULT_APPS) + ")"
+
+THINKING_WORDS = ("The", " user", " wants", " an", " app", " handled.", " I", " should", " call", " the", " right", " tool.")
+
+ToolCall = Tuple[str, Dict[str, Any]]
+
+
+class ToolRule(BaseModel):
+    """Tool call made when the last user message matches"""
+    pattern: str = Field(description="Regex searched in the last user message (case-insensitive)")
+    tool: str = Field(description="Tool to call")
+    arguments: Dict[str, str] = Field(default_factory=dict, description="Argument templates, formatted with the match's named groups")
+
+
+class LatencyProfile(BaseModel):
+    """Timing and behaviour of the fake model server"""
+    load_ms: float = Field(default=0.0, description="Time to load a model that is not resident")
+    keep_alive_seconds: float = Field(default=300.0, description="Residency after a request when none is given")
+    prefill_ms_per_token: float = Field(default=0.0, description="Prompt processing cost per uncached prompt token")
+    prefix_cache: bool = Field(default=True, description="Skip prefill of the prompt prefix a slot already holds")
+    tokens_per_second: float = Field(default=0.0, description="Generation rate (0 = as fast as possible)")
+    reply_tokens: int = Field(default=24, description="Tokens in a text reply")
+    thinking_tokens: int = Field(default=0, description="Thinking tokens before the reply when thinking is on")
+    parallel: int = Field(default=1, description="Requests generated at once (OLLAMA_NUM_PARALLEL)")
+    max_queue: int = Field(default=512, description="Waiting requests before 503 (OLLAMA_MAX_QUEUE)")
+    tool_rules: List[ToolRule] = Field(
+        default_factory=lambda: [
+            ToolRule(pattern=r"\b(?:close|quit)\b.*\b" + _APP_GROUP + r"\b", tool="close_app", arguments={"appName": "{app}"}),
+            ToolRule(pattern=r"\b" + _APP_GROUP + r"\b", tool="open_app", arguments={"appName": "{app}"}),
+        ],
+        description="First matching rule decides the tool call",
+    )
+
+
+PROFILES: Dict[str, LatencyProfile] = {
+    # No delays at all: measures the backend's own overhead
+    'instant': LatencyProfile(),
+    # Fixed 2 ms per token, resident model: the chat_e2e default
+    'bench': LatencyProfile(tokens_per_second=500.0),
+    # A 4B Q4 thinking model on a laptop GPU (cold loads, prefill and slow decode dominate)
+    'laptop': LatencyProfile(
+        load_ms=2500.0, prefill_ms_per_token=2.0, tokens_per_second=35.0, thinking_tokens=48, parallel=1,
+    ),
+    # Same model with OLLAMA_NUM_PARALLEL=4 and a short queue, to exercise queueing and shedding
+    'shared': LatencyProfile(
+        load_ms=2500.0, prefill_ms_per_token=2.0, tokens_per_second=25.0, thinking_tokens=48, parallel=4, max_queue=8,
+    ),
+}
+
+
+def load_profile(name_or_path: str) -> LatencyProfile:
+    """A named profile, or one read from a JSON file"""
+    if name_or_path in PROFILES:
+        return PROFILES[name_or_path].model_copy(deep=True)
+    with open(name_or_path, encoding="utf-8") as f:
+        return LatencyProfile.model_validate(json.load(f))
+
+
+def parse_keep_alive(value: Any, default: float) -> float:
+    """Ollama keep_alive ("5m", "30s", seconds, negative = forever) in seconds"""
+    if value is None or value == "":
+        return default
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        match = re.fullmatch(r"(-?\d+(?:\.\d+)?)\s*(ms|s|m|h)?", str(value).strip())
+        if not match:
+            return default
+        seconds = float(match.group(1)) * {"ms": 0.001, "s": 1, "m": 60, "h": 3600, None: 1}[match.group(2)]
+    return float("inf") if seconds < 0 else seconds
+
+
+class ServerBusy(Exception):
+    """The wait queue is full"""
+
+
+class _Slot:
+    """One parallel generation slot and the prompt its KV cache holds"""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.cached_prompt = ""
+
+
+class FakeModel:
+    """Scripted replies, model residency, slots and token pacing"""
+
+    def __init__(self, profile: Optional[LatencyProfile] = None):
+        self.profile = profile or LatencyProfile()
+        self._rules = [(re.compile(rule.pattern, re.IGNORECASE), rule) for rule in self.profile.tool_rules]
+        self._slots: Optional[asyncio.Queue] = None
+        self._load_lock: Optional[asyncio.Lock] = None
+        # model -> monotonic time it is unloaded at
+        self.resident: Dict[str, float] = {}
+        self.waiting = 0
+        self.stats: Dict[str, float] = {
+            'requests': 0, 'rejected': 0, 'loads': 0, 'max_waiting': 0,
+            'prompt_tokens': 0, 'cached_tokens': 0, 'thinking_tokens': 0, 'generated_tokens': 0,
+        }
+
+    # --- Scripted replies ---
+
+    def respond(self, messages: List[Dict[str, Any]]) -> Tuple[List[str], List[ToolCall]]:
+        """Reply tokens and the tool calls to make"""
+        last = messages[-1] if messages else {}
+        content = _text(last.get("content"))
+        if last.get("role") == "user":
+            for pattern, rule in self._rules:
+                match = pattern.search(content)
+                if match:
+                    groups = {name: value or "" for name, value in match.groupdict().items()}
+                    return [], [(rule.tool, {key: template.format(**groups) for key, template in rule.arguments.items()})]
+            lead = "Sure, here is what I found."
+        else:
+            lead = "Done, " + (content[:40] or "all set")
+        words = lead.split()
+        words += ["ok"] * max(0, self.profile.reply_tokens - len(words))
+        return [words[0]] + [" " + word for word in words[1:self.profile.reply_tokens]], []
+
+    def thinking(self, enabled: bool) -> List[str]:
+        if not enabled:
+            return []
+        return [THINKING_WORDS[i % len(THINKING_WORDS)] for i in range(self.profile.thinking_tokens)]
+
+    # --- Scheduling ---
+
+    def _init_loop_state(self) -> None:
+        if self._slots is None:
+            self._slots = asyncio.Queue()
+            for index in range(self.profile.parallel):
+                self._slots.put_nowait(_Slot(index))
+            self._load_lock = asyncio.Lock()
+
+    async def ensure_loaded(self, model: str, keep_alive: Any = None) -> None:
+        """Load model unless resident (concurrent requests share one load)"""
+        self._init_loop_state()
+        keep_alive_seconds = parse_keep_alive(keep_alive, self.profile.keep_alive_seconds)
+        async with self._load_lock:
+            if self.resident.get(model, 0.0) <= time.monotonic():
+                if self.profile.load_ms:
+                    await asyncio.sleep(self.profile.load_ms / 1000)
+                self.stats['loads'] += 1
+            self.resident[model] = time.monotonic() + keep_alive_seconds
+
+    def unload(self, model: str) -> None:
+        self.resident.pop(model, None)
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[_Slot]:
+        """
+        Wait for a generation slot.
+
+        Raises:
+            ServerBusy: max_queue requests are already waiting
+        """
+        self._init_loop_state()
+        if self._slots.empty() and self.waiting >= self.profile.max_queue:
+            self.stats['rejected'] += 1
+            raise ServerBusy()
+        self.stats['requests'] += 1
+        self.waiting += 1
+        self.stats['max_waiting'] = max(self.stats['max_waiting'], self.waiting)
+        try:
+            slot = await self._slots.get()
+        finally:
+            self.waiting -= 1
+        try:
+            yield slot
+        finally:
+            self._slots.put_nowait(slot)
+
+    async def prefill(self, slot: _Slot, messages: List[Dict[str, Any]]) -> int:
+        """Simulate prompt processing; returns the prompt token count"""
+        prompt = json.dumps(messages, sort_keys=True)
+        total = len(prompt) // 4 + 1
+        cached = len(os.path.commonprefix([slot.cached_prompt, prompt])) // 4 if self.profile.prefix_cache else 0
+        slot.cached_prompt = prompt
+        self.stats['prompt_tokens'] += total
+        self.stats['cached_tokens'] += cached
+        if self.profile.prefill_ms_per_token:
+            await asyncio.sleep((total - cached) * self.profile.prefill_ms_per_token / 1000)
+        return total
+
+    async def pace(self, tokens: List[Tuple[str, str]]) -> AsyncIterator[Tuple[str, str]]:
+        """Yield (kind, token) pairs at the profile's generation rate"""
+        start = time.monotonic()
+        rate = self.profile.tokens_per_second
+        for i, item in enumerate(tokens):
+            if rate:
+                delay = start + (i + 1) / rate - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            self.stats['thinking_tokens' if item[0] == 'thinking' else 'generated_tokens'] += 1
+            yield item
+
+    def plan(self, messages: List[Dict[str, Any]], think: bool, limit: Optional[int]) -> Tuple[List[Tuple[str, str]], List[ToolCall], str]:
+        """Tokens to stream (thinking first), tool calls and the done reason"""
+        content, tool_calls = self.respond(messages)
+        thinking = self.thinking(think)
+        tokens = [('thinking', token) for token in thinking] + [('content', token) for token in content]
+        if limit is not None and len(tokens) > limit:
+            return tokens[:max(0, limit)], tool_calls, 'length'
+        return tokens, tool_calls, 'stop'
+
+
+def _text(content: Any) -> str:
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return ""
+
+
+def _now() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime()) + "Z"
+
+
+def _line(payload: Dict[str, Any]) -> bytes:
+    return json.dumps(payload).encode() + b"\n"
+
+
+def _busy(openai: bool) -> JSONResponse:
+    message = "server busy, please try again.  maximum pending requests exceeded"
+    body = {"error": {"message": message, "type": "api_error"}} if openai else {"error": message}
+    return JSONResponse(body, status_code=503)
+
+
+async def _generate(model: FakeModel, name: str, body: Dict[str, Any], think: bool, limit: Optional[int]):
+    """
+    Queue, load, prefill and stream one request; yields the prompt token
+    count, then (kind, token) pairs, while holding a slot.
+    """
+    async with model.slot() as slot:
+        await model.ensure_loaded(name, body.get("keep_alive"))
+        yield await model.prefill(slot, body.get("messages") or [])
+        tokens, _, _ = model.plan(body.get("messages") or [], think, limit)
+        async for item in model.pace(tokens):
+            yield item
+    if parse_keep_alive(body.get("keep_alive"), 1.0) == 0:
+        model.unload(name)
+
+
+async def _started(stream: AsyncIterator[Any]) -> Tuple[int, AsyncIterator[Any]]:
+    """Run a _generate stream up to its first token (so a full queue can still return 503)"""
+    prompt_tokens = await stream.__anext__()
+    return prompt_tokens, stream
+
+
+def create_app(model: FakeModel) -> FastAPI:
+    app = FastAPI(title="Fake Ollama")
+
+    @app.get("/")
+    async def root():
+        return PlainTextResponse("Ollama is running")
+
+    @app.get("/fake/stats")
+    async def fake_stats():
+        return {**model.stats, 'waiting': model.waiting, 'profile': model.profile.model_dump(exclude={'tool_rules'})}
+
+    @app.get("/api/ps")
+    async def ps():
+        now = time.monotonic()
+        return {"models": [
+            {"name": name, "model": name, "expires_at": "never" if until == float("inf") else round(until - now, 1)}
+            for name, until in model.resident.items() if until > now
+        ]}
+
+    @app.post("/api/generate")
+    async def generate(request: Request):
+        body = await request.json()
+        name = body.get("model")
+        # Empty prompts load/unload the model (keep_alive); nothing to generate
+        if parse_keep_alive(body.get("keep_alive"), 1.0) == 0:
+            model.unload(name)
+            return {"model": name, "created_at": _now(), "response": "", "done": True, "done_reason": "unload"}
+        await model.ensure_loaded(name, body.get("keep_alive"))
+        return {"model": name, "created_at": _now(), "response": "", "done": True, "done_reason": "load"}
+
+    @app.post("/api/chat")
+    async def ollama_chat(request: Request):
+        body = await request.json()
+        name = body.get("model")
+        messages = body.get("messages") or []
+        think = body.get("think") is not False
+        limit = (body.get("options") or {}).get("num_predict")
+        _, tool_calls, done_reason = model.plan(messages, think, limit)
+        calls = [{"function": {"name": tool, "arguments": args}} for tool, args in tool_calls]
+        try:
+            prompt_tokens, stream = await _started(_generate(model, name, body, think, limit))
+        except ServerBusy:
+            return _busy(openai=False)
+
+        def done(eval_count: int) -> Dict[str, Any]:
+            return {
+                "model": name, "created_at": _now(), "done": True, "done_reason": done_reason,
+                "prompt_eval_count": prompt_tokens, "eval_count": max(1, eval_count),
+            }
+
+        if not body.get("stream", True):
+            parts: Dict[str, List[str]] = {'thinking': [], 'content': []}
+            async for kind, token in stream:
+                parts[kind].append(token)
+            message: Dict[str, Any] = {"role": "assistant", "content": "".join(parts['content'])}
+            if parts['thinking']:
+                message["thinking"] = "".join(parts['thinking'])
+            if calls:
+                message["tool_calls"] = calls
+            return {**done(len(parts['thinking']) + len(parts['content'])), "message": message}
+
+        async def chunks() -> AsyncIterator[bytes]:
+            count = 0
+            async for kind, token in stream:
+                count += 1
+                message = {"role": "assistant", "content": token if kind == 'content' else ""}
+                if kind == 'thinking':
+                    message["thinking"] = token
+                yield _line({"model": name, "created_at": _now(), "message": message, "done": False})
+            if calls:
+                yield _line({"model": name, "created_at": _now(), "message": {"role": "assistant", "content": "", "tool_calls": calls}, "done": False})
+            yield _line({**done(count), "message": {"role": "assistant", "content": ""}})
+
+        return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+    @app.post("/v1/chat/completions")
+    async def openai_chat(request: Request):
+        body = await request.json()
+        messages = body.get("messages") or []
+        think = body.get("reasoning_effort") != "none"
+        limit = body.get("max_completion_tokens") or body.get("max_tokens")
+        _, tool_calls, done_reason = model.plan(messages, think, limit)
+        calls = [
+            {"id": f"call_{uuid.uuid4().hex[:8]}", "type": "function", "function": {"name": tool, "arguments": json.dumps(args)}}
+            for tool, args in tool_calls
+        ]
+        finish_reason = "tool_calls" if calls else done_reason
+        try:
+            prompt_tokens, stream = await _started(_generate(model, body.get("model"), body, think, limit))
+        except ServerBusy:
+            return _busy(openai=True)
+        base = {"id": f"chatcmpl-{uuid.uuid4().hex[:12]}", "created": int(time.time()), "model": body.get("model")}
+
+        def usage(completion_tokens: int) -> Dict[str, int]:
+            completion_tokens = max(1, completion_tokens)
+            return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+
+        if not body.get("stream"):
+            parts: Dict[str, List[str]] = {'thinking': [], 'content': []}
+            async for kind, token in stream:
+                parts[kind].append(token)
+            message: Dict[str, Any] = {"role": "assistant", "content": "".join(parts['content']) or None}
+            if parts['thinking']:
+                # Ollama's OpenAI-compatible field for thinking output
+                message["reasoning"] = "".join(parts['thinking'])
+            if calls:
+                message["tool_calls"] = calls
+            return JSONResponse({
+                **base, "object": "chat.completion",
+                "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+                "usage": usage(len(parts['thinking']) + len(parts['content'])),
+            })
+
+        def event(choices: List[Dict[str, Any]], **extra: Any) -> bytes:
+            return b"data: " + json.dumps({**base, "object": "chat.completion.chunk", "choices": choices, **extra}).encode() + b"\n\n"
+
+        async def events() -> AsyncIterator[bytes]:
+            count = 0
+            yield event([{"index": 0, "delta": {"role": "assistant", "content": ""}, "finish_reason": None}])
+            async for kind, token in stream:
+                count += 1
+                delta = {"content": token} if kind == 'content' else {"reasoning": token}
+                yield event([{"index": 0, "delta": delta, "finish_reason": None}])
+            if calls:
+                yield event([{"index": 0, "delta": {"tool_calls": [{"index": i, **call} for i, call in enumerate(calls)]}, "finish_reason": None}])
+            yield event([{"index": 0, "delta": {}, "finish_reason": finish_reason}])
+            yield event([], usage=usage(count))
+            yield b"data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Deterministic fake Ollama server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11434)
+    parser.add_argument("--profile", default="instant", help=f"One of {', '.join(PROFILES)} or a JSON file")
+    # Overrides of single profile fields
+    for field, info in LatencyProfile.model_fields.items():
+        if field != "tool_rules":
+            kind = {bool: lambda v: v.lower() in ("1", "true", "yes")}.get(info.annotation, info.annotation)
+            parser.add_argument("--" + field.replace("_", "-"), type=kind, help=info.description)
+    args = parser.parse_args(argv)
+
+    profile = load_profile(args.profile)
+    overrides = {
+        field: getattr(args, field) for field in LatencyProfile.model_fields
+        if field != "tool_rules" and getattr(args, field) is not None
+    }
+    profile = profile.model_copy(update=overrides)
+    print(f"Fake Ollama on http://{args.host}:{args.port} ({args.profile}: {profile.model_dump(exclude={'tool_rules'})})", file=sys.stderr)
+    uvicorn.run(create_app(FakeModel(profile)), host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""
+Fake macOS automation backend for the benchmarks.
+
+install() puts an `appscript` module in sys.modules (before src is
+imported) so the tools run on any OS without touching real applications.
+Each activate/quit blocks for a fixed latency, like an Apple Event
+round-trip, and apps listed as failing raise.
+"""
+import sys
+import time
+import types
+from typing import Iterable, List
+
+from benchmarks.fake_ollama import DEFAULT_APPS
+
+
+class _Its:
+    """Stand-in for appscript.its (filter expressions evaluate to True)"""
+
+    def __getattr__(self, name: str) -> "_Its":
+        return self
+
+    def __eq__(self, other: object) -> bool:  # type: ignore[override]
+        return True
+
+    __hash__ = object.__hash__
+
+
+class _Names:
+    def __init__(self, names: List[str]):
+        self._names = names
+
+    def get(self) -> List[str]:
+        return list(self._names)
+
+
+class _Processes:
+    def __init__(self, names: List[str]):
+        self.name = _Names(names)
+
+    def __getitem__(self, _filter: object) -> "_Processes":
+        return self
+
+
+class _App:
+    def __init__(self, backend: "FakeToolBackend", name: str):
+        self._backend = backend
+        self._name = name
+        self.processes = _Processes(backend.apps)
+
+    def activate(self) -> None:
+        self._backend.call(self._name)
+
+    def quit(self) -> None:
+        self._backend.call(self._name)
+
+
+class FakeToolBackend:
+    """Call counts and latency of the fake Apple Events"""
+
+    def __init__(self, latency_ms: float = 2.0, failing_apps: Iterable[str] = (), apps: Iterable[str] = DEFAULT_APPS):
+        self.latency = latency_ms / 1000
+        self.failing_apps = set(failing_apps)
+        self.apps = list(apps)
+        self.calls = 0
+
+    def call(self, name: str) -> None:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if name in self.failing_apps:
+            raise RuntimeError(f"Application {name} isn't running")
+
+
+def install(latency_ms: float = 2.0, failing_apps: Iterable[str] = ()) -> FakeToolBackend:
+    """Replace appscript with the fake backend (also in already imported tool modules)"""
+    backend = FakeToolBackend(latency_ms, failing_apps)
+    module = types.ModuleType("appscript")
+    module.app = lambda name: _App(backend, name)  # type: ignore[attr-defined]
+    module.its = _Its()  # type: ignore[attr-defined]
+    sys.modules["appscript"] = module
+    for name in ("src.agents.app_agent", "src.agents.pydantic_agent"):
+        if name in sys.modules:
+            sys.modules[name].appscript_app = module.app  # type: ignore[attr-defined]
+    return backend
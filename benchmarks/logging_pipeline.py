@@ -0,0 +1,102 @@
+"""
+Benchmark of the log pipeline: synchronous handlers vs the queued writer.
+
+Usage: python -m benchmarks.logging_pipeline [log_calls] [burst]
+
+Reports, for each mode:
+- log calls per second on the calling thread
+- event-loop stall: lateness of a 1 ms ticker while a coroutine logs in
+  bursts of `burst` calls (p50/p99/max, ms)
+- records dropped by the queued mode's overflow policy
+
+Console output goes to /dev/null and the JSON file to a temporary
+directory, so the numbers measure rendering plus I/O without a terminal.
+"""
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from typing import List, Optional
+
+import structlog
+
+from src.models.config import LoggingConfig
+from src.utils import logger as log_setup
+from src.utils.logger import logging_stats, setup_logging
+
+
+def _configure(queued: bool, directory: str, devnull) -> None:
+    setup_logging(
+        config=LoggingConfig(queued=queued),
+        log_file=os.path.join(directory, f"bench_{'queued' if queued else 'sync'}.jsonl"),
+        console_stream=devnull,
+    )
+
+
+def call_rate(n: int) -> float:
+    """Log calls per second (caller side only)"""
+    logger = structlog.get_logger("bench")
+    start = time.perf_counter()
+    for i in range(n):
+        logger.info("tool_executed", tool="open_app", app_name="Safari", iteration=i, duration_ms=1.23)
+    return n / (time.perf_counter() - start)
+
+
+async def loop_stall(n: int, burst: int) -> dict:
+    """Ticker lateness while a coroutine logs n records in bursts"""
+    logger = structlog.get_logger("bench")
+    lateness: List[float] = []
+    done = False
+
+    async def ticker() -> None:
+        while not done:
+            expected = time.perf_counter() + 0.001
+            await asyncio.sleep(0.001)
+            lateness.append(max(0.0, time.perf_counter() - expected) * 1000)
+
+    async def producer() -> None:
+        for i in range(0, n, burst):
+            for j in range(burst):
+                logger.info("llm_call", iteration=i + j, num_messages=4, stream=True)
+            await asyncio.sleep(0)
+
+    tick = asyncio.create_task(ticker())
+    await producer()
+    done = True
+    await tick
+    ordered = sorted(lateness)
+    return {
+        'p50_ms': round(ordered[len(ordered) // 2], 3),
+        'p99_ms': round(ordered[int(len(ordered) * 0.99)], 3),
+        'max_ms': round(ordered[-1], 3),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    calls = int(argv[0]) if len(argv) > 0 else 20_000
+    burst = int(argv[1]) if len(argv) > 1 else 20
+    report = {}
+    root = logging.getLogger()
+    with tempfile.TemporaryDirectory() as directory, open(os.devnull, "w") as devnull:
+        for queued in (False, True):
+            _configure(queued, directory, devnull)
+            mode = 'queued' if queued else 'sync'
+            report[mode] = {
+                'calls_per_s': round(call_rate(calls)),
+                'loop_stall': asyncio.run(loop_stall(calls, burst)),
+                'dropped': logging_stats().get('dropped', 0),
+            }
+            log_setup._stop_listener()
+            for handler in root.handlers:
+                handler.close()
+            root.handlers.clear()
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
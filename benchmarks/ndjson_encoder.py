@@ -0,0 +1,96 @@
+"""
+Micro-benchmark of NDJSON stream encoding, before and after the byte
+encoder and delta coalescing.
+
+Usage: python -m benchmarks.ndjson_encoder [tokens] [token_interval_ms] [coalesce_interval_ms]
+
+Reports:
+- encode throughput (chunks/s) of the old path (ChatChunk + model_dump +
+  json.dumps + concatenation) vs encode_delta()
+- frames written and bytes/frame for a paced token stream, one frame per
+  chunk (before) vs coalesce_frames() (after)
+"""
+import asyncio
+import json
+import sys
+import time
+from typing import List, Optional
+
+from src.models.schemas import ChatChunk
+from src.utils.ndjson import coalesce_frames, encode_chunk, encode_delta
+
+TOKENS = ["I've", " opened", " Safari", " for", " you", ",", " and", " it's", " ready", "."]
+
+
+def legacy_delta(content: str) -> str:
+    """The per-delta encoding the streaming runners used before"""
+    delta_chunk = ChatChunk(type="delta", content=content)
+    return json.dumps(delta_chunk.model_dump(exclude_none=True)) + "\n"
+
+
+def encode_throughput(n: int) -> dict:
+    """Chunks encoded per second by each path (CPU only)"""
+    start = time.perf_counter()
+    for i in range(n):
+        legacy_delta(TOKENS[i % len(TOKENS)]).encode()
+    before = n / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for i in range(n):
+        encode_delta(TOKENS[i % len(TOKENS)])
+    after = n / (time.perf_counter() - start)
+    return {
+        'chunks': n,
+        'before_chunks_per_s': round(before),
+        'after_chunks_per_s': round(after),
+        'speedup': round(after / before, 2),
+    }
+
+
+async def _token_stream(n: int, interval_s: float, legacy: bool):
+    meta = ChatChunk(type="meta", conversation_id="bench", step_id="bench")
+    final = ChatChunk(type="final", message="".join(TOKENS[i % len(TOKENS)] for i in range(n)))
+    yield (json.dumps(meta.model_dump(exclude_none=True)) + "\n").encode() if legacy else encode_chunk(meta)
+    for i in range(n):
+        await asyncio.sleep(interval_s)
+        token = TOKENS[i % len(TOKENS)]
+        yield legacy_delta(token).encode() if legacy else encode_delta(token)
+    yield (json.dumps(final.model_dump(exclude_none=True)) + "\n").encode() if legacy else encode_chunk(final)
+
+
+async def framing(n: int, token_interval_ms: float, coalesce_interval_ms: float) -> dict:
+    """Frames and bytes/frame for a paced stream, without and with coalescing"""
+    before: List[bytes] = [frame async for frame in _token_stream(n, token_interval_ms / 1000, legacy=True)]
+    after: List[bytes] = [
+        frame async for frame in coalesce_frames(
+            _token_stream(n, token_interval_ms / 1000, legacy=False), coalesce_interval_ms
+        )
+    ]
+    return {
+        'tokens': n,
+        'token_interval_ms': token_interval_ms,
+        'coalesce_interval_ms': coalesce_interval_ms,
+        'before_frames': len(before),
+        'before_bytes': sum(map(len, before)),
+        'before_bytes_per_frame': round(sum(map(len, before)) / len(before), 1),
+        'after_frames': len(after),
+        'after_bytes': sum(map(len, after)),
+        'after_bytes_per_frame': round(sum(map(len, after)) / len(after), 1),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    tokens = int(argv[0]) if len(argv) > 0 else 500
+    token_interval_ms = float(argv[1]) if len(argv) > 1 else 5.0
+    coalesce_interval_ms = float(argv[2]) if len(argv) > 2 else 25.0
+    report = {
+        'encode': encode_throughput(100_000),
+        'framing': asyncio.run(framing(tokens, token_interval_ms, coalesce_interval_ms)),
+    }
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,375 @@
+"""
+Traffic replay load generator for a running backend.
+
+Usage: python -m benchmarks.replay CORPUS.jsonl [--url http://localhost:8000]
+       [--arrival closed|poisson|recorded] [--concurrency 4] [--rate 2.0]
+       [--requests N | --duration S] [--stream-ratio 0.5] [--repeat-identical]
+       [--output report.json]
+       python -m benchmarks.replay --from-log logs/baby_ai.jsonl --arrival recorded --speed 10
+
+Corpus lines are JSON objects. The message is taken from "message" (or
+"body", then "title", so a backlog-style file works too); "stream",
+"conversation_id" and "priority" are used when present, and "offset_s" or
+"timestamp" gives the arrival time for --arrival recorded. The corpus is
+cycled until --requests or --duration is reached. Later cycles mark each
+message with the cycle number so the plan cache and request coalescing do
+not answer what were distinct requests (this also keeps marked commands
+off the intent fast path); --repeat-identical resends them unchanged.
+
+With --from-log, the chat_request_received events of the backend's JSON
+log are replayed instead: their timestamps give the arrival pattern and
+their stream flag the mode. The log does not keep message text, so a
+message of the logged length is synthesized.
+
+Arrivals:
+- closed: --concurrency clients, each sending its next request when the
+  previous one is done
+- poisson: open loop, exponential inter-arrival times at --rate per
+  second (seeded), whether or not earlier requests have finished
+- recorded: open loop at the corpus/log arrival times, divided by --speed
+
+The report (JSON on stdout) has offered and achieved throughput, latency
+and time-to-first-delta percentiles, errors by kind, and stream stalls:
+the longest gap between two chunks of each streamed response once its
+first delta arrived, with the number of gaps above --stall-ms.
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import random
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+
+from src.models.schemas import ChatRequest
+
+# Arrival offset in seconds (None: not recorded) and the request to send
+ReplayItem = Tuple[Optional[float], ChatRequest]
+
+SYNTHETIC_APPS = ("Safari", "Notes", "TextEdit", "Music", "Calendar")
+SYNTHETIC_FILLER = " and tell me when it is ready"
+
+
+def synthesize_message(length: int, index: int, cycle: int = 0) -> str:
+    """
+    A deterministic message of the given length. Messages differ by index
+    and corpus cycle so the plan cache and request coalescing do not answer
+    replays that were distinct requests in production.
+    """
+    suffix = f" #{index}.{cycle}?" if cycle else f" #{index}?"
+    text = f"Could you get {SYNTHETIC_APPS[index % len(SYNTHETIC_APPS)]} up on screen"
+    while len(text) + len(suffix) < length:
+        text += SYNTHETIC_FILLER
+    return (text[:max(0, length - len(suffix))] + suffix).strip() or "?"
+
+
+def _epoch(value: Any) -> Optional[float]:
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+def _open_lines(path: str) -> Iterator[bytes]:
+    with (gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")) as f:
+        yield from f
+
+
+def load_corpus(path: str) -> List[ReplayItem]:
+    """Requests of a JSONL corpus, with their arrival offsets when recorded"""
+    items: List[ReplayItem] = []
+    first: Optional[float] = None
+    for line in _open_lines(path):
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        message = record.get("message") or record.get("body") or record.get("title")
+        if not message:
+            continue
+        offset = record.get("offset_s")
+        if offset is None and (at := _epoch(record.get("timestamp"))) is not None:
+            first = at if first is None else first
+            offset = at - first
+        request = ChatRequest(
+            message=message,
+            stream=bool(record.get("stream", False)),
+            conversation_id=record.get("conversation_id"),
+            priority=record.get("priority"),
+        )
+        items.append((offset, request))
+    return items
+
+
+def load_log_requests(path: str) -> List[ReplayItem]:
+    """chat_request_received events of a backend log, as synthesized requests"""
+    items: List[ReplayItem] = []
+    first: Optional[float] = None
+    for line in _open_lines(path):
+        if b'"event": "chat_request_received"' not in line:
+            continue
+        record = json.loads(line)
+        at = _epoch(record.get("timestamp"))
+        if at is None:
+            continue
+        first = at if first is None else first
+        request = ChatRequest(
+            message=synthesize_message(int(record.get("message_length") or 20), len(items)),
+            stream=bool(record.get("stream", False)),
+        )
+        items.append((at - first, request))
+    return items
+
+
+def _percentiles(values: List[float]) -> Optional[Dict[str, float]]:
+    if not values:
+        return None
+    ordered = sorted(values)
+
+    def pick(pct: float) -> float:
+        return round(ordered[min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))], 1)
+
+    return {'p50': pick(50), 'p90': pick(90), 'p99': pick(99), 'max': round(ordered[-1], 1), 'count': len(ordered)}
+
+
+class ReplayStats:
+    """Outcomes of the replayed requests"""
+
+    def __init__(self, stall_ms: float):
+        self.stall_ms = stall_ms
+        self.sent = 0
+        self.completed = 0
+        self.errors: Dict[str, int] = {}
+        self.latencies: Dict[str, List[float]] = {'stream': [], 'non_stream': []}
+        self.ttft: List[float] = []
+        self.max_gaps: List[float] = []
+        self.stalls = 0
+        self.stalled_requests = 0
+        self.send_lag: List[float] = []
+
+    def error(self, kind: str) -> None:
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def report(self, elapsed: float, skipped: int) -> Dict[str, Any]:
+        all_latencies = self.latencies['stream'] + self.latencies['non_stream']
+        return {
+            'elapsed_s': round(elapsed, 2),
+            'sent': self.sent,
+            'completed': self.completed,
+            'skipped': skipped,
+            'offered_rps': round(self.sent / elapsed, 2) if elapsed else None,
+            'throughput_rps': round(self.completed / elapsed, 2) if elapsed else None,
+            'error_rate': round(sum(self.errors.values()) / self.sent, 4) if self.sent else 0.0,
+            'errors': dict(self.errors),
+            'latency_ms': {
+                'all': _percentiles(all_latencies),
+                'stream': _percentiles(self.latencies['stream']),
+                'non_stream': _percentiles(self.latencies['non_stream']),
+            },
+            'ttft_ms': _percentiles(self.ttft),
+            'stream_stalls': {
+                'threshold_ms': self.stall_ms,
+                'stalls': self.stalls,
+                'stalled_requests': self.stalled_requests,
+                'max_gap_ms': _percentiles(self.max_gaps),
+            },
+            # How late the generator itself sent requests (open loop only)
+            'send_lag_ms': _percentiles(self.send_lag),
+        }
+
+
+async def send(client: httpx.AsyncClient, url: str, request: ChatRequest, stats: ReplayStats) -> None:
+    """Send one request and record its outcome"""
+    stats.sent += 1
+    body = request.model_dump(exclude_none=True)
+    start = time.perf_counter()
+    try:
+        if not request.stream:
+            response = await client.post(url, json=body)
+            if response.status_code != 200:
+                stats.error(f"http_{response.status_code}")
+                return
+            stats.latencies['non_stream'].append((time.perf_counter() - start) * 1000)
+            stats.completed += 1
+            return
+
+        async with client.stream("POST", url, json=body) as response:
+            if response.status_code != 200:
+                await response.aread()
+                stats.error(f"http_{response.status_code}")
+                return
+            last: Optional[float] = None
+            max_gap = 0.0
+            stalls = 0
+            finished = False
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                now = time.perf_counter()
+                kind = json.loads(line).get("type")
+                if last is not None:
+                    # Output stopping mid-answer (time before the first delta is TTFT)
+                    gap = (now - last) * 1000
+                    max_gap = max(max_gap, gap)
+                    stalls += gap > stats.stall_ms
+                    last = now
+                elif kind == "delta":
+                    stats.ttft.append((now - start) * 1000)
+                    last = now
+                finished = finished or kind == "final"
+            if not finished:
+                stats.error("incomplete_stream")
+                return
+            stats.latencies['stream'].append((time.perf_counter() - start) * 1000)
+            stats.max_gaps.append(max_gap)
+            stats.stalls += stalls
+            stats.stalled_requests += stalls > 0
+            stats.completed += 1
+    except httpx.TimeoutException:
+        stats.error("timeout")
+    except httpx.HTTPError as e:
+        stats.error(type(e).__name__)
+
+
+def _in_cycle(request: ChatRequest, index: int, cycle: int, synthesized: bool) -> ChatRequest:
+    """The request as sent in a later corpus cycle, with a message distinct from earlier cycles"""
+    if synthesized:
+        # Same length as logged, index and cycle in the suffix
+        message = synthesize_message(len(request.message), index, cycle)
+    else:
+        message = f"{request.message} ({cycle + 1})"
+    return request.model_copy(update={'message': message})
+
+
+def _requests(items: List[ReplayItem], args: argparse.Namespace, rng: random.Random) -> Iterator[ReplayItem]:
+    """Corpus items in order, cycled, with the stream mix applied"""
+    count = 0
+    cycle = 0
+    span = max((offset or 0.0) for offset, _ in items) if items else 0.0
+    while args.requests is None or count < args.requests:
+        for index, (offset, request) in enumerate(items):
+            if args.requests is not None and count >= args.requests:
+                return
+            if cycle and not args.repeat_identical:
+                request = _in_cycle(request, index, cycle, synthesized=bool(args.from_log))
+            if args.stream_ratio is not None:
+                request = request.model_copy(update={'stream': rng.random() < args.stream_ratio})
+            if offset is not None:
+                # Later cycles repeat the recorded pattern after the first one
+                offset += cycle * (span + 1.0)
+            count += 1
+            yield offset, request
+        cycle += 1
+
+
+async def replay(items: List[ReplayItem], args: argparse.Namespace) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    stats = ReplayStats(args.stall_ms)
+    url = args.url.rstrip("/") + "/api/chat"
+    deadline = time.perf_counter() + args.duration if args.duration else None
+    pending = _requests(items, args, rng)
+    skipped = 0
+    limits = httpx.Limits(max_connections=max(args.concurrency, args.max_in_flight))
+
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        start = time.perf_counter()
+        if args.arrival == "closed":
+            async def worker() -> None:
+                for _, request in pending:
+                    if deadline is not None and time.perf_counter() >= deadline:
+                        return
+                    await send(client, url, request, stats)
+
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        else:
+            tasks: set = set()
+            next_at = 0.0
+            for offset, request in pending:
+                if args.arrival == "poisson":
+                    next_at += rng.expovariate(args.rate)
+                else:
+                    next_at = (offset or 0.0) / args.speed
+                if deadline is not None and start + next_at >= deadline:
+                    break
+                delay = start + next_at - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                stats.send_lag.append(max(0.0, -delay) * 1000)
+                if len(tasks) >= args.max_in_flight:
+                    # Open loop: never wait for the backend, count what could not be sent
+                    skipped += 1
+                    continue
+                task = asyncio.create_task(send(client, url, request, stats))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        elapsed = time.perf_counter() - start
+
+    return stats.report(elapsed, skipped)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay a request corpus or logged traffic against the backend")
+    parser.add_argument("corpus", nargs="?", help="JSONL request corpus")
+    parser.add_argument("--from-log", help="Replay chat_request_received events of a backend JSON log")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--arrival", choices=("closed", "poisson", "recorded"), default="closed")
+    parser.add_argument("--concurrency", type=int, default=4, help="Clients in closed-loop mode")
+    parser.add_argument("--rate", type=float, default=2.0, help="Poisson arrivals per second")
+    parser.add_argument("--speed", type=float, default=1.0, help="Time compression of recorded arrivals")
+    parser.add_argument("--requests", type=int, help="Requests to send (default: one pass over the corpus)")
+    parser.add_argument("--duration", type=float, help="Stop sending after this many seconds")
+    parser.add_argument("--stream-ratio", type=float, help="Fraction sent as streaming (default: as recorded)")
+    parser.add_argument(
+        "--repeat-identical", action="store_true",
+        help="Resend corpus messages unchanged on later cycles (the plan cache and coalescing may answer them)",
+    )
+    parser.add_argument("--max-in-flight", type=int, default=256, help="Open-loop cap on outstanding requests")
+    parser.add_argument("--stall-ms", type=float, default=500.0, help="Gap between stream chunks counted as a stall")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Save the report as JSON")
+    args = parser.parse_args(argv)
+
+    if bool(args.corpus) == bool(args.from_log):
+        parser.error("give either a corpus file or --from-log")
+    items = load_log_requests(args.from_log) if args.from_log else load_corpus(args.corpus)
+    if not items:
+        print("Nothing to replay", file=sys.stderr)
+        return 1
+    if args.requests is None and args.duration is None:
+        args.requests = len(items)
+    if args.arrival == "recorded" and any(offset is None for offset, _ in items):
+        parser.error("--arrival recorded needs offset_s or timestamp on every corpus line")
+
+    report = {
+        'config': {
+            'source': args.from_log or args.corpus,
+            'url': args.url,
+            'arrival': args.arrival,
+            'concurrency': args.concurrency if args.arrival == "closed" else None,
+            'rate': args.rate if args.arrival == "poisson" else None,
+            'speed': args.speed if args.arrival == "recorded" else None,
+            'stream_ratio': args.stream_ratio,
+            'repeat_identical': args.repeat_identical,
+            'corpus_requests': len(items),
+        },
+        **asyncio.run(replay(items, args)),
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""
+Overhead of the per-request stage spans.
+
+Usage: python -m benchmarks.tracing_overhead [runs]
+
+Replays the span calls of a typical tool-using streamed run (two LLM
+calls, one tool, 200 streamed deltas) with tracing off and with every
+request sampled, and reports the cost per run in microseconds.
+"""
+import json
+import sys
+import time
+from typing import List, Optional
+
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from pydantic_ai import FunctionToolCallEvent, FunctionToolResultEvent, PartDeltaEvent, PartStartEvent
+from pydantic_ai.messages import TextPart, TextPartDelta, ToolCallPart, ToolReturnPart
+
+from src.models.config import TracingConfig
+from src.utils.tracing import RunTrace, setup_tracing, shutdown_tracing
+
+CALL = ToolCallPart(tool_name="open_app", args={"appName": "Safari"}, tool_call_id="c1")
+EVENTS = [
+    PartStartEvent(index=0, part=CALL),
+    FunctionToolCallEvent(part=CALL),
+    FunctionToolResultEvent(result=ToolReturnPart(tool_name="open_app", content="ok", tool_call_id="c1")),
+    PartStartEvent(index=0, part=TextPart(content="I")),
+    *[PartDeltaEvent(index=0, delta=TextPartDelta(content_delta=" token")) for _ in range(200)],
+]
+
+
+def per_run_us(runs: int) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        run_trace = RunTrace("agent.run", stream=True)
+        run_trace.llm_start()
+        for event in EVENTS:
+            run_trace.observe(event)
+            run_trace.encoded(0.0)
+        run_trace.end(completed=True)
+    return (time.perf_counter() - start) / runs * 1e6
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    runs = int(argv[0]) if argv else 2000
+    setup_tracing(TracingConfig(sample_ratio=0.0))
+    off = per_run_us(runs)
+    setup_tracing(TracingConfig(sample_ratio=1.0), exporter=InMemorySpanExporter())
+    on = per_run_us(runs)
+    shutdown_tracing()
+    print(json.dumps({'runs': runs, 'events_per_run': len(EVENTS), 'off_us_per_run': round(off, 1), 'sampled_us_per_run': round(on, 1)}, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,7 +2,9 @@ import time
 import uuid
 from typing import List, Dict, Any
 from appscript import app as appscript_app
+from src.agents.app_index import resolve_app_name
 from src.agents.base import BaseAgent
+from src.agents.tool_registry import ToolRegistry
 from src.models.schemas import ToolCall, ExecutionResult
 import structlog
 
@@ -18,6 +20,7 @@ def open_app(appName: str) -> str:
     Returns:
         A success message or error description
     """
+    appName = resolve_app_name(appName)
     try:
         appscript_app(appName).activate()
         result = f"Application '{appName}' activated successfully"
@@ -38,6 +41,7 @@ def close_app(appName: str) -> str:
     Returns:
         A success message or error description
     """
+    appName = resolve_app_name(appName)
     try:
         appscript_app(appName).quit()
         result = f"Application '{appName}' closed successfully"
@@ -49,6 +53,10 @@ def close_app(appName: str) -> str:
         return error_msg
 
 
+# Schemas and argument validators are compiled once, at import
+TOOL_REGISTRY = ToolRegistry([open_app, close_app])
+
+
 class AppAgent(BaseAgent):
     """Agent for macOS application control"""
 
@@ -57,6 +65,11 @@ class AppAgent(BaseAgent):
         """Return list of tool functions for Ollama SDK"""
         return [open_app, close_app]
 
+    @classmethod
+    def get_tool_registry(cls) -> ToolRegistry:
+        """Return the registry with precompiled schemas and validators"""
+        return TOOL_REGISTRY
+
     @classmethod
     def get_available_functions(cls) -> Dict[str, callable]:
         """Return dictionary mapping function names to callables"""
@@ -0,0 +1,298 @@
+"""
+In-memory index of installed and running applications.
+
+Resolves whatever name the LLM or the user produced ("chrome", "Spotfy",
+"vscode") to the exact application name appscript expects ("Google Chrome",
+"Spotify", "Visual Studio Code") before a tool is dispatched, so a wrong guess
+does not cost another LLM iteration.
+"""
+import os
+import plistlib
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+import structlog
+
+logger = structlog.get_logger()
+
+# An enumerator returns the application names currently available
+AppEnumerator = Callable[[], Iterable[str]]
+
+DEFAULT_APP_DIRS = [
+    "/Applications",
+    "/Applications/Utilities",
+    "/System/Applications",
+    "/System/Applications/Utilities",
+    os.path.expanduser("~/Applications"),
+]
+
+# Common nicknames that neither edit distance nor name tokens can recover
+BUILTIN_ALIASES: Dict[str, str] = {
+    'vscode': 'Visual Studio Code',
+    'vs code': 'Visual Studio Code',
+    'code': 'Visual Studio Code',
+    'word': 'Microsoft Word',
+    'excel': 'Microsoft Excel',
+    'powerpoint': 'Microsoft PowerPoint',
+    'outlook': 'Microsoft Outlook',
+    'teams': 'Microsoft Teams',
+    'itunes': 'Music',
+    'apple music': 'Music',
+    'settings': 'System Settings',
+    'preferences': 'System Preferences',
+    'system preferences': 'System Settings',
+    'iterm': 'iTerm',
+}
+
+# Words that must not become aliases on their own ("Google Chrome" -> "chrome" is fine, "google" is not)
+_NON_ALIAS_TOKENS = {'google', 'microsoft', 'apple', 'adobe', 'the', 'app', 'pro', 'for', 'and', 'mac', 'macos'}
+
+
+def bundle_directory_enumerator(directories: Optional[List[str]] = None) -> AppEnumerator:
+    """
+    Enumerator over '.app' bundles in the given directories (non-recursive).
+
+    Both the bundle file name and, when present, the CFBundleName /
+    CFBundleDisplayName from Contents/Info.plist are reported.
+
+    Args:
+        directories: Directories to scan (default: standard macOS locations)
+
+    Returns:
+        Enumerator callable
+    """
+    directories = directories or DEFAULT_APP_DIRS
+
+    def enumerate_bundles() -> List[str]:
+        names: List[str] = []
+        for directory in directories:
+            try:
+                entries = os.scandir(directory)
+            except OSError:
+                continue
+            with entries:
+                for entry in entries:
+                    if not entry.name.endswith(".app"):
+                        continue
+                    names.append(entry.name[:-4])
+                    names.extend(_bundle_plist_names(entry.path))
+        return names
+
+    return enumerate_bundles
+
+
+def _bundle_plist_names(bundle_path: str) -> List[str]:
+    """Read display names from a bundle's Info.plist, ignoring unreadable files"""
+    try:
+        with open(os.path.join(bundle_path, "Contents", "Info.plist"), "rb") as f:
+            info = plistlib.load(f)
+    except Exception:
+        return []
+    return [info[key] for key in ("CFBundleDisplayName", "CFBundleName") if isinstance(info.get(key), str)]
+
+
+def running_app_enumerator() -> List[str]:
+    """Names of running foreground applications (macOS only, empty elsewhere)"""
+    try:
+        from appscript import app as appscript_app, its
+        return list(appscript_app('System Events').processes[its.background_only == False].name.get())
+    except Exception:
+        return []
+
+
+def _trigrams(text: str) -> Set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a: str, b: str) -> int:
+    """Levenshtein distance (two-row dynamic programming)"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+class AppIndex:
+    """Alias map plus trigram index with edit-distance ranking"""
+
+    def __init__(
+        self,
+        enumerators: Optional[List[AppEnumerator]] = None,
+        aliases: Optional[Dict[str, str]] = None,
+        min_similarity: float = 0.7,
+        min_refresh_interval_seconds: float = 30.0,
+    ):
+        """
+        Args:
+            enumerators: Sources of application names (default: bundle dirs + running apps)
+            aliases: Extra nickname -> application name mappings
+            min_similarity: Fuzzy matches below this similarity (0-1) are rejected
+            min_refresh_interval_seconds: Minimum time between refreshes triggered by misses
+        """
+        self.enumerators = enumerators if enumerators is not None else [
+            bundle_directory_enumerator(), running_app_enumerator,
+        ]
+        self.extra_aliases = {**BUILTIN_ALIASES, **(aliases or {})}
+        self.min_similarity = min_similarity
+        self.min_refresh_interval_seconds = min_refresh_interval_seconds
+        self._lock = threading.Lock()
+        self._apps: Set[str] = set()
+        self._lookup: Dict[str, str] = {}  # casefolded name or alias -> app name
+        self._trigram_index: Dict[str, Set[str]] = {}  # trigram -> casefolded keys
+        self._last_refresh = 0.0
+
+    def __len__(self) -> int:
+        return len(self._apps)
+
+    def _enumerate(self) -> Set[str]:
+        names: Set[str] = set()
+        for enumerator in self.enumerators:
+            try:
+                names.update(name for name in enumerator() if name)
+            except Exception as e:
+                logger.warning("app_enumerator_failed", error=str(e))
+        return names
+
+    def _keys_for(self, app_name: str, token_counts: Dict[str, int]) -> List[str]:
+        keys = [app_name.casefold()]
+        for token in app_name.casefold().split():
+            if token_counts.get(token) == 1 and token not in _NON_ALIAS_TOKENS and len(token) > 2:
+                keys.append(token)
+        return keys
+
+    def _add_key(self, key: str, app_name: str) -> None:
+        self._lookup.setdefault(key, app_name)
+        for trigram in _trigrams(key):
+            self._trigram_index.setdefault(trigram, set()).add(key)
+
+    def _remove_key(self, key: str) -> None:
+        self._lookup.pop(key, None)
+        for trigram in _trigrams(key):
+            keys = self._trigram_index.get(trigram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._trigram_index[trigram]
+
+    def refresh(self) -> Tuple[int, int]:
+        """
+        Re-run the enumerators and apply only the differences to the index.
+
+        Returns:
+            (number of apps added, number of apps removed)
+        """
+        current = self._enumerate()
+        with self._lock:
+            added = current - self._apps
+            removed = self._apps - current
+            if added or removed:
+                # Token aliases depend on uniqueness across all apps, so
+                # recompute key sets and touch only the keys that changed.
+                old_counts = self._token_counts(self._apps)
+                new_counts = self._token_counts(current)
+                old_keys = {k: a for a in self._apps for k in self._keys_for(a, old_counts)}
+                new_keys = {k: a for a in current for k in self._keys_for(a, new_counts)}
+                for key in old_keys.keys() - new_keys.keys():
+                    self._remove_key(key)
+                for key, app_name in new_keys.items():
+                    if old_keys.get(key) != app_name:
+                        self._lookup.pop(key, None)
+                        self._add_key(key, app_name)
+                for alias, app_name in self.extra_aliases.items():
+                    if app_name in current:
+                        self._add_key(alias.casefold(), app_name)
+                    elif self._lookup.get(alias.casefold()) == app_name:
+                        self._remove_key(alias.casefold())
+                self._apps = current
+            self._last_refresh = time.monotonic()
+
+        if added or removed:
+            logger.info("app_index_refreshed", apps=len(current), added=len(added), removed=len(removed))
+        return len(added), len(removed)
+
+    @staticmethod
+    def _token_counts(apps: Set[str]) -> Dict[str, int]:
+        counts: Dict[str, int] = {}
+        for app_name in apps:
+            for token in set(app_name.casefold().split()):
+                counts[token] = counts.get(token, 0) + 1
+        return counts
+
+    def _fuzzy(self, query: str) -> Optional[str]:
+        query_trigrams = _trigrams(query)
+        candidates: Dict[str, int] = {}
+        for trigram in query_trigrams:
+            for key in self._trigram_index.get(trigram, ()):
+                candidates[key] = candidates.get(key, 0) + 1
+
+        best_key, best_score = None, 0.0
+        # Rank only the strongest trigram candidates by edit distance
+        for key, _ in sorted(candidates.items(), key=lambda kv: kv[1], reverse=True)[:20]:
+            similarity = 1.0 - _edit_distance(query, key) / max(len(query), len(key))
+            if similarity > best_score:
+                best_key, best_score = key, similarity
+        if best_key is not None and best_score >= self.min_similarity:
+            return self._lookup[best_key]
+        return None
+
+    def lookup(self, name: str) -> Optional[str]:
+        """
+        Resolve a name to an indexed application name.
+
+        Args:
+            name: Name as produced by the user or the LLM
+
+        Returns:
+            Exact application name, or None when nothing is close enough
+        """
+        query = " ".join(name.casefold().split())
+        if query.endswith(".app"):
+            query = query[:-4]
+        with self._lock:
+            exact = self._lookup.get(query)
+            if exact is not None:
+                return exact
+            return self._fuzzy(query)
+
+    def resolve(self, name: str) -> str:
+        """
+        Resolve a name, refreshing the index once on a miss (newly installed app).
+
+        Args:
+            name: Name as produced by the user or the LLM
+
+        Returns:
+            Exact application name, or the input unchanged when unresolved
+        """
+        resolved = self.lookup(name)
+        if resolved is None and time.monotonic() - self._last_refresh >= self.min_refresh_interval_seconds:
+            self.refresh()
+            resolved = self.lookup(name)
+        if resolved is not None and resolved != name:
+            logger.info("app_name_resolved", requested=name, resolved=resolved)
+        return resolved or name
+
+
+_default_index: Optional[AppIndex] = None
+_default_index_lock = threading.Lock()
+
+
+def get_app_index() -> AppIndex:
+    """Return the process-wide AppIndex, building it on first use"""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = AppIndex()
+            _default_index.refresh()
+    return _default_index
+
+
+def resolve_app_name(name: str) -> str:
+    """Resolve an application name against the process-wide index"""
+    return get_app_index().resolve(name)
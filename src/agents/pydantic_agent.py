@@ -5,29 +5,102 @@ Replaces custom orchestrator with production-grade Pydantic AI framework
 Official Docs: https://ai.pydantic.dev
 """
 
+import asyncio
 import uuid
-import json
 import os
-from typing import Optional
-from pydantic_ai import Agent, RunContext
+import time
+from contextlib import aclosing
+from typing import Any, AsyncIterable, AsyncIterator, Optional, List, Tuple
+from pydantic_ai import (
+    Agent,
+    AgentRunResultEvent,
+    FunctionToolCallEvent,
+    FunctionToolResultEvent,
+    PartDeltaEvent,
+    PartStartEvent,
+    RunContext,
+)
+from pydantic_ai.exceptions import UnexpectedModelBehavior
+from pydantic_ai.messages import (
+    ModelMessage,
+    ModelRequest,
+    ModelResponse,
+    TextPart,
+    TextPartDelta,
+    ThinkingPart,
+    ToolCallPart,
+    ToolReturnPart,
+    UserPromptPart,
+)
+from pydantic_ai.settings import ModelSettings
+from pydantic_ai.tools import ToolDefinition
 from appscript import app as appscript_app
 import structlog
 
-from src.models.schemas import ChatResponse, ChatChunk
+from src.agents.app_agent import AppAgent
+from src.agents.app_index import resolve_app_name
+from src.agents.tool_selector import get_tool_selector
+from src.models.schemas import ChatResponse, ChatChunk, FunctionCall
+from src.orchestrator.admission import AdmissionRejected, admit_llm
+from src.orchestrator.cancellation import CANCELLED_REPLY, get_cancellation_registry
 from src.orchestrator.prompts import SYSTEM_PROMPT
+from src.orchestrator.context_compactor import ContextCompactor, log_compaction
+from src.orchestrator.intent_matcher import try_fast_path
+from src.orchestrator.plan_cache import is_successful_result, replay_cached_plan, remember_plan
+from src.orchestrator.session_store import estimate_message_tokens, get_session_store
+from src.orchestrator.progress import StreamProgress
+from src.orchestrator.speculative import SpeculativeRun, claim_or_run
+from src.orchestrator.tool_executor import get_tool_executor
+from src.utils.ndjson import encode_chunk, encode_delta
+from src.utils.tracing import RunTrace
+from src.orchestrator.think_policy import ThinkDecision, get_think_policy
 
 logger = structlog.get_logger()
 
 # ============================================================================
 # Create Pydantic AI Agent
 # ============================================================================
-# Set Ollama base URL environment variable for Pydantic AI (with /v1 for OpenAI compatibility)
-os.environ['OLLAMA_BASE_URL'] = 'http://localhost:11434/v1'
+# Set Ollama base URL environment variable for Pydantic AI (with /v1 for OpenAI compatibility);
+# a preset value (e.g. a local fake server for benchmarks) is kept
+os.environ.setdefault('OLLAMA_BASE_URL', 'http://localhost:11434/v1')
+# Native Ollama API of the same server (model residency, legacy orchestrator)
+OLLAMA_HOST = os.environ['OLLAMA_BASE_URL'].removesuffix('/').removesuffix('/v1')
+
+# Ollama model served through the OpenAI-compatible endpoint
+MODEL_NAME = 'qwen3:4b-thinking-2507-q4_K_M'
+
+# Maximum number of tool definitions sent to the model per request
+TOOL_SELECTION_TOP_K = 8
+
+
+async def select_relevant_tools(ctx: RunContext, tool_defs: List[ToolDefinition]) -> List[ToolDefinition]:
+    """Send only the tools most relevant to the user's request (full set on a miss)"""
+    if not isinstance(ctx.prompt, str):
+        return tool_defs
+    # Called before every model request: count the selection once per run
+    selection = get_tool_selector().select(ctx.prompt, TOOL_SELECTION_TOP_K, record=ctx.run_step == 1)
+    if selection.fallback:
+        return tool_defs
+    selected = set(selection.names)
+    return [tool_def for tool_def in tool_defs if tool_def.name in selected]
+
+
+_context_compactor = ContextCompactor()
+
+
+def compact_history(messages: List[ModelMessage]) -> List[ModelMessage]:
+    """Truncate large tool outputs and summarize superseded ones before each model request"""
+    compacted, report = _context_compactor.compact_model_messages(messages)
+    log_compaction(report, num_messages=len(messages))
+    return compacted
+
 
 agent = Agent(
-    'ollama:qwen3:4b-thinking-2507-q4_K_M',  # Format: 'provider:model_name'
+    f'ollama:{MODEL_NAME}',  # Format: 'provider:model_name'
     instructions=SYSTEM_PROMPT,  # Use 'instructions' for single-turn (no history)
     retries=3,  # Automatic retry on failures
+    prepare_tools=select_relevant_tools,  # Shrink the tool list per request
+    history_processors=[compact_history],  # Bound prompt growth across tool iterations
 )
 
 # ============================================================================
@@ -36,6 +109,32 @@ agent = Agent(
 # Tools use RunContext as first parameter for dependency injection
 # Docstrings are extracted by Pydantic AI and sent to LLM as tool descriptions
 
+def _open_app(appName: str) -> str:
+    appName = resolve_app_name(appName)
+    try:
+        appscript_app(appName).activate()
+        logger.info("open_app_success", app_name=appName)
+        return f"I've opened {appName} successfully."
+    except Exception as e:
+        logger.error("open_app_failed", app_name=appName, error=str(e))
+        return f"Failed to open {appName}: {str(e)}"
+
+
+def _close_app(appName: str) -> str:
+    appName = resolve_app_name(appName)
+    try:
+        appscript_app(appName).quit()
+        logger.info("close_app_success", app_name=appName)
+        return f"I've closed {appName} successfully."
+    except Exception as e:
+        logger.error("close_app_failed", app_name=appName, error=str(e))
+        return f"Failed to close {appName}: {str(e)}"
+
+
+# Tool implementations by name (used for speculative execution)
+TOOL_IMPLEMENTATIONS = {'open_app': _open_app, 'close_app': _close_app}
+
+
 @agent.tool
 def open_app(ctx: RunContext, appName: str) -> str:
     """
@@ -47,13 +146,8 @@ def open_app(ctx: RunContext, appName: str) -> str:
     Returns:
         Success message or error description
     """
-    try:
-        appscript_app(appName).activate()
-        logger.info("open_app_success", app_name=appName)
-        return f"I've opened {appName} successfully."
-    except Exception as e:
-        logger.error("open_app_failed", app_name=appName, error=str(e))
-        return f"Failed to open {appName}: {str(e)}"
+    # Reuses the execution started while the call was still streaming, if any
+    return claim_or_run(ctx.deps, 'open_app', {'appName': appName}, _open_app)
 
 
 @agent.tool
@@ -67,31 +161,184 @@ def close_app(ctx: RunContext, appName: str) -> str:
     Returns:
         Success message or error description
     """
+    return claim_or_run(ctx.deps, 'close_app', {'appName': appName}, _close_app)
+
+
+# ============================================================================
+# Plan Cache Helpers
+# ============================================================================
+
+def _plan_from_messages(messages) -> Tuple[List[FunctionCall], List[str]]:
+    """Extract executed tool calls and their results from a run's message history"""
+    calls: List[FunctionCall] = []
+    results: List[str] = []
+    for message in messages:
+        for part in message.parts:
+            if part.part_kind == 'tool-call':
+                calls.append(FunctionCall(name=part.tool_name, arguments=part.args_as_dict()))
+            elif part.part_kind == 'tool-return':
+                results.append(str(part.content))
+    return calls, results
+
+
+async def _replay_cached(user_message: str, conversation_id: str) -> Optional[ChatResponse]:
+    """Replay a cached plan for a repeated request, or return None"""
+    return await replay_cached_plan(
+        user_message,
+        AppAgent.get_available_functions(),
+        SYSTEM_PROMPT,
+        conversation_id=conversation_id,
+    )
+
+
+def _remember_run(user_message: str, messages, reply: str) -> None:
+    """Cache the tool-call plan of a completed run"""
+    calls, results = _plan_from_messages(messages)
+    if len(calls) != len(results):
+        return
+    remember_plan(
+        user_message, calls, results, reply,
+        AppAgent.get_available_functions(), SYSTEM_PROMPT
+    )
+
+
+def _exchange_messages(user_message: str, reply: str) -> List[ModelMessage]:
+    """History entry for a turn answered without the LLM (fast path, plan cache)"""
+    return [
+        ModelRequest(parts=[UserPromptPart(content=user_message)]),
+        ModelResponse(parts=[TextPart(content=reply)]),
+    ]
+
+
+def _record_prompt_size(history: List[ModelMessage], user_message: str) -> None:
+    """Track the estimated prompt size (history + new message) of an LLM turn"""
+    get_session_store().record_prompt(
+        sum(estimate_message_tokens(m) for m in history) + len(user_message) // 4
+    )
+
+
+# ============================================================================
+# Reasoning Budget Helpers
+# ============================================================================
+
+def _model_settings(decision: ThinkDecision) -> ModelSettings:
+    """Map a reasoning decision onto Ollama's OpenAI-compatible request"""
+    settings: ModelSettings = {}
+    if not decision.think:
+        settings['extra_body'] = {'reasoning_effort': 'none'}
+    if decision.budget_tokens is not None:
+        settings['max_tokens'] = decision.budget_tokens
+    return settings
+
+
+def _speculative_run() -> SpeculativeRun:
+    """Per-run speculation state, passed to the agent as deps"""
+    return SpeculativeRun(
+        lambda name, arguments: TOOL_IMPLEMENTATIONS[name](**arguments),
+        get_tool_executor(),
+    )
+
+
+def _escalation(decision: ThinkDecision, reason: str, tool_calls: int, streamed_text: str = "") -> Optional[ThinkDecision]:
+    """
+    Next reasoning level to re-run a failed turn with, or None.
+
+    Only turns that called no tools (and, when streaming, sent no text yet)
+    are re-run: a retry starts the run over, so tools would run twice and
+    their chunks would reach the client again.
+    """
+    if tool_calls or streamed_text:
+        return None
+    return get_think_policy().escalate(decision, reason)
+
+
+def _record_think_outcome(initial: ThinkDecision, final: ThinkDecision, start: float, messages, reply: str) -> None:
+    """Record latency and tool-call accuracy of a run under its initial reasoning level"""
+    calls, results = _plan_from_messages(messages)
+    failures = sum(1 for result in results if not is_successful_result(result))
+    get_think_policy().record(
+        initial, (time.perf_counter() - start) * 1000, len(calls), failures,
+        success=bool(reply) and failures == 0 and final is initial,
+    )
+
+
+# Queue marker for the end of an agent run's events
+_RUN_DONE = object()
+
+
+async def _run_events(user_message: str, **run_kwargs) -> AsyncIterator[Any]:
+    """
+    Equivalent of agent.run_stream_events() that owns its run task.
+
+    run_stream_events() leaves the run going when its consumer stops, so the
+    model keeps generating for nobody. Here the run is cancelled as soon as
+    the iterator is closed, which aborts the model request and any tool
+    call that has not started yet.
+    """
+    events: "asyncio.Queue[Any]" = asyncio.Queue()
+
+    async def forward(ctx: RunContext, stream: AsyncIterable[Any]) -> None:
+        async for event in stream:
+            events.put_nowait(event)
+
+    run = asyncio.ensure_future(agent.run(user_message, event_stream_handler=forward, **run_kwargs))
+    run.add_done_callback(lambda _: events.put_nowait(_RUN_DONE))
     try:
-        appscript_app(appName).quit()
-        logger.info("close_app_success", app_name=appName)
-        return f"I've closed {appName} successfully."
-    except Exception as e:
-        logger.error("close_app_failed", app_name=appName, error=str(e))
-        return f"Failed to close {appName}: {str(e)}"
+        while (event := await events.get()) is not _RUN_DONE:
+            yield event
+        yield AgentRunResultEvent(await run)
+    finally:
+        if not run.done():
+            run.cancel()
+            await asyncio.gather(run, return_exceptions=True)
+
+
+def _event_chunks(event, progress: StreamProgress) -> List[bytes]:
+    """Phase and tool lifecycle chunk lines for one agent stream event"""
+    lines: List[Optional[bytes]] = []
+    if isinstance(event, PartStartEvent):
+        if isinstance(event.part, ThinkingPart):
+            lines.append(progress.enter("thinking"))
+        elif isinstance(event.part, ToolCallPart):
+            lines.append(progress.enter("tool_call"))
+        elif isinstance(event.part, TextPart):
+            lines.append(progress.enter("answering"))
+            if event.part.content:
+                lines.append(encode_delta(event.part.content))
+    elif isinstance(event, PartDeltaEvent) and isinstance(event.delta, TextPartDelta):
+        lines.append(encode_delta(event.delta.content_delta))
+    elif isinstance(event, FunctionToolCallEvent):
+        lines.append(progress.enter("tools"))
+        lines.append(progress.tool_start(event.part.tool_name, event.part.args_as_dict(), event.part.tool_call_id))
+    elif isinstance(event, FunctionToolResultEvent):
+        result = event.result
+        success = isinstance(result, ToolReturnPart) and is_successful_result(str(result.content))
+        lines.append(progress.tool_end(result.tool_name, result.tool_call_id, success))
+        # The next model request starts once all tool results are in
+        if not progress.tools_running:
+            lines.append(progress.enter("model"))
+    return [line for line in lines if line]
 
 
 # ============================================================================
 # Non-Streaming Runner
 # ============================================================================
 
-async def run_agent_non_streaming(user_message: str) -> ChatResponse:
+async def run_agent_non_streaming(user_message: str, conversation_id: Optional[str] = None) -> ChatResponse:
     """
     Run Pydantic AI agent and return complete response.
 
     Args:
         user_message: User's natural language request
+        conversation_id: Existing conversation to continue (new one if None)
 
     Returns:
         ChatResponse with agent's reply
     """
-    conversation_id = str(uuid.uuid4())
+    conversation_id = conversation_id or str(uuid.uuid4())
     step_id = str(uuid.uuid4())
+    session_store = get_session_store()
+    history = session_store.history(conversation_id)
 
     logger.info(
         "pydantic_agent_start",
@@ -100,12 +347,91 @@ async def run_agent_non_streaming(user_message: str) -> ChatResponse:
     )
 
     try:
-        # Run agent with automatic tool calling and retry
-        result = await agent.run(user_message)
+        # Trivial commands ("open Safari") skip the LLM entirely
+        fast_response = await try_fast_path(user_message, conversation_id=conversation_id)
+        if fast_response is not None:
+            session_store.append_turn(conversation_id, _exchange_messages(user_message, fast_response.reply))
+            return fast_response
+
+        # Repeated requests replay their cached plan (only without history,
+        # since follow-ups like "now close it" depend on earlier turns)
+        if not history:
+            cached_response = await _replay_cached(user_message, conversation_id)
+            if cached_response is not None:
+                session_store.append_turn(conversation_id, _exchange_messages(user_message, cached_response.reply))
+                return cached_response
+
+        # Run agent with automatic tool calling and retry, escalating the
+        # reasoning level when a run fails or ends without an answer
+        # A fast path that fell back takes its LLM slot now
+        await admit_llm()
+        _record_prompt_size(history, user_message)
+        think_policy = get_think_policy()
+        initial_decision = decision = think_policy.decide(user_message)
+        start = time.perf_counter()
+        # Registered so a client disconnect or the cancel endpoint can stop the run
+        cancellations = get_cancellation_registry()
+        step = cancellations.begin(step_id)
+        run_trace = RunTrace("agent.run", conversation_id=conversation_id, step_id=step_id, stream=False)
+
+        tool_calls = 0
+
+        async def handle_events(ctx: RunContext, events: AsyncIterable[Any]) -> None:
+            nonlocal tool_calls
+            async for event in events:
+                speculation.observe_event(event)
+                run_trace.observe(event)
+                if isinstance(event, FunctionToolCallEvent):
+                    tool_calls += 1
+
+        try:
+            while True:
+                # Streamed tool-call arguments start idempotent tools before the response ends
+                speculation = _speculative_run()
+                run_trace.llm_start(think_level=decision.level)
+                try:
+                    result = await agent.run(
+                        user_message, message_history=history or None, model_settings=_model_settings(decision),
+                        deps=speculation, event_stream_handler=handle_events,
+                    )
+                except UnexpectedModelBehavior as e:
+                    next_decision = _escalation(decision, type(e).__name__, tool_calls)
+                    if next_decision is None:
+                        think_policy.record(initial_decision, (time.perf_counter() - start) * 1000, tool_calls, 0, False)
+                        raise
+                    decision = next_decision
+                    continue
+                finally:
+                    speculation.finish()
+                next_decision = None if result.output else _escalation(decision, "empty response", tool_calls)
+                if next_decision is None:
+                    break
+                decision = next_decision
+            step.completed = True
+            run_trace.end(output_tokens=result.usage().output_tokens, completed=True, think_level=decision.level)
+        except asyncio.CancelledError:
+            if not cancellations.acknowledge(step):
+                raise
+            return ChatResponse(
+                reply=CANCELLED_REPLY,
+                conversation_id=conversation_id,
+                step_id=step_id,
+                trace=None,
+            )
+        except Exception as e:
+            run_trace.end(error=e)
+            raise
+        finally:
+            cancellations.end(step)
+            run_trace.end(completed=step.completed, think_level=decision.level)
 
         # Access output via .output (not .data)
         # For Agent[None, str], result.output is a string
         reply = result.output
+        _record_think_outcome(initial_decision, decision, start, result.new_messages(), reply)
+        if not history:
+            _remember_run(user_message, result.all_messages(), reply)
+        session_store.append_turn(conversation_id, result.new_messages())
 
         logger.info(
             "pydantic_agent_complete",
@@ -122,6 +448,9 @@ async def run_agent_non_streaming(user_message: str) -> ChatResponse:
             trace=None,
         )
 
+    except AdmissionRejected:
+        # The fast path fell back and the LLM is over capacity (503 upstream)
+        raise
     except Exception as e:
         logger.error(
             "pydantic_agent_error",
@@ -142,7 +471,7 @@ async def run_agent_non_streaming(user_message: str) -> ChatResponse:
 # Streaming Runner
 # ============================================================================
 
-async def run_agent_streaming(user_message: str):
+async def run_agent_streaming(user_message: str, conversation_id: Optional[str] = None):
     """
     Run Pydantic AI agent with streaming response.
 
@@ -151,17 +480,25 @@ async def run_agent_streaming(user_message: str):
     - delta chunks (partial content)
     - final chunk (complete message)
 
-    Uses Pydantic AI's stream_text() method with delta=True for incremental chunks.
-    Docs: https://ai.pydantic.dev/api/result/#pydantic_ai.result.StreamedRunResult.stream_text
+    - phase / tool_start / tool_end chunks (progress while thinking and running tools)
+
+    Uses Pydantic AI's agent events (see _run_events) so tool activity is visible as it happens.
+    Docs: https://ai.pydantic.dev/agents/#streaming-all-events
+
+    Closing the generator (client gone) stops the model run; a run stopped
+    through the cancel endpoint ends with a final chunk.
 
     Args:
         user_message: User's natural language request
+        conversation_id: Existing conversation to continue (new one if None)
 
     Yields:
-        JSON-encoded ChatChunk strings (NDJSON format)
+        ChatChunk lines as UTF-8 bytes (NDJSON format)
     """
-    conversation_id = str(uuid.uuid4())
+    conversation_id = conversation_id or str(uuid.uuid4())
     step_id = str(uuid.uuid4())
+    session_store = get_session_store()
+    history = session_store.history(conversation_id)
 
     # Yield meta chunk first
     meta_chunk = ChatChunk(
@@ -169,7 +506,7 @@ async def run_agent_streaming(user_message: str):
         conversation_id=conversation_id,
         step_id=step_id
     )
-    yield json.dumps(meta_chunk.model_dump(exclude_none=True)) + "\n"
+    yield encode_chunk(meta_chunk)
 
     logger.info(
         "pydantic_agent_streaming_start",
@@ -178,35 +515,121 @@ async def run_agent_streaming(user_message: str):
     )
 
     try:
-        # Use Pydantic AI's streaming API
+        # Trivial commands ("open Safari") skip the LLM entirely
+        fast_response = await try_fast_path(user_message, conversation_id=conversation_id)
+        if fast_response is not None:
+            session_store.append_turn(conversation_id, _exchange_messages(user_message, fast_response.reply))
+            yield encode_delta(fast_response.reply)
+            final_chunk = ChatChunk(type="final", message=fast_response.reply)
+            yield encode_chunk(final_chunk)
+            return
+
+        # Repeated requests replay their cached plan (only without history)
+        cached_response = None if history else await _replay_cached(user_message, conversation_id)
+        if cached_response is not None:
+            session_store.append_turn(conversation_id, _exchange_messages(user_message, cached_response.reply))
+            yield encode_delta(cached_response.reply)
+            final_chunk = ChatChunk(type="final", message=cached_response.reply)
+            yield encode_chunk(final_chunk)
+            return
+
+        # Stream every agent event: text deltas plus phase and tool lifecycle
+        # chunks, so tool-using turns are not silent until the answer starts
         accumulated_text = ""
-
-        # run_stream() returns StreamedRunResult context manager
-        async with agent.run_stream(user_message) as result:
-            # stream_text(delta=True) yields incremental text chunks
-            # delta=True means each chunk is only new text (not cumulative)
-            async for text_chunk in result.stream_text(delta=True):
-                accumulated_text += text_chunk
-
-                # Yield delta chunk (Pydantic AI already chunks appropriately)
-                delta_chunk = ChatChunk(
-                    type="delta",
-                    content=text_chunk  # Already a string chunk from Pydantic AI
-                )
-                yield json.dumps(delta_chunk.model_dump(exclude_none=True)) + "\n"
+        progress = StreamProgress()
+
+        # A fast path that fell back takes its LLM slot now
+
+        # A fast path that fell back takes its LLM slot now
+        await admit_llm()
+        _record_prompt_size(history, user_message)
+        think_policy = get_think_policy()
+        initial_decision = decision = think_policy.decide(user_message)
+        start = time.perf_counter()
+        # Registered so a client disconnect or the cancel endpoint can stop the run
+        cancellations = get_cancellation_registry()
+        step = cancellations.begin(step_id)
+        run_trace = RunTrace("agent.run", conversation_id=conversation_id, step_id=step_id, stream=True)
+        tool_calls = 0
+        try:
+            while True:
+                speculation = _speculative_run()
+                result = None
+                line = progress.enter("model")
+                if line:
+                    yield line
+                run_trace.llm_start(think_level=decision.level)
+                try:
+                    async with aclosing(_run_events(
+                        user_message, message_history=history or None, model_settings=_model_settings(decision),
+                        deps=speculation,
+                    )) as events:
+                        async for event in events:
+                            speculation.observe_event(event)
+                            run_trace.observe(event)
+                            encode_start = time.perf_counter()
+                            lines = _event_chunks(event, progress)
+                            run_trace.encoded(time.perf_counter() - encode_start)
+                            for line in lines:
+                                yield line
+                            if isinstance(event, PartStartEvent) and isinstance(event.part, TextPart) and event.part.content:
+                                accumulated_text += event.part.content
+                            elif isinstance(event, PartDeltaEvent) and isinstance(event.delta, TextPartDelta):
+                                accumulated_text += event.delta.content_delta
+                            elif isinstance(event, FunctionToolCallEvent):
+                                tool_calls += 1
+                            elif isinstance(event, AgentRunResultEvent):
+                                result = event.result
+                except UnexpectedModelBehavior as e:
+                    next_decision = _escalation(decision, type(e).__name__, tool_calls, accumulated_text)
+                    if next_decision is None:
+                        think_policy.record(initial_decision, (time.perf_counter() - start) * 1000, tool_calls, 0, False)
+                        raise
+                    decision = next_decision
+                    continue
+                finally:
+                    speculation.finish()
+
+                next_decision = None if accumulated_text else _escalation(decision, "empty response", tool_calls)
+                if next_decision is None:
+                    break
+                decision = next_decision
+            step.completed = True
+            run_trace.end(output_tokens=result.usage().output_tokens, completed=True, think_level=decision.level)
+        except asyncio.CancelledError:
+            if not cancellations.acknowledge(step):
+                raise
+            yield encode_chunk(ChatChunk(type="final", message=accumulated_text or CANCELLED_REPLY))
+            return
+        except GeneratorExit:
+            # The reader closed the stream (client gone)
+            step.interrupted = True
+            raise
+        except Exception as e:
+            run_trace.end(error=e)
+            raise
+        finally:
+            cancellations.end(step)
+            run_trace.end(completed=step.completed, think_level=decision.level)
+
+        final_text = result.output or accumulated_text
+        _record_think_outcome(initial_decision, decision, start, result.new_messages(), final_text)
+        if not history:
+            _remember_run(user_message, result.all_messages(), final_text)
+        session_store.append_turn(conversation_id, result.new_messages())
 
         # Yield final chunk with complete message
         final_chunk = ChatChunk(
             type="final",
-            message=accumulated_text
+            message=final_text
         )
-        yield json.dumps(final_chunk.model_dump(exclude_none=True)) + "\n"
+        yield encode_chunk(final_chunk)
 
         logger.info(
             "pydantic_agent_streaming_complete",
             conversation_id=conversation_id,
             step_id=step_id,
-            total_length=len(accumulated_text),
+            total_length=len(final_text),
         )
 
     except Exception as e:
@@ -222,4 +645,4 @@ async def run_agent_streaming(user_message: str):
             type="final",
             message=f"Error: {str(e)}"
         )
-        yield json.dumps(error_chunk.model_dump(exclude_none=True)) + "\n"
+        yield encode_chunk(error_chunk)
@@ -0,0 +1,137 @@
+"""
+Tool registry with precompiled schemas and argument validators.
+
+Each tool function is introspected exactly once: its JSON schema is built
+into an ollama.Tool (handed to the transport as-is, so the client does not
+re-introspect the callable on every LLM call) and a pydantic model is
+compiled to validate the arguments the LLM sends back.
+"""
+import inspect
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+import ollama
+from pydantic import BaseModel, ConfigDict, create_model
+
+_ARGS_SECTION = re.compile(r"^\s*(Args|Arguments|Parameters):\s*$", re.IGNORECASE)
+_SECTION = re.compile(r"^\s*(Returns|Raises|Yields|Examples?):\s*$", re.IGNORECASE)
+_ARG_LINE = re.compile(r"^\s*(\w+)(?:\s*\([^)]*\))?:\s*(.*)$")
+
+
+def parse_docstring(func: Callable) -> Tuple[str, Dict[str, str]]:
+    """
+    Split a Google-style docstring into a summary and per-argument descriptions.
+
+    Returns:
+        (summary, {argument name: description})
+    """
+    doc = inspect.getdoc(func) or ""
+    summary_lines: List[str] = []
+    arg_descriptions: Dict[str, str] = {}
+    section = "summary"
+    current_arg: Optional[str] = None
+
+    for line in doc.splitlines():
+        if _ARGS_SECTION.match(line):
+            section = "args"
+            continue
+        if _SECTION.match(line):
+            section = "other"
+            continue
+        if section == "summary":
+            if not line.strip() and summary_lines:
+                section = "other"
+            elif line.strip():
+                summary_lines.append(line.strip())
+        elif section == "args" and line.strip():
+            match = _ARG_LINE.match(line)
+            if match and match.group(1) in inspect.signature(func).parameters:
+                current_arg = match.group(1)
+                arg_descriptions[current_arg] = match.group(2).strip()
+            elif current_arg:
+                arg_descriptions[current_arg] += " " + line.strip()
+
+    return " ".join(summary_lines), arg_descriptions
+
+
+def _strip_titles(schema: Any) -> Any:
+    """Remove pydantic's auto-generated 'title' keys, which only add prompt tokens"""
+    if isinstance(schema, dict):
+        return {k: _strip_titles(v) for k, v in schema.items() if k != "title"}
+    if isinstance(schema, list):
+        return [_strip_titles(v) for v in schema]
+    return schema
+
+
+class RegisteredTool:
+    """A tool function with its compiled schema and argument validator"""
+
+    def __init__(self, function: Callable):
+        self.function = function
+        self.name = function.__name__
+        description, arg_descriptions = parse_docstring(function)
+
+        fields: Dict[str, Any] = {}
+        for param in inspect.signature(function).parameters.values():
+            annotation = param.annotation if param.annotation is not inspect.Parameter.empty else Any
+            default = param.default if param.default is not inspect.Parameter.empty else ...
+            fields[param.name] = (annotation, default)
+
+        self.validator: Type[BaseModel] = create_model(
+            f"{self.name}_arguments",
+            __config__=ConfigDict(extra="forbid"),
+            **fields,
+        )
+
+        parameters = _strip_titles(self.validator.model_json_schema())
+        parameters.pop("additionalProperties", None)
+        for name, prop in parameters.get("properties", {}).items():
+            if name in arg_descriptions:
+                prop["description"] = arg_descriptions[name]
+
+        self.schema = ollama.Tool.model_validate({
+            "type": "function",
+            "function": {
+                "name": self.name,
+                "description": description,
+                "parameters": parameters,
+            },
+        })
+
+    def validate(self, arguments: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Validate and coerce arguments returned by the LLM.
+
+        Raises:
+            pydantic.ValidationError: On missing, extra or mistyped arguments
+        """
+        return self.validator.model_validate(arguments or {}).model_dump()
+
+
+class ToolRegistry:
+    """Tools indexed by name, built once"""
+
+    def __init__(self, functions: List[Callable]):
+        """
+        Args:
+            functions: Tool functions with type hints and Google-style docstrings
+        """
+        self.tools: Dict[str, RegisteredTool] = {f.__name__: RegisteredTool(f) for f in functions}
+        self.schemas: List[ollama.Tool] = [tool.schema for tool in self.tools.values()]
+        self.functions: Dict[str, Callable] = {name: tool.function for name, tool in self.tools.items()}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.tools
+
+    def get(self, name: str) -> Optional[RegisteredTool]:
+        """Return the registered tool, or None for unknown names"""
+        return self.tools.get(name)
+
+    def validate(self, name: str, arguments: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Validate arguments for a named tool with its cached validator.
+
+        Raises:
+            KeyError: Unknown tool
+            pydantic.ValidationError: Invalid arguments
+        """
+        return self.tools[name].validate(arguments)
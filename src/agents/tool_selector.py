@@ -0,0 +1,231 @@
+"""
+Relevance-based tool subset selection.
+
+Ranks tools against the user message with BM25 over each tool's name,
+docstring, argument descriptions and examples, and sends only the top-k
+schemas to the model. When nothing in the message matches any tool the full
+set is sent, so selection can only shrink the prompt, never starve it.
+"""
+import json
+import math
+import re
+import sys
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from pydantic import BaseModel, Field
+import structlog
+
+from src.agents.app_agent import AppAgent
+from src.agents.tool_registry import ToolRegistry
+
+logger = structlog.get_logger()
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens; snake_case names are split into words"""
+    return _TOKEN.findall(text.lower().replace("_", " "))
+
+
+def estimate_tokens(schema: Any) -> int:
+    """Rough prompt-token estimate for a tool schema (~4 characters per token)"""
+    if hasattr(schema, "model_dump"):
+        schema = schema.model_dump(exclude_none=True)
+    return math.ceil(len(json.dumps(schema)) / 4)
+
+
+class ToolSelection(BaseModel):
+    """Tools chosen for one request"""
+    names: List[str] = Field(description="Selected tool names, most relevant first")
+    schemas: List[Any] = Field(description="Schemas to send to the model")
+    fallback: bool = Field(description="True when the full tool set was used")
+    prompt_tokens: int = Field(description="Estimated schema tokens sent")
+    full_prompt_tokens: int = Field(description="Estimated schema tokens of the full set")
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.full_prompt_tokens - self.prompt_tokens
+
+
+class ToolSelector:
+    """BM25 index over tool descriptions"""
+
+    def __init__(
+        self,
+        registry: ToolRegistry,
+        examples: Optional[Dict[str, List[str]]] = None,
+        k1: float = 1.5,
+        b: float = 0.75,
+    ):
+        """
+        Args:
+            registry: Tools to index
+            examples: Optional example requests per tool name
+            k1: BM25 term-frequency saturation
+            b: BM25 length normalization
+        """
+        self.registry = registry
+        self.k1 = k1
+        self.b = b
+        examples = examples or {}
+
+        self._term_freqs: Dict[str, Dict[str, int]] = {}
+        self._lengths: Dict[str, int] = {}
+        document_freq: Dict[str, int] = {}
+        for name, tool in registry.tools.items():
+            function = tool.schema.function
+            text = [name, function.description or ""]
+            for prop in (function.parameters.properties or {}).values():
+                text.append(prop.description or "")
+            text.extend(examples.get(name, []))
+            tokens = tokenize(" ".join(text))
+            freqs: Dict[str, int] = {}
+            for token in tokens:
+                freqs[token] = freqs.get(token, 0) + 1
+            self._term_freqs[name] = freqs
+            self._lengths[name] = len(tokens)
+            for token in freqs:
+                document_freq[token] = document_freq.get(token, 0) + 1
+
+        n_docs = len(self._term_freqs)
+        self._avg_length = (sum(self._lengths.values()) / n_docs) if n_docs else 0.0
+        self._idf = {
+            token: math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+            for token, df in document_freq.items()
+        }
+        self._full_tokens = sum(estimate_tokens(schema) for schema in registry.schemas)
+
+        self._lock = threading.Lock()
+        self.selections = 0
+        self.fallbacks = 0
+        self.tokens_saved_total = 0
+
+    def scores(self, user_message: str) -> Dict[str, float]:
+        """BM25 score of every tool for the message"""
+        query = set(tokenize(user_message))
+        scores: Dict[str, float] = {}
+        for name, freqs in self._term_freqs.items():
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * self._lengths[name] / (self._avg_length or 1))
+            for token in query:
+                tf = freqs.get(token)
+                if tf:
+                    score += self._idf[token] * tf * (self.k1 + 1) / (tf + norm)
+            scores[name] = score
+        return scores
+
+    def select(self, user_message: str, top_k: int, record: bool = True) -> ToolSelection:
+        """
+        Choose the top-k tools for a message.
+
+        Args:
+            user_message: User's natural language request
+            top_k: Maximum number of tools to send
+            record: Count the selection in the stats (False for repeats within a run)
+
+        Returns:
+            ToolSelection (the full set when the catalog is small or nothing matches)
+        """
+        all_names = list(self.registry.tools)
+        ranked = sorted(
+            ((score, name) for name, score in self.scores(user_message).items() if score > 0),
+            reverse=True,
+        )
+        fallback = len(all_names) <= top_k or not ranked
+        names = all_names if fallback else [name for _, name in ranked[:top_k]]
+        schemas = [self.registry.tools[name].schema for name in names]
+        prompt_tokens = self._full_tokens if fallback else sum(estimate_tokens(s) for s in schemas)
+
+        selection = ToolSelection(
+            names=names,
+            schemas=schemas,
+            fallback=fallback,
+            prompt_tokens=prompt_tokens,
+            full_prompt_tokens=self._full_tokens,
+        )
+        if not record:
+            return selection
+        with self._lock:
+            self.selections += 1
+            self.fallbacks += int(fallback)
+            self.tokens_saved_total += selection.tokens_saved
+        if not fallback:
+            logger.info(
+                "tools_selected",
+                selected=names,
+                prompt_tokens=prompt_tokens,
+                tokens_saved=selection.tokens_saved,
+            )
+        return selection
+
+    def evaluate(self, corpus: Iterable[Tuple[str, List[str]]], top_k: int) -> Dict[str, Any]:
+        """
+        Measure selection quality against labelled requests.
+
+        Args:
+            corpus: (message, expected tool names) pairs
+            top_k: Number of tools to select per request
+
+        Returns:
+            Recall (fraction of expected tools selected), fallback rate and token savings
+        """
+        expected_total = found_total = requests = fallbacks = saved = 0
+        for message, expected in corpus:
+            selection = self.select(message, top_k)
+            requests += 1
+            fallbacks += int(selection.fallback)
+            saved += selection.tokens_saved
+            expected_total += len(expected)
+            found_total += len(set(expected) & set(selection.names))
+        return {
+            'requests': requests,
+            'top_k': top_k,
+            'recall': found_total / expected_total if expected_total else 1.0,
+            'fallback_rate': fallbacks / requests if requests else 0.0,
+            'avg_prompt_tokens_saved': saved / requests if requests else 0.0,
+            'full_prompt_tokens': self._full_tokens,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Return selection counters"""
+        with self._lock:
+            return {
+                'selections': self.selections,
+                'fallbacks': self.fallbacks,
+                'tokens_saved_total': self.tokens_saved_total,
+            }
+
+
+_default_selector: Optional[ToolSelector] = None
+
+
+def get_tool_selector() -> ToolSelector:
+    """Return the process-wide ToolSelector over AppAgent's registry"""
+    global _default_selector
+    if _default_selector is None:
+        _default_selector = ToolSelector(AppAgent.get_tool_registry())
+    return _default_selector
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Report recall and token savings for a labelled corpus.
+
+    Usage: python -m src.agents.tool_selector corpus.jsonl [top_k]
+    Each line: {"message": "...", "tools": ["open_app", ...]}
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print(main.__doc__)
+        return 2
+    top_k = int(argv[1]) if len(argv) > 1 else 8
+    with open(argv[0], encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    corpus = [(row["message"], row["tools"]) for row in rows]
+    print(json.dumps(get_tool_selector().evaluate(corpus, top_k), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
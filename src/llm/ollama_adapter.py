@@ -1,26 +1,83 @@
+import httpx
 import ollama
-from typing import List, Dict, Any, Optional, Callable
+from typing import List, Dict, Any, Optional
 from src.llm.client import LLMClient
 import structlog
 
 logger = structlog.get_logger()
 
 
+class _PooledAsyncClient(ollama.AsyncClient):
+    """
+    ollama.AsyncClient that keeps a reference to the httpx client it builds,
+    so the adapter can close the pool (ollama has no public close()).
+    """
+
+    def __init__(self, host: Optional[str] = None, **kwargs):
+        def build_http_client(**client_kwargs: Any) -> httpx.AsyncClient:
+            self.http_client = httpx.AsyncClient(**client_kwargs)
+            return self.http_client
+
+        # Same as ollama.AsyncClient.__init__, with a factory instead of the class
+        super(ollama.AsyncClient, self).__init__(build_http_client, host, **kwargs)
+
+
 class OllamaAdapter(LLMClient):
     """Ollama implementation of LLM client with tool calling support"""
 
-    def __init__(self, model: str = "qwen2.5:7b-instruct", base_url: str = "http://localhost:11434"):
+    def __init__(
+        self,
+        model: str = "qwen2.5:7b-instruct",
+        base_url: str = "http://localhost:11434",
+        timeout_seconds: Optional[float] = None,
+        max_connections: int = 10,
+        max_keepalive_connections: int = 5,
+        keepalive_expiry_seconds: float = 30.0,
+    ):
         """
         Initialize Ollama adapter.
 
         Args:
             model: Model name (default: qwen2.5:7b-instruct)
             base_url: Ollama server URL
+            timeout_seconds: Read timeout for async requests (None = no timeout)
+            max_connections: Size of the async HTTP connection pool
+            max_keepalive_connections: Idle connections kept open for reuse
+            keepalive_expiry_seconds: How long an idle connection stays in the pool
         """
         self.model = model
         self.base_url = base_url
+        self.timeout_seconds = timeout_seconds
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry_seconds = keepalive_expiry_seconds
+        # Created lazily on first achat() so it binds to the running event loop
+        self._async_client: Optional[ollama.AsyncClient] = None
+        self._http_client: Optional[httpx.AsyncClient] = None
         logger.info("OllamaAdapter initialized", model=model, base_url=base_url)
 
+    @classmethod
+    def from_config(cls, config, model: str, base_url: str = "http://localhost:11434") -> "OllamaAdapter":
+        """
+        Build an adapter whose async pool and timeouts follow an OrchestratorConfig.
+
+        Args:
+            config: OrchestratorConfig instance
+            model: Model name
+            base_url: Ollama server URL
+
+        Returns:
+            Configured OllamaAdapter
+        """
+        return cls(
+            model=model,
+            base_url=base_url,
+            timeout_seconds=config.llm_timeout_seconds,
+            max_connections=config.llm_max_connections,
+            max_keepalive_connections=config.llm_max_keepalive_connections,
+            keepalive_expiry_seconds=config.llm_keepalive_expiry_seconds,
+        )
+
     def generate(self, prompt: str, **kwargs) -> Dict[str, Any]:
         """Legacy generate method"""
         model = kwargs.get('model', self.model)
@@ -28,27 +85,16 @@ class OllamaAdapter(LLMClient):
         logger.info("Ollama generate", model=model, prompt_length=len(prompt))
         return response
 
-    def chat(
+    def _build_chat_params(
         self,
         messages: List[Dict[str, str]],
-        tools: Optional[List[Callable]] = None,
-        think: bool = True,
-        stream: bool = False,
+        tools: Optional[List[Any]],
+        think: bool,
+        stream: bool,
+        think_budget: Optional[int] = None,
         **kwargs
     ) -> Dict[str, Any]:
-        """
-        Chat with Ollama with optional tool calling support.
-
-        Args:
-            messages: List of message dicts with 'role' and 'content'
-            tools: Optional list of Python functions to use as tools
-            think: Enable extended thinking/reasoning (default: True)
-            stream: Enable streaming response (default: False)
-            **kwargs: Additional parameters for ollama.chat()
-
-        Returns:
-            Response dict with message and optional tool_calls
-        """
+        """Assemble keyword arguments shared by chat() and achat()"""
         model = kwargs.get('model', self.model)
 
         chat_params = {
@@ -61,30 +107,141 @@ class OllamaAdapter(LLMClient):
             chat_params['tools'] = tools
             logger.info("chat_with_tools", model=model, num_tools=len(tools), think=think)
 
-        # Add think parameter if tools are present
-        if tools and think:
-            chat_params['think'] = True
+        # Thinking is decided explicitly when tools are present (thinking
+        # models otherwise reason by default)
+        if tools:
+            chat_params['think'] = think
+
+        # Cap generated tokens (reasoning + answer) when a budget is given
+        if think_budget is not None:
+            chat_params['options'] = {'num_predict': think_budget}
 
         # Add stream parameter
         if stream:
             chat_params['stream'] = stream
 
+        return chat_params
+
+    def _log_response(self, model: str, response: Any) -> None:
+        """Log response details"""
+        if hasattr(response, 'message'):
+            has_tool_calls = hasattr(response.message, 'tool_calls') and response.message.tool_calls
+            logger.info(
+                "ollama_chat_response",
+                model=model,
+                has_tool_calls=has_tool_calls,
+                has_content=bool(getattr(response.message, 'content', None)),
+                has_thinking=hasattr(response.message, 'thinking') and bool(response.message.thinking)
+            )
+
+    def chat(
+        self,
+        messages: List[Dict[str, str]],
+        tools: Optional[List[Any]] = None,
+        think: bool = True,
+        stream: bool = False,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """
+        Chat with Ollama with optional tool calling support.
+
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            tools: Optional list of tools (Python functions or prebuilt ollama.Tool schemas)
+            think: Enable extended thinking/reasoning (default: True)
+            stream: Enable streaming response (default: False)
+            **kwargs: Additional parameters (model, think_budget: cap on generated tokens)
+
+        Returns:
+            Response dict with message and optional tool_calls
+        """
+        chat_params = self._build_chat_params(messages, tools, think, stream, **kwargs)
+        model = chat_params['model']
+
         try:
             response = ollama.chat(**chat_params)
+            self._log_response(model, response)
+            return response
+
+        except Exception as e:
+            logger.error("ollama_chat_error", model=model, error=str(e), error_type=type(e).__name__)
+            raise
+
+    def _get_async_client(self) -> ollama.AsyncClient:
+        """Return the shared keep-alive async client, creating it on first use"""
+        if self._async_client is None:
+            timeout = httpx.Timeout(self.timeout_seconds, connect=5.0)
+            limits = httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry_seconds,
+            )
+            client = _PooledAsyncClient(host=self.base_url, timeout=timeout, limits=limits)
+            self._async_client, self._http_client = client, client.http_client
+            logger.info(
+                "ollama_async_pool_created",
+                base_url=self.base_url,
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                timeout_seconds=self.timeout_seconds,
+            )
+        return self._async_client
+
+    async def achat(
+        self,
+        messages: List[Dict[str, str]],
+        tools: Optional[List[Any]] = None,
+        think: bool = True,
+        stream: bool = False,
+        **kwargs
+    ) -> Any:
+        """
+        Async variant of chat() that does not block the event loop.
 
-            # Log response details
-            if hasattr(response, 'message'):
-                has_tool_calls = hasattr(response.message, 'tool_calls') and response.message.tool_calls
-                logger.info(
-                    "ollama_chat_response",
-                    model=model,
-                    has_tool_calls=has_tool_calls,
-                    has_content=bool(getattr(response.message, 'content', None)),
-                    has_thinking=hasattr(response.message, 'thinking') and bool(response.message.thinking)
-                )
+        All calls share one pooled, keep-alive HTTP client, so concurrent
+        requests and successive iterations of the agentic loop reuse
+        connections instead of opening a new one per round trip.
+
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            tools: Optional list of tools (Python functions or prebuilt ollama.Tool schemas)
+            think: Enable extended thinking/reasoning (default: True)
+            stream: Enable streaming response (default: False)
+            **kwargs: Additional parameters (model, think_budget)
 
+        Returns:
+            ChatResponse, or an async iterator of partial responses when stream=True
+        """
+        chat_params = self._build_chat_params(messages, tools, think, stream, **kwargs)
+        model = chat_params['model']
+
+        try:
+            response = await self._get_async_client().chat(**chat_params)
+            if not stream:
+                self._log_response(model, response)
             return response
 
         except Exception as e:
             logger.error("ollama_chat_error", model=model, error=str(e), error_type=type(e).__name__)
             raise
+
+    async def aload(self, keep_alive: Any = "5m", model: Optional[str] = None) -> None:
+        """
+        Load a model into memory (or extend its residency) without generating.
+
+        Args:
+            keep_alive: How long Ollama keeps the model resident (e.g. "10m", seconds, -1 = forever)
+            model: Model name (default: adapter model)
+        """
+        await self._get_async_client().generate(model=model or self.model, prompt="", keep_alive=keep_alive)
+
+    async def aunload(self, model: Optional[str] = None) -> None:
+        """Ask Ollama to release a model's memory immediately"""
+        await self._get_async_client().generate(model=model or self.model, prompt="", keep_alive=0)
+
+    async def aclose(self) -> None:
+        """Close the pooled async client (call on application shutdown)"""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._async_client = self._http_client = None
+            logger.info("ollama_async_pool_closed", base_url=self.base_url)
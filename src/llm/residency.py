@@ -0,0 +1,161 @@
+"""
+Model residency manager.
+
+Preloads the configured Ollama models at startup, keeps them resident with an
+explicit keep_alive while requests flow, unloads them after an idle period to
+release RAM, and reloads them as soon as activity resumes.
+"""
+import asyncio
+import time
+from typing import Any, Dict, List, Optional
+import structlog
+
+from src.llm.ollama_adapter import OllamaAdapter
+from src.models.config import ResidencyConfig
+
+logger = structlog.get_logger()
+
+# Number of latency samples kept per category
+_MAX_SAMPLES = 200
+
+
+class _LatencySamples:
+    """Bounded list of latency samples in milliseconds"""
+
+    def __init__(self):
+        self.samples: List[float] = []
+
+    def add(self, value_ms: float) -> None:
+        self.samples.append(value_ms)
+        if len(self.samples) > _MAX_SAMPLES:
+            del self.samples[0]
+
+    def summary(self) -> Dict[str, Any]:
+        if not self.samples:
+            return {'count': 0}
+        ordered = sorted(self.samples)
+        return {
+            'count': len(ordered),
+            'last_ms': round(self.samples[-1], 1),
+            'p50_ms': round(ordered[len(ordered) // 2], 1),
+            'max_ms': round(ordered[-1], 1),
+        }
+
+
+class ModelResidencyManager:
+    """Tracks activity and drives Ollama load/keep-alive/unload calls"""
+
+    def __init__(self, llm_client: OllamaAdapter, config: Optional[ResidencyConfig] = None):
+        """
+        Args:
+            llm_client: Adapter whose pooled client issues the load/unload calls
+            config: Residency policy
+        """
+        self.llm_client = llm_client
+        self.config = config or ResidencyConfig()
+        self.resident: Dict[str, bool] = {model: False for model in self.config.models}
+        self.last_activity = time.monotonic()
+        self._last_refresh: Dict[str, float] = {model: 0.0 for model in self.config.models}
+        self._load_tasks: Dict[str, asyncio.Task] = {}
+        self._watch_task: Optional[asyncio.Task] = None
+        self.cold_loads = _LatencySamples()
+        self.warm_refreshes = _LatencySamples()
+        self.cold_requests = _LatencySamples()
+        self.warm_requests = _LatencySamples()
+        self.unloads = 0
+
+    async def _load(self, model: str) -> None:
+        was_resident = self.resident[model]
+        start = time.perf_counter()
+        try:
+            await self.llm_client.aload(keep_alive=self.config.keep_alive, model=model)
+        except Exception as e:
+            logger.warning("model_load_failed", model=model, error=str(e), error_type=type(e).__name__)
+            return
+        duration_ms = (time.perf_counter() - start) * 1000
+        self.resident[model] = True
+        self._last_refresh[model] = time.monotonic()
+        if was_resident:
+            self.warm_refreshes.add(duration_ms)
+        else:
+            self.cold_loads.add(duration_ms)
+            logger.info("model_loaded", model=model, duration_ms=round(duration_ms, 1))
+
+    def _schedule_load(self, model: str) -> None:
+        """Start a load unless one is already in flight for this model"""
+        task = self._load_tasks.get(model)
+        if task is None or task.done():
+            self._load_tasks[model] = asyncio.create_task(self._load(model))
+
+    async def _unload(self, model: str) -> None:
+        try:
+            await self.llm_client.aunload(model=model)
+        except Exception as e:
+            logger.warning("model_unload_failed", model=model, error=str(e), error_type=type(e).__name__)
+            return
+        self.resident[model] = False
+        self.unloads += 1
+        logger.info("model_unloaded", model=model, idle_seconds=round(time.monotonic() - self.last_activity))
+
+    async def start(self) -> None:
+        """Kick off preloading and the background idle watcher (non-blocking)"""
+        if self.config.preload_on_startup:
+            for model in self.config.models:
+                self._schedule_load(model)
+        self._watch_task = asyncio.create_task(self._watch())
+
+    async def stop(self) -> None:
+        """Stop background work; models stay loaded per their last keep_alive"""
+        tasks = [t for t in [self._watch_task, *self._load_tasks.values()] if t is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._watch_task = None
+
+    async def _watch(self) -> None:
+        while True:
+            await asyncio.sleep(self.config.check_interval_seconds)
+            await self.check()
+
+    async def check(self) -> None:
+        """One residency pass: unload idle models, refresh keep-alive for active ones"""
+        now = time.monotonic()
+        idle = now - self.last_activity >= self.config.idle_unload_seconds
+        for model in self.config.models:
+            if idle:
+                if self.resident[model]:
+                    await self._unload(model)
+            elif now - self._last_refresh[model] >= self.config.refresh_interval_seconds:
+                self._schedule_load(model)
+
+    def touch(self) -> bool:
+        """
+        Record request activity and reload any unloaded model right away.
+
+        Returns:
+            True if every managed model was resident (a warm request)
+        """
+        self.last_activity = time.monotonic()
+        warm = all(self.resident.values())
+        for model, resident in self.resident.items():
+            if not resident:
+                self._schedule_load(model)
+        return warm
+
+    def record_request(self, warm: bool, duration_ms: float) -> None:
+        """Attribute an end-to-end request latency to the warm or cold bucket"""
+        (self.warm_requests if warm else self.cold_requests).add(duration_ms)
+
+    def stats(self) -> Dict[str, Any]:
+        """Residency state plus cold-start vs warm latency"""
+        return {
+            'models': dict(self.resident),
+            'keep_alive': self.config.keep_alive,
+            'idle_seconds': round(time.monotonic() - self.last_activity, 1),
+            'idle_unload_seconds': self.config.idle_unload_seconds,
+            'unloads': self.unloads,
+            'cold_load': self.cold_loads.summary(),
+            'warm_refresh': self.warm_refreshes.summary(),
+            'cold_requests': self.cold_requests.summary(),
+            'warm_requests': self.warm_requests.summary(),
+        }
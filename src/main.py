@@ -1,21 +1,90 @@
-from fastapi import FastAPI, HTTPException
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from typing import Optional
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from opentelemetry import trace
+from starlette.requests import ClientDisconnect
+from typing import Any, Awaitable
 import structlog
 
 from src.models.schemas import ChatRequest, ChatResponse
 from src.agents.pydantic_agent import (
+    MODEL_NAME,
+    OLLAMA_HOST,
     run_agent_non_streaming,
     run_agent_streaming,
 )
-from src.utils.logger import setup_logging
+from src.agents.app_index import get_app_index
+from src.llm.ollama_adapter import OllamaAdapter
+from src.llm.residency import ModelResidencyManager
+from src.models.config import OrchestratorConfig, ResidencyConfig, StreamingConfig, TracingConfig
+from src.orchestrator.admission import (
+    AdmissionRejected,
+    AdmissionTicket,
+    get_admission_controller,
+    set_admission_ticket,
+)
+from src.orchestrator.cancellation import get_cancellation_registry
+from src.orchestrator.coalescing import get_single_flight
+from src.orchestrator.intent_matcher import get_intent_matcher
+from src.orchestrator.plan_cache import get_plan_cache, normalize_message
+from src.orchestrator.session_store import get_session_store
+from src.orchestrator.speculative import get_speculation_stats
+from src.orchestrator.think_policy import get_think_policy
+from src.utils import metrics
+from src.utils.logger import logging_stats, setup_logging
+from src.utils.ndjson import coalesce_frames
+from src.utils.tracing import get_tracer, setup_tracing, shutdown_tracing
 
 # Setup logging
 setup_logging(log_level="INFO")
 logger = structlog.get_logger()
 
-app = FastAPI(title="Baby AI Backend", version="1.1.0")
+STREAMING_CONFIG = StreamingConfig()
+# LLM transport settings (timeout, connection pool) of the Ollama client
+ORCHESTRATOR_CONFIG = OrchestratorConfig()
+# e.g. BABY_AI_TRACE_SAMPLE_RATIO=1 BABY_AI_TRACE_EXPORTER=console to see every request's stages
+TRACING_CONFIG = TracingConfig(
+    sample_ratio=float(os.environ.get("BABY_AI_TRACE_SAMPLE_RATIO", "0")),
+    exporter=os.environ.get("BABY_AI_TRACE_EXPORTER", "file"),
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Warm up in-memory indexes and preload the model before serving requests"""
+    app_index = await asyncio.to_thread(get_app_index)
+    logger.info("app_index_ready", apps=len(app_index))
+    setup_tracing(TRACING_CONFIG)
+
+    residency_client = OllamaAdapter.from_config(ORCHESTRATOR_CONFIG, model=MODEL_NAME, base_url=OLLAMA_HOST)
+    app.state.residency = ModelResidencyManager(residency_client, ResidencyConfig(models=[MODEL_NAME]))
+    metrics.register_gauge(
+        "baby_ai_models_resident", "Managed models currently loaded in Ollama",
+        lambda: sum(app.state.residency.resident.values()),
+    )
+    await app.state.residency.start()
+    try:
+        yield
+    finally:
+        await app.state.residency.stop()
+        await residency_client.aclose()
+        shutdown_tracing()
+
+
+app = FastAPI(title="Baby AI Backend", version="1.1.0", lifespan=lifespan)
+
+metrics.register_gauge(
+    "baby_ai_admission_queue_depth", "Requests waiting for an LLM slot",
+    lambda: get_admission_controller().queue_depth,
+)
+metrics.register_gauge(
+    "baby_ai_admission_active", "Requests holding an LLM slot",
+    lambda: get_admission_controller().active,
+)
 
 # CORS middleware
 app.add_middleware(
@@ -31,14 +100,154 @@ async def health():
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "llm_initialized": True,  # Pydantic AI handles initialization
+        "llm_initialized": any(app.state.residency.resident.values()),
         "version": "1.1.0",
-        "agent": "pydantic-ai"  # New field to indicate Pydantic AI is active
+        "agent": "pydantic-ai",  # New field to indicate Pydantic AI is active
+        "fast_path": get_intent_matcher().stats(),
+        "plan_cache": get_plan_cache().stats(),
+        "admission": get_admission_controller().stats(),
+        "coalescing": get_single_flight().stats(),
+        "sessions": get_session_store().stats(),
+        "think_policy": get_think_policy().stats(),
+        "speculation": get_speculation_stats().stats(),
+        "cancellation": get_cancellation_registry().stats(),
+        "logging": logging_stats(),
     }
 
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Chat, model and tool latency in the Prometheus text format"""
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
+@app.get("/api/model/residency")
+async def model_residency():
+    """Model residency state with cold-start vs warm latency"""
+    return app.state.residency.stats()
+
+
+async def _record_stream_latency(stream, warm: bool, start: float, ticket: AdmissionTicket):
+    """Pass a stream through, record its duration and release its admission slot"""
+    try:
+        async for chunk in stream:
+            yield chunk
+    finally:
+        app.state.residency.record_request(warm, (time.perf_counter() - start) * 1000)
+        ticket.release()
+
+
+async def _track_response_stream(frames, span, start: float):
+    """Pass the response stream through; record its latency and end the request span when it closes"""
+    metrics.ACTIVE_STREAMS.inc()
+    try:
+        async for frame in frames:
+            yield frame
+    finally:
+        metrics.ACTIVE_STREAMS.dec()
+        metrics.CHAT_LATENCY.observe(time.perf_counter() - start, stream="true")
+        span.end()
+
+
+async def _wait_for_disconnect(http_request: Request) -> None:
+    """Return once the client has closed the connection (the body is already read)"""
+    while (await http_request.receive())["type"] != "http.disconnect":
+        pass
+    logger.info("chat_client_disconnected", path=http_request.url.path)
+
+
+async def _unless_disconnected(http_request: Request, work: Awaitable[Any]) -> Any:
+    """
+    Await work, cancelling it if the client disconnects first.
+
+    Raises:
+        ClientDisconnect: The client went away before the work finished
+    """
+    work_task = asyncio.ensure_future(work)
+    disconnect_task = asyncio.ensure_future(_wait_for_disconnect(http_request))
+    try:
+        await asyncio.wait({work_task, disconnect_task}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        disconnect_task.cancel()
+        if not work_task.done():
+            work_task.cancel()
+    if not work_task.done():
+        raise ClientDisconnect()
+    return work_task.result()
+
+
+def _needs_llm(message: str) -> bool:
+    """Whether the request is expected to reach the LLM (no confident fast-path match)"""
+    matcher = get_intent_matcher()
+    match = matcher.match(message)
+    return match is None or match.confidence < matcher.min_confidence
+
+
+def _busy(rejection: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail=str(rejection),
+        headers={"Retry-After": str(max(1, round(rejection.retry_after_seconds)))},
+    )
+
+
+async def _admit(request: ChatRequest) -> AdmissionTicket:
+    """
+    Attach an admission ticket to the current task, taking the LLM slot now
+    (or shedding load with 503) unless the fast path should answer. A fast
+    path that falls back takes the slot in admit_llm() before the model call.
+
+    Returns:
+        The ticket, to release once the request is done
+    """
+    priority = request.priority or ("interactive" if request.stream else "background")
+    ticket = AdmissionTicket(get_admission_controller(), priority)
+    set_admission_ticket(ticket)
+    if _needs_llm(request.message):
+        try:
+            await ticket.take()
+        except AdmissionRejected as rejection:
+            raise _busy(rejection)
+    return ticket
+
+
+async def _run_non_streaming(request: ChatRequest) -> ChatResponse:
+    """Admit and run one non-streaming chat request"""
+    # Mark activity (reloads the model if it was unloaded while idle)
+    start = time.perf_counter()
+    warm = app.state.residency.touch()
+    ticket = await _admit(request)
+    try:
+        response = await run_agent_non_streaming(request.message, request.conversation_id)
+    except AdmissionRejected as rejection:
+        # Shed when the fast path fell back to the LLM
+        raise _busy(rejection)
+    finally:
+        ticket.release()
+    app.state.residency.record_request(warm, (time.perf_counter() - start) * 1000)
+    return response
+
+
+@app.post("/api/chat/{step_id}/cancel")
+async def cancel_chat(step_id: str):
+    """Stop a running chat step (step_id from the meta chunk)"""
+    step = get_cancellation_registry().cancel(step_id)
+    if step is None:
+        raise HTTPException(status_code=404, detail=f"No running step {step_id}")
+    logger.info("chat_cancel_requested", step_id=step_id, elapsed_ms=round(step.elapsed_ms, 1))
+    return {"step_id": step_id, "cancelled": True, "elapsed_ms": round(step.elapsed_ms, 1)}
+
+
 @app.post("/api/chat")
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, http_request: Request):
     """Main chat endpoint with Pydantic AI integration"""
+    # Root span of the request (no-op unless tracing is sampled); a streamed
+    # response ends it once the stream closes
+    request_span = get_tracer().start_span(
+        "chat", attributes={"stream": request.stream, "message_length": len(request.message)}
+    )
+    span_handed_off = False
+    request_start = time.perf_counter()
     try:
         logger.info(
             "chat_request_received",
@@ -46,21 +255,55 @@ async def chat(request: ChatRequest):
             stream=request.stream
         )
 
+        # Identical concurrent requests (double-clicks, retries) share one execution
+        flight_key = (request.conversation_id, normalize_message(request.message), request.stream)
+
         # Streaming mode
         if request.stream:
+            async def prepare():
+                start = time.perf_counter()
+                warm = app.state.residency.touch()
+                # Runs in the producer task, so the ticket stays set for the stream
+                ticket = await _admit(request)
+                return warm, start, ticket
+
+            def make_stream(prepared):
+                warm, start, ticket = prepared
+                return _record_stream_latency(run_agent_streaming(request.message, request.conversation_id), warm, start, ticket)
+
+            # The producer task inherits the request span as its parent
+            with trace.use_span(request_span):
+                flight = get_single_flight().stream(flight_key, prepare, make_stream)
+                await flight.wait_ready()
+            span_handed_off = True
             return StreamingResponse(
-                run_agent_streaming(request.message),
+                # Deltas are batched per time window; meta/final go out immediately.
+                # A disconnect ends the stream even while nothing is being sent,
+                # which cancels the agent run once no other subscriber is left.
+                _track_response_stream(coalesce_frames(
+                    flight.subscribe(),
+                    STREAMING_CONFIG.coalesce_interval_ms,
+                    STREAMING_CONFIG.coalesce_max_bytes,
+                    stop_when=lambda: _wait_for_disconnect(http_request),
+                ), request_span, request_start),
                 media_type="application/x-ndjson"
             )
 
-        # Non-streaming mode
-        response = await run_agent_non_streaming(request.message)
+        # Non-streaming mode (cancelled when the client disconnects)
+        with trace.use_span(request_span):
+            response = await _unless_disconnected(
+                http_request, get_single_flight().run(flight_key, lambda: _run_non_streaming(request))
+            )
 
+        metrics.CHAT_LATENCY.observe(time.perf_counter() - request_start, stream="false")
         logger.info("chat_response_sent", reply_length=len(response.reply), ai_reply=response.reply)
         return response
 
     except HTTPException:
         raise
+    except ClientDisconnect:
+        # Nobody is left to read the response
+        return Response(status_code=499)
     except Exception as e:
         logger.error(
             "chat_endpoint_error",
@@ -71,6 +314,9 @@ async def chat(request: ChatRequest):
             status_code=500,
             detail=f"Internal server error: {str(e)}"
         )
+    finally:
+        if not span_handed_off:
+            request_span.end()
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,3 +1,4 @@
+from typing import List, Literal, Optional
 from pydantic import BaseModel, Field
 
 class OrchestratorConfig(BaseModel):
@@ -5,3 +6,69 @@ class OrchestratorConfig(BaseModel):
     max_validation_retries: int = Field(default=3, description="Max retries for validation errors")
     llm_timeout_seconds: int = Field(default=30, description="LLM request timeout")
     enable_streaming: bool = Field(default=True, description="Enable streaming responses")
+    llm_max_connections: int = Field(default=10, description="Max pooled HTTP connections to Ollama")
+    llm_max_keepalive_connections: int = Field(default=5, description="Idle keep-alive connections kept in the pool")
+    llm_keepalive_expiry_seconds: float = Field(default=30.0, description="Idle time before a pooled connection is closed")
+    tool_max_workers: int = Field(default=4, description="Worker threads for concurrent tool calls in one turn")
+    enable_fast_path: bool = Field(default=True, description="Execute trivial open/close commands without the LLM")
+    enable_plan_cache: bool = Field(default=True, description="Replay cached tool-call plans for repeated requests")
+    plan_cache_max_entries: int = Field(default=256, description="Maximum cached plans (LRU eviction)")
+    plan_cache_ttl_seconds: float = Field(default=3600.0, description="Lifetime of a cached plan")
+    tool_selection_top_k: int = Field(default=8, description="Max tool schemas sent to the LLM per request")
+    enable_context_compaction: bool = Field(default=True, description="Compact tool results and superseded turns before each LLM call")
+    max_tool_result_tokens: int = Field(default=256, description="Tool results longer than this are truncated in the prompt")
+    keep_recent_tool_turns: int = Field(default=1, description="Most recent tool turns sent in full; older ones are summarized")
+    enable_adaptive_think: bool = Field(default=True, description="Choose the reasoning level per request (escalating on failure)")
+    think_budget_tokens: int = Field(default=1024, description="Generation cap for the brief reasoning level")
+    enable_speculative_tools: bool = Field(default=True, description="Start idempotent tool calls while the response is still streaming")
+
+
+class ResidencyConfig(BaseModel):
+    """Configuration for keeping LLM models loaded in Ollama"""
+    models: List[str] = Field(default_factory=lambda: ["qwen3:4b-thinking-2507-q4_K_M"], description="Models to manage")
+    preload_on_startup: bool = Field(default=True, description="Load models when the backend starts")
+    keep_alive: str = Field(default="10m", description="Ollama keep_alive sent with each residency refresh")
+    refresh_interval_seconds: float = Field(default=240.0, description="How often residency is refreshed while active")
+    idle_unload_seconds: float = Field(default=1800.0, description="Unload models after this long without requests")
+    check_interval_seconds: float = Field(default=30.0, description="Background check period")
+
+
+class AdmissionConfig(BaseModel):
+    """Configuration for LLM admission control"""
+    max_concurrency: int = Field(default=1, description="Concurrent LLM requests (match OLLAMA_NUM_PARALLEL)")
+    max_queue_depth: int = Field(default=16, description="Waiting requests beyond which new ones are rejected")
+    queue_latency_budget_seconds: float = Field(default=30.0, description="Reject when the estimated queue wait exceeds this")
+    initial_service_estimate_seconds: float = Field(default=5.0, description="Service-time estimate before any request completes")
+
+
+class SessionConfig(BaseModel):
+    """Configuration for multi-turn conversation history"""
+    max_tokens_per_session: int = Field(default=2048, description="History token budget per conversation (oldest turns evicted)")
+    max_total_tokens: int = Field(default=200_000, description="History token cap across all conversations (LRU eviction)")
+    max_sessions: int = Field(default=256, description="Maximum retained conversations")
+    idle_ttl_seconds: float = Field(default=3600.0, description="Conversations idle this long are forgotten")
+
+
+class StreamingConfig(BaseModel):
+    """NDJSON stream framing"""
+    coalesce_interval_ms: float = Field(default=25.0, description="Deltas are batched into one write per interval")
+    coalesce_max_bytes: int = Field(default=4096, description="Write a delta batch early once it reaches this size")
+
+
+class LoggingConfig(BaseModel):
+    """Log pipeline configuration"""
+    queued: bool = Field(default=True, description="Hand records to a background writer thread instead of writing on the caller")
+    queue_size: int = Field(default=10_000, description="Records buffered for the writer thread")
+    overflow: Literal["drop", "block"] = Field(default="drop", description="When the queue is full: drop the record, or wait up to block_timeout_ms")
+    block_timeout_ms: float = Field(default=50.0, description="Longest a caller waits for queue space (errors always get this grace)")
+    max_bytes: int = Field(default=10 * 1024 * 1024, description="Rotate the log file at this size")
+    max_age_seconds: Optional[float] = Field(default=24 * 3600.0, description="Rotate the log file after this long (None = size only)")
+    backup_count: int = Field(default=5, description="Rotated files kept")
+    compress: bool = Field(default=True, description="Gzip rotated files")
+
+
+class TracingConfig(BaseModel):
+    """Per-request stage spans (OpenTelemetry)"""
+    sample_ratio: float = Field(default=0.0, description="Fraction of requests traced (0 = tracing off)")
+    exporter: Literal["file", "console"] = Field(default="file", description="Where finished spans go")
+    file_path: str = Field(default="logs/traces.jsonl", description="JSON-lines span file for the file exporter")
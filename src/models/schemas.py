@@ -30,6 +30,10 @@ class ChatRequest(BaseModel):
     """User request to the API"""
     message: str = Field(description="User message")
     stream: bool = Field(default=False, description="Enable streaming response")
+    conversation_id: Optional[str] = Field(default=None, description="Conversation/session this message belongs to")
+    priority: Optional[Literal["interactive", "background"]] = Field(
+        default=None, description="Admission lane (default: interactive when streaming, else background)"
+    )
 
 class ChatResponse(BaseModel):
     """Response from the API"""
@@ -40,9 +44,16 @@ class ChatResponse(BaseModel):
 
 class ChatChunk(BaseModel):
     """Streaming response chunk"""
-    type: Literal["meta", "delta", "final"] = Field(description="Chunk type")
+    type: Literal["meta", "delta", "final", "phase", "tool_start", "tool_end"] = Field(description="Chunk type")
     conversation_id: Optional[str] = Field(default=None, description="Conversation ID (meta chunk)")
     step_id: Optional[str] = Field(default=None, description="Step ID (meta chunk)")
     content: Optional[str] = Field(default=None, description="Partial content (delta chunk)")
     message: Optional[str] = Field(default=None, description="Complete message (final chunk)")
     usage: Optional[Dict[str, int]] = Field(default=None, description="Token usage (final chunk only)")
+    phase: Optional[Literal["model", "thinking", "tool_call", "tools", "answering"]] = Field(default=None, description="Model/agent phase just entered (phase chunk)")
+    tool_name: Optional[str] = Field(default=None, description="Tool name (tool_start/tool_end chunks)")
+    tool_call_id: Optional[str] = Field(default=None, description="Matches a tool_end to its tool_start")
+    arguments: Optional[Dict[str, Any]] = Field(default=None, description="Tool arguments (tool_start chunk)")
+    duration_ms: Optional[float] = Field(default=None, description="Tool execution time (tool_end chunk)")
+    success: Optional[bool] = Field(default=None, description="Whether the tool succeeded (tool_end chunk)")
+    elapsed_ms: Optional[float] = Field(default=None, description="Time since the request started (phase/tool chunks)")
@@ -0,0 +1,227 @@
+"""
+Admission control in front of the LLM.
+
+A local Ollama instance only serves a few generations in parallel, so chat
+requests that need the model take a slot from a bounded pool. Waiters are
+served by priority lane (interactive before background), and requests whose
+estimated queue wait exceeds the latency budget are rejected immediately
+instead of piling up and timing out together.
+
+Requests the intent fast path is expected to answer do not take a slot up
+front. They carry an AdmissionTicket instead, and the runners call
+admit_llm() right before the first model request, so a fast path that
+falls back to the LLM (e.g. every tool call failed) still waits for a
+slot and can still be shed.
+"""
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import structlog
+
+from src.models.config import AdmissionConfig
+
+logger = structlog.get_logger()
+
+PRIORITIES: Dict[str, int] = {'interactive': 0, 'background': 1}
+
+# Number of wait-time samples kept for percentiles
+_MAX_SAMPLES = 500
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is shed because the queue is over budget"""
+
+    def __init__(self, reason: str, retry_after_seconds: float):
+        super().__init__(f"Server busy ({reason}), please retry shortly")
+        self.reason = reason
+        self.retry_after_seconds = retry_after_seconds
+
+
+class AdmissionController:
+    """Bounded concurrency with priority lanes and load shedding"""
+
+    def __init__(self, config: Optional[AdmissionConfig] = None):
+        """
+        Args:
+            config: Concurrency limit, queue bounds and latency budget
+        """
+        self.config = config or AdmissionConfig()
+        self.active = 0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._service_ms = self.config.initial_service_estimate_seconds * 1000
+        self._wait_samples: List[float] = []
+        self.admitted = 0
+        self.rejected = 0
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    def estimated_wait_seconds(self, priority: str = 'interactive') -> float:
+        """Expected queue wait for a new request in the given lane"""
+        rank = PRIORITIES[priority]
+        ahead = sum(1 for p, _, future in self._waiters if p <= rank and not future.done())
+        if ahead == 0 and self.active < self.config.max_concurrency:
+            return 0.0
+        return (ahead + 1) / self.config.max_concurrency * self._service_ms / 1000
+
+    def _check_budget(self, priority: str) -> None:
+        if self.queue_depth >= self.config.max_queue_depth:
+            raise AdmissionRejected("queue_full", self.estimated_wait_seconds(priority))
+        wait = self.estimated_wait_seconds(priority)
+        if wait > self.config.queue_latency_budget_seconds:
+            raise AdmissionRejected("over_latency_budget", wait)
+
+    async def acquire(self, priority: str = 'interactive') -> float:
+        """
+        Wait for a slot.
+
+        Args:
+            priority: 'interactive' or 'background'
+
+        Returns:
+            Time spent waiting, in milliseconds
+
+        Raises:
+            AdmissionRejected: When the request is shed
+        """
+        try:
+            self._check_budget(priority)
+        except AdmissionRejected as rejection:
+            self.rejected += 1
+            logger.warning(
+                "admission_rejected",
+                reason=rejection.reason,
+                priority=priority,
+                queue_depth=self.queue_depth,
+                estimated_wait_s=round(rejection.retry_after_seconds, 2),
+            )
+            raise
+
+        start = time.perf_counter()
+        if self.active < self.config.max_concurrency and self.queue_depth == 0:
+            self.active += 1
+        else:
+            future = asyncio.get_running_loop().create_future()
+            heapq.heappush(self._waiters, (PRIORITIES[priority], next(self._sequence), future))
+            try:
+                # The releasing request hands its slot over (active stays counted)
+                await future
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    # Slot was handed over just as we were cancelled; pass it on
+                    self._release_slot()
+                raise
+
+        wait_ms = (time.perf_counter() - start) * 1000
+        self.admitted += 1
+        self._wait_samples.append(wait_ms)
+        if len(self._wait_samples) > _MAX_SAMPLES:
+            del self._wait_samples[0]
+        return wait_ms
+
+    def _release_slot(self) -> None:
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.active -= 1
+
+    def release(self, service_ms: float) -> None:
+        """
+        Return a slot and update the service-time estimate.
+
+        Args:
+            service_ms: How long the slot was held
+        """
+        alpha = 0.2
+        self._service_ms = (1 - alpha) * self._service_ms + alpha * service_ms
+        self._release_slot()
+
+    @asynccontextmanager
+    async def slot(self, priority: str = 'interactive') -> AsyncIterator[float]:
+        """Hold a slot for the duration of the block; yields the wait time in ms"""
+        wait_ms = await self.acquire(priority)
+        start = time.perf_counter()
+        try:
+            yield wait_ms
+        finally:
+            self.release((time.perf_counter() - start) * 1000)
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, wait-time percentiles and admission counters"""
+        ordered = sorted(self._wait_samples)
+
+        def percentile(q: float) -> Optional[float]:
+            if not ordered:
+                return None
+            return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 1)
+
+        return {
+            'max_concurrency': self.config.max_concurrency,
+            'active': self.active,
+            'queue_depth': self.queue_depth,
+            'admitted': self.admitted,
+            'rejected': self.rejected,
+            'wait_p50_ms': percentile(0.5),
+            'wait_p95_ms': percentile(0.95),
+            'estimated_service_ms': round(self._service_ms, 1),
+        }
+
+
+class AdmissionTicket:
+    """One request's claim on an LLM slot, taken up front or on first use"""
+
+    def __init__(self, controller: AdmissionController, priority: str = 'interactive'):
+        self.controller = controller
+        self.priority = priority
+        self.slot_start: Optional[float] = None
+
+    @property
+    def held(self) -> bool:
+        return self.slot_start is not None
+
+    async def take(self) -> None:
+        """Acquire the slot unless already held (raises AdmissionRejected when shed)"""
+        if self.slot_start is None:
+            await self.controller.acquire(self.priority)
+            self.slot_start = time.perf_counter()
+
+    def release(self) -> None:
+        """Return the slot if it was taken"""
+        if self.slot_start is not None:
+            self.controller.release((time.perf_counter() - self.slot_start) * 1000)
+            self.slot_start = None
+
+
+# Ticket of the request being served (set by the chat endpoint, per task)
+_current_ticket: ContextVar[Optional[AdmissionTicket]] = ContextVar("admission_ticket", default=None)
+
+
+def set_admission_ticket(ticket: Optional[AdmissionTicket]) -> None:
+    """Attach a ticket to the current task (and the tasks it creates)"""
+    _current_ticket.set(ticket)
+
+
+async def admit_llm() -> None:
+    """Take the current request's slot before calling the model (no-op without a ticket)"""
+    ticket = _current_ticket.get()
+    if ticket is not None:
+        await ticket.take()
+
+
+_default_controller: Optional[AdmissionController] = None
+
+
+def get_admission_controller(config: Optional[AdmissionConfig] = None) -> AdmissionController:
+    """Return the process-wide AdmissionController, creating it on first use"""
+    global _default_controller
+    if _default_controller is None:
+        _default_controller = AdmissionController(config)
+    return _default_controller
@@ -0,0 +1,159 @@
+"""
+Cancellation of in-flight agent runs.
+
+Each LLM run registers the task driving it under its step_id (sent to the
+client in the meta chunk). When the client disconnects, or asks for it via
+POST /api/chat/{step_id}/cancel, the task is cancelled: the pending model
+request is aborted by closing its HTTP stream, tool calls that have not
+started yet are dropped and unconfirmed speculative tools are discarded.
+
+The generation time a cancellation gave back to the model slot is estimated
+from how long completed runs take (moving average) minus how long the
+cancelled run had already been going. Runs that ended with an error are
+counted as failed, not cancelled.
+"""
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Optional
+import structlog
+
+logger = structlog.get_logger()
+
+CLIENT_DISCONNECT = 'client_disconnect'
+USER_CANCEL = 'user_cancel'
+
+# Reply of a run stopped through the cancel endpoint
+CANCELLED_REPLY = "Cancelled."
+
+
+class ActiveStep:
+    """One registered agent run"""
+
+    def __init__(self, step_id: str, task: Optional[asyncio.Task]):
+        self.step_id = step_id
+        self.task = task
+        self.started_at = time.perf_counter()
+        self.reason: Optional[str] = None
+        self.completed = False
+        # Set when the run was stopped (CancelledError, or its stream closed)
+        self.interrupted = False
+
+    @property
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started_at) * 1000
+
+
+class CancellationRegistry:
+    """Running steps by step_id, plus cancellation and reclaimed-time counters"""
+
+    def __init__(self, smoothing: float = 0.2):
+        """
+        Args:
+            smoothing: Weight of the newest run in the expected-duration average
+        """
+        self.smoothing = smoothing
+        self._steps: Dict[str, ActiveStep] = {}
+        self._lock = threading.Lock()
+        self._expected_ms: Optional[float] = None
+        self.completed = 0
+        self.failed = 0
+        self.cancelled: Dict[str, int] = {CLIENT_DISCONNECT: 0, USER_CANCEL: 0}
+        self.reclaimed_ms = 0.0
+
+    def begin(self, step_id: str) -> ActiveStep:
+        """Register the current task as the run of step_id"""
+        step = ActiveStep(step_id, asyncio.current_task())
+        with self._lock:
+            self._steps[step_id] = step
+        return step
+
+    def cancel(self, step_id: str, reason: str = USER_CANCEL) -> Optional[ActiveStep]:
+        """
+        Cancel a running step.
+
+        Args:
+            step_id: Step to cancel
+            reason: Why (USER_CANCEL or CLIENT_DISCONNECT)
+
+        Returns:
+            The cancelled step, or None when no such step is running
+        """
+        with self._lock:
+            step = self._steps.get(step_id)
+        if step is None or step.task is None or step.task.done():
+            return None
+        if step.reason is None:
+            step.reason = reason
+            step.task.cancel()
+        return step
+
+    def acknowledge(self, step: ActiveStep) -> bool:
+        """
+        Called by a runner that caught CancelledError.
+
+        Returns:
+            True for an explicit cancel the runner should answer (the task's
+            cancellation is consumed), False when it must re-raise
+        """
+        step.interrupted = True
+        if step.reason != USER_CANCEL:
+            return False
+        task = asyncio.current_task()
+        if task is not None:
+            task.uncancel()
+        return True
+
+    def end(self, step: ActiveStep) -> None:
+        """
+        Unregister a step. Interrupted runs count as cancelled (by the client
+        disconnecting unless a reason was given), others that did not
+        complete as failed.
+        """
+        elapsed_ms = step.elapsed_ms
+        with self._lock:
+            self._steps.pop(step.step_id, None)
+            if step.completed:
+                self.completed += 1
+                self._expected_ms = (
+                    elapsed_ms if self._expected_ms is None
+                    else self._expected_ms + self.smoothing * (elapsed_ms - self._expected_ms)
+                )
+                return
+            if step.reason is None and not step.interrupted:
+                self.failed += 1
+                return
+            reason = step.reason or CLIENT_DISCONNECT
+            reclaimed_ms = max(0.0, self._expected_ms - elapsed_ms) if self._expected_ms is not None else 0.0
+            self.cancelled[reason] = self.cancelled.get(reason, 0) + 1
+            self.reclaimed_ms += reclaimed_ms
+        logger.info(
+            "agent_run_cancelled",
+            step_id=step.step_id,
+            reason=reason,
+            elapsed_ms=round(elapsed_ms, 1),
+            reclaimed_ms=round(reclaimed_ms, 1),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Running steps, cancellations by reason and generation time reclaimed"""
+        with self._lock:
+            return {
+                'active': len(self._steps),
+                'completed': self.completed,
+                'failed': self.failed,
+                'cancelled': dict(self.cancelled),
+                'expected_run_ms': round(self._expected_ms, 1) if self._expected_ms is not None else None,
+                'reclaimed_ms': round(self.reclaimed_ms, 1),
+            }
+
+
+_default_registry: Optional[CancellationRegistry] = None
+
+
+def get_cancellation_registry() -> CancellationRegistry:
+    """Return the process-wide CancellationRegistry, creating it on first use"""
+    global _default_registry
+    if _default_registry is None:
+        _default_registry = CancellationRegistry()
+    return _default_registry
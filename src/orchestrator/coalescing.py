@@ -0,0 +1,232 @@
+"""
+Single-flight coalescing of identical in-flight chat requests.
+
+Double-clicks and UI retries send the same message twice within moments.
+Requests with the same key (session + normalized message + mode) attach to
+the execution already running for that key instead of starting their own,
+so the agent loop and its tools run once and every caller gets the same
+result or stream. Finished results linger briefly to absorb late duplicates.
+Work nobody waits for any more (every caller disconnected) is cancelled.
+"""
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional
+import structlog
+
+logger = structlog.get_logger()
+
+# A stream nobody has subscribed to this long after it was admitted is abandoned
+_SUBSCRIBE_GRACE_SECONDS = 5.0
+
+
+class _Flight:
+    """One shared non-streaming execution"""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.followers = 0
+        self.waiters = 0
+        self.finished_at: Optional[float] = None
+
+
+class StreamFlight:
+    """
+    One shared streaming execution.
+
+    The producer runs as its own task and appends chunks to a replay buffer;
+    every subscriber reads the buffer from the start and then follows live
+    chunks. The producer is cancelled when the last subscriber goes away, or
+    when nobody subscribes within a grace period after admission (the client
+    left before reading).
+    """
+
+    def __init__(self):
+        self.chunks: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.subscribers = 0
+        self.subscribed = False
+        self.followers = 0
+        self.finished_at: Optional[float] = None
+        self._ready: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        self._changed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def _run(self, prepare: Callable[[], Awaitable[Any]], make_stream: Callable[[Any], AsyncIterator[Any]]) -> None:
+        try:
+            prepared = await prepare()
+        except BaseException as e:
+            self.error = e
+            self.done = True
+            self.finished_at = time.monotonic()
+            if isinstance(e, asyncio.CancelledError):
+                self._ready.cancel()
+                self._notify()
+                raise
+            self._ready.set_exception(e)
+            self._notify()
+            return
+        self._ready.set_result(None)
+        # Callers subscribe once wait_ready() returns, so time out only from here:
+        # waiting in the admission queue must not count against the grace period
+        asyncio.get_running_loop().call_later(_SUBSCRIBE_GRACE_SECONDS, self._cancel_if_unsubscribed)
+        try:
+            async for chunk in make_stream(prepared):
+                self.chunks.append(chunk)
+                self._notify()
+        except BaseException as e:
+            self.error = e
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        finally:
+            self.done = True
+            self.finished_at = time.monotonic()
+            self._notify()
+
+    def start(self, prepare: Callable[[], Awaitable[Any]], make_stream: Callable[[Any], AsyncIterator[Any]]) -> None:
+        self._task = asyncio.create_task(self._run(prepare, make_stream))
+
+    def _cancel_if_unsubscribed(self) -> None:
+        if not self.subscribed and not self.done and self._task is not None:
+            logger.info("chat_stream_abandoned", grace_seconds=_SUBSCRIBE_GRACE_SECONDS)
+            self._task.cancel()
+
+    async def wait_ready(self) -> None:
+        """Wait until the flight was admitted; re-raises the preparation error"""
+        await asyncio.shield(self._ready)
+
+    async def subscribe(self) -> AsyncIterator[Any]:
+        """Yield every chunk of the flight, from the beginning"""
+        self.subscribers += 1
+        self.subscribed = True
+        position = 0
+        try:
+            while True:
+                while position < len(self.chunks):
+                    yield self.chunks[position]
+                    position += 1
+                if self.done:
+                    if self.error is not None and not isinstance(self.error, asyncio.CancelledError):
+                        raise self.error
+                    return
+                await self._changed.wait()
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done and self._task is not None:
+                # Nobody is listening any more
+                self._task.cancel()
+
+
+class SingleFlight:
+    """Registry of in-flight executions keyed by request identity"""
+
+    def __init__(self, linger_seconds: float = 1.0):
+        """
+        Args:
+            linger_seconds: How long a finished result still absorbs duplicates
+        """
+        self.linger_seconds = linger_seconds
+        self._flights: Dict[Hashable, _Flight] = {}
+        self._streams: Dict[Hashable, StreamFlight] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    def _expired(self, finished_at: Optional[float]) -> bool:
+        return finished_at is not None and time.monotonic() - finished_at > self.linger_seconds
+
+    def _prune(self) -> None:
+        for registry in (self._flights, self._streams):
+            for key in [k for k, flight in registry.items() if self._expired(flight.finished_at)]:
+                del registry[key]
+
+    async def run(self, key: Hashable, execute: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run execute() once per key; concurrent callers share its result.
+
+        Args:
+            key: Request identity
+            execute: Coroutine factory doing the real work
+
+        Returns:
+            The shared result (exceptions are shared too)
+        """
+        self._prune()
+        flight = self._flights.get(key)
+        if flight is not None and flight.task.done() and (flight.task.cancelled() or flight.task.exception()):
+            # Failures are not shared with later callers
+            flight = None
+        if flight is not None:
+            flight.followers += 1
+            self.coalesced += 1
+            logger.info("chat_request_coalesced", followers=flight.followers, stream=False)
+        else:
+            flight = _Flight(asyncio.create_task(execute()))
+            flight.task.add_done_callback(lambda _: setattr(flight, 'finished_at', time.monotonic()))
+            self._flights[key] = flight
+            self.leaders += 1
+        # Shield so one caller's cancellation does not cancel everyone's work,
+        # but stop the work once the last caller has gone
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def stream(
+        self,
+        key: Hashable,
+        prepare: Callable[[], Awaitable[Any]],
+        make_stream: Callable[[Any], AsyncIterator[Any]],
+    ) -> StreamFlight:
+        """
+        Return the streaming flight for a key, starting it if needed.
+
+        Args:
+            key: Request identity
+            prepare: Coroutine run before streaming (e.g. admission); its errors reach all callers
+            make_stream: Builds the chunk iterator from prepare()'s result
+
+        Returns:
+            StreamFlight to wait_ready() on and subscribe() to
+        """
+        self._prune()
+        flight = self._streams.get(key)
+        if flight is not None and not (flight.done and flight.error is not None):
+            flight.followers += 1
+            self.coalesced += 1
+            logger.info("chat_request_coalesced", followers=flight.followers, stream=True)
+            return flight
+        flight = StreamFlight()
+        flight.start(prepare, make_stream)
+        self._streams[key] = flight
+        self.leaders += 1
+        return flight
+
+    def stats(self) -> Dict[str, Any]:
+        """Leader/follower counters and in-flight executions"""
+        self._prune()
+        return {
+            'leaders': self.leaders,
+            'coalesced': self.coalesced,
+            'in_flight': sum(1 for f in self._flights.values() if not f.task.done())
+            + sum(1 for f in self._streams.values() if not f.done),
+        }
+
+
+_default_single_flight: Optional[SingleFlight] = None
+
+
+def get_single_flight() -> SingleFlight:
+    """Return the process-wide SingleFlight registry"""
+    global _default_single_flight
+    if _default_single_flight is None:
+        _default_single_flight = SingleFlight()
+    return _default_single_flight
@@ -0,0 +1,204 @@
+"""
+Context compaction for the agentic loop.
+
+Every iteration appends the assistant turn and its tool results to the
+message list, so without compaction each LLM call re-prefills everything
+that came before. Before each call the compactor builds a smaller view of
+the history: oversized tool outputs are truncated, and older tool turns
+that later turns have superseded keep only their tool calls plus a
+one-line result summary. The full message list is never modified.
+
+Works on Ollama message dicts (orchestrator loop) and on pydantic-ai
+ModelMessages (agent history processor).
+"""
+import dataclasses
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import BaseModel, Field
+from pydantic_ai.messages import ModelMessage, ModelRequest
+import structlog
+
+from src.orchestrator.session_store import estimate_message_tokens
+
+logger = structlog.get_logger()
+
+
+class CompactionReport(BaseModel):
+    """Prompt size of one LLM call before and after compaction"""
+    tokens_before: int = Field(description="Estimated prompt tokens of the full history")
+    tokens_after: int = Field(description="Estimated prompt tokens actually sent")
+    truncated_results: int = Field(default=0, description="Tool results cut to the size limit")
+    summarized_turns: int = Field(default=0, description="Superseded tool turns reduced to summaries")
+
+    @property
+    def tokens_saved(self) -> int:
+        return self.tokens_before - self.tokens_after
+
+
+def _field(message: Any, name: str) -> Any:
+    """Read a field from an Ollama message dict or Message object"""
+    if isinstance(message, dict):
+        return message.get(name)
+    return getattr(message, name, None)
+
+
+def truncate_text(text: str, max_tokens: int) -> str:
+    """Keep the head and tail of a long text (~4 characters per token)"""
+    max_chars = max_tokens * 4
+    if len(text) <= max_chars:
+        return text
+    head = max_chars * 3 // 4
+    tail = max_chars - head
+    omitted = len(text) - head - tail
+    return f"{text[:head]}\n... [{omitted} characters omitted] ...\n{text[-tail:]}"
+
+
+def summarize_result(text: str, max_chars: int = 160) -> str:
+    """One-line summary of a tool result: its first non-empty line, capped"""
+    first_line = next((line.strip() for line in text.splitlines() if line.strip()), "")
+    if len(first_line) > max_chars:
+        first_line = first_line[:max_chars] + "..."
+    extra_lines = max(0, len([line for line in text.splitlines() if line.strip()]) - 1)
+    return first_line + (f" [+{extra_lines} more lines]" if extra_lines else "")
+
+
+class ContextCompactor:
+    """Builds a bounded view of the loop's message history before each LLM call"""
+
+    def __init__(self, max_tool_result_tokens: int = 256, keep_recent_tool_turns: int = 1):
+        """
+        Args:
+            max_tool_result_tokens: Tool results longer than this are truncated
+            keep_recent_tool_turns: Most recent tool turns sent in full; older ones are summarized
+        """
+        self.max_tool_result_tokens = max_tool_result_tokens
+        self.keep_recent_tool_turns = keep_recent_tool_turns
+
+    def compact(self, messages: List[Any]) -> Tuple[List[Any], CompactionReport]:
+        """
+        Return the compacted messages to send and a size report.
+
+        A tool turn is an assistant message with tool_calls followed by its
+        tool results. Messages before the first tool turn (system prompt,
+        history, user request) are sent unchanged.
+
+        Args:
+            messages: Full message history of the loop
+
+        Returns:
+            Tuple of (compacted messages, CompactionReport)
+        """
+        tool_turn_starts = [
+            i for i, message in enumerate(messages)
+            if _field(message, 'role') == 'assistant' and _field(message, 'tool_calls')
+        ]
+        superseded = set(tool_turn_starts[:max(0, len(tool_turn_starts) - self.keep_recent_tool_turns)])
+
+        compacted: List[Any] = []
+        truncated = 0
+        in_superseded_turn = False
+        for i, message in enumerate(messages):
+            role = _field(message, 'role')
+            if role == 'assistant' and _field(message, 'tool_calls'):
+                in_superseded_turn = i in superseded
+                # Earlier reasoning and narration are not needed to act on the results
+                compacted.append({
+                    'role': 'assistant',
+                    'content': '' if in_superseded_turn else (_field(message, 'content') or ''),
+                    'tool_calls': _field(message, 'tool_calls'),
+                })
+            elif role == 'tool':
+                content = str(_field(message, 'content') or '')
+                if in_superseded_turn:
+                    new_content = summarize_result(content)
+                else:
+                    new_content = truncate_text(content, self.max_tool_result_tokens)
+                    truncated += new_content != content
+                compacted.append({**self._as_dict(message), 'content': new_content})
+            else:
+                in_superseded_turn = False
+                compacted.append(message)
+
+        report = CompactionReport(
+            tokens_before=sum(estimate_message_tokens(m) for m in messages),
+            tokens_after=sum(estimate_message_tokens(m) for m in compacted),
+            truncated_results=truncated,
+            summarized_turns=len(superseded),
+        )
+        return compacted, report
+
+    def compact_model_messages(self, messages: List[ModelMessage]) -> Tuple[List[ModelMessage], CompactionReport]:
+        """
+        pydantic-ai counterpart of compact(): a tool turn is a ModelRequest
+        carrying tool returns. Tool calls and message structure are kept.
+
+        Args:
+            messages: Message history of the agent run
+
+        Returns:
+            Tuple of (compacted messages, CompactionReport)
+        """
+        tool_turns = [
+            i for i, message in enumerate(messages)
+            if isinstance(message, ModelRequest) and any(p.part_kind == 'tool-return' for p in message.parts)
+        ]
+        superseded = set(tool_turns[:max(0, len(tool_turns) - self.keep_recent_tool_turns)])
+
+        compacted: List[ModelMessage] = []
+        truncated = 0
+        for i, message in enumerate(messages):
+            if i in tool_turns:
+                parts = []
+                for part in message.parts:
+                    if part.part_kind == 'tool-return':
+                        content = str(part.content)
+                        if i in superseded:
+                            new_content = summarize_result(content)
+                        else:
+                            new_content = truncate_text(content, self.max_tool_result_tokens)
+                            truncated += new_content != content
+                        if new_content != content:
+                            part = dataclasses.replace(part, content=new_content)
+                    parts.append(part)
+                message = dataclasses.replace(message, parts=parts)
+            compacted.append(message)
+
+        report = CompactionReport(
+            tokens_before=sum(estimate_message_tokens(m) for m in messages),
+            tokens_after=sum(estimate_message_tokens(m) for m in compacted),
+            truncated_results=truncated,
+            summarized_turns=len(superseded),
+        )
+        return compacted, report
+
+    @staticmethod
+    def _as_dict(message: Any) -> Dict[str, Any]:
+        if isinstance(message, dict):
+            return dict(message)
+        fields = {name: _field(message, name) for name in ('role', 'content', 'tool_name')}
+        return {name: value for name, value in fields.items() if value is not None}
+
+
+def compact_for_call(
+    messages: List[Any],
+    compactor: Optional[ContextCompactor],
+    iteration: int,
+    **log_fields: Any,
+) -> List[Any]:
+    """Compact messages for one LLM call and log prompt tokens before/after"""
+    if compactor is None:
+        return messages
+    compacted, report = compactor.compact(messages)
+    log_compaction(report, iteration=iteration, **log_fields)
+    return compacted
+
+
+def log_compaction(report: CompactionReport, **log_fields: Any) -> None:
+    """Log the prompt tokens of one LLM call before and after compaction"""
+    logger.info(
+        "context_compacted",
+        prompt_tokens_before=report.tokens_before,
+        prompt_tokens_after=report.tokens_after,
+        truncated_results=report.truncated_results,
+        summarized_turns=report.summarized_turns,
+        **log_fields,
+    )
@@ -0,0 +1,307 @@
+"""
+Deterministic intent fast path for trivial commands.
+
+Requests like "open Spotify" or "chiudi Safari" are matched against compiled
+verb patterns built from the tool vocabulary and executed directly, with a
+templated reply. Anything that does not match with high confidence falls
+through to the LLM, as do targets that are not installed apps ("open the
+door", "start over") and commands whose tool calls all failed (e.g. a wrong
+app name the LLM can correct). When only some of several apps fail, the
+reply says which ones: the others already ran and must not run again.
+"""
+import re
+import threading
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+from pydantic import BaseModel, Field
+import structlog
+
+from src.agents.app_agent import AppAgent
+from src.agents.app_index import AppIndex, get_app_index
+from src.models.schemas import ChatResponse, FunctionCall, ToolCall
+from src.orchestrator.plan_cache import is_successful_result
+from src.orchestrator.tool_executor import get_tool_executor
+
+logger = structlog.get_logger()
+
+# Verbs per tool and language. Only tools present in the agent vocabulary get patterns.
+TOOL_VERBS: Dict[str, Dict[str, List[str]]] = {
+    'open_app': {
+        'en': ['open', 'launch', 'start', 'run'],
+        'it': ['apri', 'avvia', 'lancia', 'esegui'],
+        'es': ['abre', 'abrir', 'inicia', 'ejecuta'],
+        'fr': ['ouvre', 'ouvrir', 'lance', 'démarre'],
+        'de': ['öffne', 'starte'],
+    },
+    'close_app': {
+        'en': ['close', 'quit', 'exit', 'kill'],
+        'it': ['chiudi', 'esci da', 'termina'],
+        'es': ['cierra', 'cerrar', 'sal de'],
+        'fr': ['ferme', 'fermer', 'quitte'],
+        'de': ['schließe', 'schliesse', 'beende'],
+    },
+}
+
+# Templated replies, mirroring the examples in SYSTEM_PROMPT
+REPLY_TEMPLATES: Dict[str, Dict[str, str]] = {
+    'open_app': {
+        'en': "I've opened {apps} for you!",
+        'it': "Ho aperto {apps}!",
+        'es': "¡He abierto {apps}!",
+        'fr': "J'ai ouvert {apps} !",
+        'de': "Ich habe {apps} geöffnet!",
+    },
+    'close_app': {
+        'en': "I've closed {apps} for you!",
+        'it': "Ho chiuso {apps}!",
+        'es': "¡He cerrado {apps}!",
+        'fr': "J'ai fermé {apps} !",
+        'de': "Ich habe {apps} geschlossen!",
+    },
+}
+
+# Appended to the reply when some of the requested apps failed
+FAILURE_TEMPLATES: Dict[str, Dict[str, str]] = {
+    'open_app': {
+        'en': "I couldn't open {apps}.",
+        'it': "Non sono riuscito ad aprire {apps}.",
+        'es': "No he podido abrir {apps}.",
+        'fr': "Je n'ai pas pu ouvrir {apps}.",
+        'de': "Ich konnte {apps} nicht öffnen.",
+    },
+    'close_app': {
+        'en': "I couldn't close {apps}.",
+        'it': "Non sono riuscito a chiudere {apps}.",
+        'es': "No he podido cerrar {apps}.",
+        'fr': "Je n'ai pas pu fermer {apps}.",
+        'de': "Ich konnte {apps} nicht schließen.",
+    },
+}
+
+LIST_JOINERS: Dict[str, str] = {'en': 'and', 'it': 'e', 'es': 'y', 'fr': 'et', 'de': 'und'}
+
+_POLITE = r"(?:please|per favore|por favor|s'il te plaît|s'il vous plaît|bitte)"
+_ARTICLE = r"(?:the|il|lo|la|l'|el|le|les|das|die|der)"
+_APP_SUFFIX = r"(?:app|application|applicazione|aplicación|application|anwendung)"
+_LIST_SPLIT = re.compile(r"\s*(?:,|\band\b|\be\b|\by\b|\bet\b|\bund\b|&)\s*", re.IGNORECASE)
+
+# Words that mean the request depends on context or needs reasoning
+_AMBIGUOUS_TARGETS = {
+    'it', 'them', 'that', 'this', 'all', 'everything', 'something', 'anything',
+    'lo', 'la', 'li', 'tutto', 'tutte', 'tutti', 'todo', 'tout', 'alles', 'es',
+}
+
+
+class IntentMatch(BaseModel):
+    """A deterministic interpretation of a user message"""
+    function_name: str = Field(description="Tool to call")
+    language: str = Field(description="Language of the matched verb")
+    app_names: List[str] = Field(description="Target application names, in order")
+    confidence: float = Field(description="Match confidence between 0 and 1")
+
+
+class IntentMatcher:
+    """Compiled verb patterns over the tool vocabulary with hit/miss counters"""
+
+    def __init__(
+        self,
+        available_functions: Dict[str, Callable],
+        min_confidence: float = 0.9,
+        app_index: Optional[AppIndex] = None,
+    ):
+        """
+        Args:
+            available_functions: Tool vocabulary (name -> callable)
+            min_confidence: Matches below this confidence fall through to the LLM
+            app_index: Index targets must resolve through (default: process-wide index)
+        """
+        self.available_functions = available_functions
+        self.min_confidence = min_confidence
+        self.app_index = app_index
+        self._verb_index: Dict[str, tuple] = {}
+        for function_name, by_language in TOOL_VERBS.items():
+            if function_name not in available_functions:
+                continue
+            for language, verbs in by_language.items():
+                for verb in verbs:
+                    self._verb_index[verb.lower()] = (function_name, language)
+
+        # Longest verbs first so multi-word verbs ("esci da") win over prefixes
+        verbs_alternation = "|".join(
+            re.escape(v) for v in sorted(self._verb_index, key=len, reverse=True)
+        )
+        self._pattern = re.compile(
+            rf"^\s*(?:{_POLITE}[\s,]+)?(?P<verb>{verbs_alternation})\s+"
+            rf"(?:{_ARTICLE}\s*)?(?P<target>.+?)(?:\s+{_APP_SUFFIX})?"
+            rf"(?:[\s,]+{_POLITE})?\s*[.!]*\s*$",
+            re.IGNORECASE,
+        )
+        self._other_verbs = re.compile(
+            rf"\b(?:{verbs_alternation}|then|poi|después|puis|dann)\b", re.IGNORECASE
+        )
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.partials = 0
+        self.misses = 0
+        self.fallbacks = 0
+
+    def _is_app(self, name: str) -> bool:
+        """Whether a target names an installed application"""
+        index = self.app_index or get_app_index()
+        # An empty index (apps cannot be enumerated here) rules nothing out
+        return not len(index) or index.lookup(name) is not None
+
+    def match(self, user_message: str) -> Optional[IntentMatch]:
+        """
+        Match a message against the compiled patterns.
+
+        Args:
+            user_message: Raw user message
+
+        Returns:
+            IntentMatch (possibly with low confidence) or None when nothing matches
+        """
+        if not self._verb_index:
+            return None
+        m = self._pattern.match(user_message)
+        if not m:
+            return None
+
+        function_name, language = self._verb_index[m.group('verb').lower()]
+        target = m.group('target').strip()
+        app_names = [name.strip(" '\"") for name in _LIST_SPLIT.split(target) if name.strip(" '\"")]
+        if not app_names:
+            return None
+
+        confidence = 1.0 if len(app_names) == 1 else 0.95
+        if "?" in target or self._other_verbs.search(target):
+            # "open Spotify and then close it" needs the LLM
+            confidence = 0.0
+        for name in app_names:
+            words = name.split()
+            if len(words) > 4 or name.lower() in _AMBIGUOUS_TARGETS:
+                confidence = 0.0
+        if confidence and not all(self._is_app(name) for name in app_names):
+            # "open the door", "run a marathon": a verb, but not an app
+            confidence = min(confidence, 0.5)
+
+        return IntentMatch(
+            function_name=function_name,
+            language=language,
+            app_names=app_names,
+            confidence=confidence,
+        )
+
+    def record(self, outcome: str) -> None:
+        """Count a fast-path outcome: 'hit', 'partial', 'miss' or 'fallback'"""
+        with self._lock:
+            if outcome == 'hit':
+                self.hits += 1
+            elif outcome == 'partial':
+                self.partials += 1
+            elif outcome == 'miss':
+                self.misses += 1
+            else:
+                self.fallbacks += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters"""
+        with self._lock:
+            total = self.hits + self.partials + self.misses + self.fallbacks
+            return {
+                'hits': self.hits,
+                'partials': self.partials,
+                'misses': self.misses,
+                'fallbacks': self.fallbacks,
+                'hit_ratio': (self.hits + self.partials) / total if total else 0.0,
+            }
+
+
+def _join_apps(names: List[str], language: str) -> str:
+    joiner = LIST_JOINERS.get(language, 'and')
+    return names[0] if len(names) == 1 else f"{', '.join(names[:-1])} {joiner} {names[-1]}"
+
+
+def render_reply(match: IntentMatch, failed_apps: Optional[List[str]] = None) -> str:
+    """Render the templated reply for a match, naming the apps that failed if any"""
+    failed_apps = failed_apps or []
+    succeeded = [name for name in match.app_names if name not in failed_apps]
+    parts = []
+    if succeeded:
+        templates = REPLY_TEMPLATES[match.function_name]
+        parts.append(templates.get(match.language, templates['en']).format(apps=_join_apps(succeeded, match.language)))
+    if failed_apps:
+        templates = FAILURE_TEMPLATES[match.function_name]
+        parts.append(templates.get(match.language, templates['en']).format(apps=_join_apps(failed_apps, match.language)))
+    return " ".join(parts)
+
+
+_default_matcher: Optional[IntentMatcher] = None
+
+
+def get_intent_matcher() -> IntentMatcher:
+    """Return the process-wide IntentMatcher built from AppAgent's tools"""
+    global _default_matcher
+    if _default_matcher is None:
+        _default_matcher = IntentMatcher(AppAgent.get_available_functions())
+    return _default_matcher
+
+
+async def try_fast_path(
+    user_message: str,
+    conversation_id: Optional[str] = None,
+    matcher: Optional[IntentMatcher] = None,
+) -> Optional[ChatResponse]:
+    """
+    Execute a trivial command without the LLM when it matches confidently.
+
+    Args:
+        user_message: User's natural language request
+        conversation_id: Optional conversation ID for tracking
+        matcher: IntentMatcher to use (default: process-wide matcher)
+
+    Returns:
+        ChatResponse with a templated reply, or None to fall through to the LLM
+        (no confident match, or every tool call failed)
+    """
+    matcher = matcher or get_intent_matcher()
+    match = matcher.match(user_message)
+    if match is None or match.confidence < matcher.min_confidence:
+        matcher.record('miss')
+        return None
+
+    tool_calls = [
+        ToolCall(function=FunctionCall(name=match.function_name, arguments={'appName': name}))
+        for name in match.app_names
+    ]
+    results = await get_tool_executor().run(tool_calls, matcher.available_functions)
+    failed_apps = [
+        name for name, result in zip(match.app_names, results) if not is_successful_result(result['content'])
+    ]
+
+    if len(failed_apps) == len(match.app_names):
+        # Nothing ran: let the LLM explain or correct the failure (e.g. a wrong app name)
+        matcher.record('fallback')
+        logger.info("fast_path_fallback", function=match.function_name, app_names=match.app_names)
+        return None
+
+    # The apps that succeeded are done; a fallback would make the LLM repeat them
+    matcher.record('partial' if failed_apps else 'hit')
+    reply = render_reply(match, failed_apps)
+    conversation_id = conversation_id or str(uuid.uuid4())
+    step_id = str(uuid.uuid4())
+    logger.info(
+        "fast_path_hit",
+        function=match.function_name,
+        app_names=match.app_names,
+        failed_app_names=failed_apps,
+        confidence=match.confidence,
+        conversation_id=conversation_id,
+        step_id=step_id,
+    )
+    return ChatResponse(
+        reply=reply,
+        conversation_id=conversation_id,
+        step_id=step_id,
+        trace=None,
+    )
@@ -1,16 +1,134 @@
 import asyncio
+import time
 import uuid
-from typing import Optional, List, Dict, Any
+from contextlib import aclosing
+from typing import Optional, List, Dict, Any, AsyncIterator, Awaitable, Callable, Tuple
 from pydantic import ValidationError
+from ollama import Message
 from src.llm.ollama_adapter import OllamaAdapter
 from src.agents.app_agent import AppAgent
-from src.models.schemas import ChatRequest, ChatResponse, ToolCall, AgentTrace
+from src.agents.tool_selector import get_tool_selector
+from src.models.schemas import ChatResponse, ChatChunk, FunctionCall
 from src.models.config import OrchestratorConfig
 from src.orchestrator.prompts import SYSTEM_PROMPT
+from src.orchestrator.admission import admit_llm
+from src.orchestrator.cancellation import CANCELLED_REPLY, get_cancellation_registry
+from src.orchestrator.tool_executor import execute_tool_call, get_tool_executor
+from src.orchestrator.speculative import SpeculativeRun
+from src.orchestrator.progress import StreamProgress
+from src.utils.ndjson import encode_chunk, encode_delta
+from src.utils.tracing import RunTrace
+from src.orchestrator.intent_matcher import try_fast_path
+from src.orchestrator.plan_cache import is_successful_result, replay_cached_plan, remember_plan
+from src.orchestrator.context_compactor import ContextCompactor, compact_for_call
+from src.orchestrator.think_policy import ThinkDecision, ThinkPolicy, get_think_policy
 import structlog
 
 logger = structlog.get_logger()
 
+ToolCallMessage = Message.ToolCall
+
+
+def _record_tool_calls(
+    tool_calls: List[Any],
+    tool_results: List[Dict[str, Any]],
+    executed_calls: List[FunctionCall],
+    executed_results: List[str]
+) -> None:
+    """Append one turn's tool calls and result strings to the run's plan record"""
+    for tool_call, tool_result in zip(tool_calls, tool_results):
+        executed_calls.append(FunctionCall(
+            name=tool_call.function.name,
+            arguments=dict(tool_call.function.arguments or {})
+        ))
+        executed_results.append(tool_result['content'])
+
+
+def _get_compactor(config: OrchestratorConfig) -> Optional[ContextCompactor]:
+    """Context compactor for the loop, or None when compaction is disabled"""
+    if not config.enable_context_compaction:
+        return None
+    return ContextCompactor(config.max_tool_result_tokens, config.keep_recent_tool_turns)
+
+
+def _get_think_policy(config: OrchestratorConfig) -> Optional[ThinkPolicy]:
+    """Adaptive reasoning policy, or None to always think without a budget"""
+    if not config.enable_adaptive_think:
+        return None
+    return get_think_policy(config.think_budget_tokens)
+
+
+def _get_speculation(config: OrchestratorConfig, tool_executor, available_functions, tool_registry) -> Optional[SpeculativeRun]:
+    """Speculative tool runner for one streaming request, or None when disabled"""
+    if not config.enable_speculative_tools:
+        return None
+
+    def execute(name: str, arguments: Dict[str, Any]) -> Dict[str, Any]:
+        tool_call = ToolCallMessage(function=ToolCallMessage.Function(name=name, arguments=arguments))
+        return execute_tool_call(tool_call, available_functions, tool_registry)
+
+    return SpeculativeRun(execute, tool_executor)
+
+
+async def _execute_as_completed(
+    tool_calls: List[Any],
+    run_batch: Callable[[List[Any]], Awaitable[List[Dict[str, Any]]]]
+) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+    """
+    Run each tool call as its own task and yield (index, result) as each finishes.
+
+    Concurrency and per-target ordering are the same as running the calls
+    as one batch; the caller just learns about each result as soon as it is in.
+    """
+    async def run_one(index: int, tool_call: Any) -> Tuple[int, Dict[str, Any]]:
+        return index, (await run_batch([tool_call]))[0]
+
+    tasks = [asyncio.create_task(run_one(i, tool_call)) for i, tool_call in enumerate(tool_calls)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def _execute_traced(
+    tool_calls: List[Any],
+    run_batch: Callable[[List[Any]], Awaitable[List[Dict[str, Any]]]],
+    run_trace: RunTrace,
+    call_ids: Optional[List[str]] = None
+) -> AsyncIterator[Tuple[int, Dict[str, Any], bool]]:
+    """
+    _execute_as_completed with a tool span and tool metrics per call.
+
+    Yields:
+        (index, result, success) as each call finishes
+    """
+    call_ids = call_ids or [uuid.uuid4().hex for _ in tool_calls]
+    for tool_call, call_id in zip(tool_calls, call_ids):
+        run_trace.tool_start(call_id, tool_call.function.name)
+    async for index, tool_result in _execute_as_completed(tool_calls, run_batch):
+        success = is_successful_result(tool_result['content'])
+        run_trace.tool_end(call_ids[index], success)
+        yield index, tool_result, success
+
+
+async def _run_tools_traced(
+    tool_calls: List[Any],
+    run_batch: Callable[[List[Any]], Awaitable[List[Dict[str, Any]]]],
+    run_trace: RunTrace
+) -> List[Dict[str, Any]]:
+    """Run one turn's tool calls with tracing; results keep call order"""
+    tool_results: List[Dict[str, Any]] = [{} for _ in tool_calls]
+    async for index, tool_result, _ in _execute_traced(tool_calls, run_batch, run_trace):
+        tool_results[index] = tool_result
+    return tool_results
+
+
+def _count_tool_failures(tool_results: List[Dict[str, Any]]) -> int:
+    """Tool results that report an error instead of success"""
+    return sum(1 for result in tool_results if not is_successful_result(result['content']))
+
 
 async def orchestrate_with_retry(
     user_message: str,
@@ -48,9 +166,53 @@ async def orchestrate_with_retry(
         model=llm_client.model
     )
 
-    # Get tools from AppAgent
-    tool_functions = AppAgent.get_tool_functions()
-    available_functions = AppAgent.get_available_functions()
+    # Trivial commands ("open Safari") skip the LLM entirely
+    if config.enable_fast_path:
+        fast_response = await try_fast_path(user_message, conversation_id=conversation_id)
+        if fast_response is not None:
+            return fast_response
+
+    # Get precompiled tool schemas and validators from AppAgent
+    tool_registry = AppAgent.get_tool_registry()
+    available_functions = tool_registry.functions
+    # Only the most relevant tool schemas go into the prompt
+    tool_schemas = get_tool_selector().select(user_message, config.tool_selection_top_k).schemas
+    tool_executor = get_tool_executor(config)
+    compactor = _get_compactor(config)
+
+    # Repeated requests replay their cached plan without calling the LLM
+    if config.enable_plan_cache:
+        cached_response = await replay_cached_plan(
+            user_message, available_functions, SYSTEM_PROMPT, conversation_id=conversation_id
+        )
+        if cached_response is not None:
+            return cached_response
+
+    # A fast path that fell back takes its LLM slot now
+
+    # A fast path that fell back takes its LLM slot now
+    await admit_llm()
+
+    # Tool calls and results of this run, recorded for the plan cache
+    executed_calls: List[FunctionCall] = []
+    executed_results: List[str] = []
+
+    # Reasoning level for this request (escalated when a turn fails)
+    think_policy = _get_think_policy(config)
+    initial_decision = think_policy.decide(user_message) if think_policy else ThinkDecision(level='full', think=True)
+    decision = initial_decision
+    escalated = False
+    tool_failures = 0
+    start = time.perf_counter()
+    run_trace = RunTrace("agent.run", conversation_id=conversation_id, think_level=initial_decision.level, stream=False)
+
+    def record_outcome(success: bool) -> None:
+        run_trace.end(success=success, tool_calls=len(executed_calls))
+        if think_policy is not None:
+            think_policy.record(
+                initial_decision, (time.perf_counter() - start) * 1000,
+                len(executed_calls), tool_failures, success and not escalated
+            )
 
     # Initialize message history
     messages: List[Dict[str, Any]] = [
@@ -70,11 +232,15 @@ async def orchestrate_with_retry(
                 # Step 1: Call LLM with tools and think=True
                 logger.info("llm_call", iteration=iteration, num_messages=len(messages))
 
-                response = llm_client.chat(
-                    messages=messages,
-                    tools=tool_functions,
-                    think=True  # Enable extended thinking/reasoning
+                # Send a compacted view so prefill does not grow with every iteration
+                run_trace.llm_start(think_level=decision.level)
+                response = await llm_client.achat(
+                    messages=compact_for_call(messages, compactor, iteration, conversation_id=conversation_id),
+                    tools=tool_schemas,
+                    think=decision.think,
+                    think_budget=decision.budget_tokens
                 )
+                run_trace.llm_end(output_tokens=response.eval_count, tool_calls=len(response.message.tool_calls or []))
 
                 # Log thinking process if available
                 if hasattr(response.message, 'thinking') and response.message.thinking:
@@ -87,60 +253,44 @@ async def orchestrate_with_retry(
                     # Append assistant message with tool calls to history
                     messages.append(response.message)
 
-                    # Step 3: Execute each tool call
-                    for tool_call in response.message.tool_calls:
-                        function_name = tool_call.function.name
-                        function_args = tool_call.function.arguments
-
-                        logger.info(
-                            "executing_tool",
-                            function=function_name,
-                            arguments=function_args
-                        )
+                    # Step 3: Execute tool calls concurrently (results keep call order)
+                    tool_results = await _run_tools_traced(
+                        response.message.tool_calls,
+                        lambda calls: tool_executor.run(calls, available_functions, tool_registry),
+                        run_trace
+                    )
+                    messages.extend(tool_results)
+                    _record_tool_calls(response.message.tool_calls, tool_results, executed_calls, executed_results)
 
-                        # Get the function and execute it
-                        if function_to_call := available_functions.get(function_name):
-                            try:
-                                # Execute the tool function
-                                tool_result = function_to_call(**function_args)
-                                logger.info(
-                                    "tool_executed",
-                                    function=function_name,
-                                    result_preview=str(tool_result)[:100]
-                                )
-
-                                # Append tool result to messages
-                                messages.append({
-                                    'role': 'tool',
-                                    'content': str(tool_result),
-                                    'tool_name': function_name
-                                })
-
-                            except Exception as tool_error:
-                                error_msg = f"Error executing {function_name}: {str(tool_error)}"
-                                logger.error("tool_execution_error", function=function_name, error=str(tool_error))
-
-                                # Append error as tool result
-                                messages.append({
-                                    'role': 'tool',
-                                    'content': error_msg,
-                                    'tool_name': function_name
-                                })
-                        else:
-                            logger.error("unknown_function", function=function_name)
-                            messages.append({
-                                'role': 'tool',
-                                'content': f"Unknown function: {function_name}",
-                                'tool_name': function_name
-                            })
+                    # Failed tool calls get more reasoning on the next turn
+                    failures = _count_tool_failures(tool_results)
+                    tool_failures += failures
+                    if failures and think_policy is not None:
+                        next_decision = think_policy.escalate(decision, f"{failures} failed tool call(s)")
+                        if next_decision is not None:
+                            decision, escalated = next_decision, True
 
                     # Continue the loop - LLM will decide next action (more tools or final response)
                     continue
 
                 else:
+                    # An empty answer usually means the budget ran out while thinking
+                    if not response.message.content and think_policy is not None:
+                        next_decision = think_policy.escalate(decision, "empty response")
+                        if next_decision is not None:
+                            decision, escalated = next_decision, True
+                            continue
+
                     # No tool calls - LLM provided final response
                     reply = response.message.content or "I completed the task."
                     step_id = str(uuid.uuid4())
+                    record_outcome(success=bool(response.message.content))
+
+                    if config.enable_plan_cache:
+                        remember_plan(
+                            user_message, executed_calls, executed_results, reply,
+                            available_functions, SYSTEM_PROMPT
+                        )
 
                     logger.info(
                         "orchestration_complete",
@@ -160,6 +310,7 @@ async def orchestrate_with_retry(
             # Max iterations reached
             step_id = str(uuid.uuid4())
             logger.warning("max_iterations_reached", max_iterations=max_iterations, step_id=step_id)
+            record_outcome(success=False)
             return ChatResponse(
                 reply="I completed the requested actions.",
                 conversation_id=conversation_id,
@@ -176,7 +327,13 @@ async def orchestrate_with_retry(
                 max_retries=max_retries
             )
 
+            if think_policy is not None:
+                next_decision = think_policy.escalate(decision, "validation error")
+                if next_decision is not None:
+                    decision, escalated = next_decision, True
+
             if retries > max_retries:
+                record_outcome(success=False)
                 step_id = str(uuid.uuid4())
                 error_reply = f"I encountered a validation error after {max_retries} attempts. Please try rephrasing your request."
                 return ChatResponse(
@@ -190,6 +347,7 @@ async def orchestrate_with_retry(
             continue
 
         except Exception as e:
+            record_outcome(success=False)
             step_id = str(uuid.uuid4())
             logger.error(
                 "orchestration_error",
@@ -214,3 +372,278 @@ async def orchestrate_with_retry(
         step_id=step_id,
         trace=None
     )
+
+
+async def orchestrate_streaming(
+    user_message: str,
+    llm_client: OllamaAdapter,
+    config: OrchestratorConfig,
+    conversation_id: Optional[str] = None
+) -> AsyncIterator[bytes]:
+    """
+    Streaming variant of orchestrate_with_retry.
+
+    Runs the same agentic loop but requests token streams from Ollama and
+    forwards content deltas as soon as they arrive, using the same NDJSON
+    protocol as run_agent_streaming:
+    - meta chunk (conversation_id, step_id)
+    - delta chunks (partial content, from every iteration)
+    - final chunk (complete message)
+
+    Tool calls are collected while the turn streams and executed once the
+    turn is done; the loop then continues streaming the next turn. Validation
+    errors are not retried here because deltas have already been sent.
+
+    Args:
+        user_message: User's natural language request
+        llm_client: OllamaAdapter instance
+        config: Orchestrator configuration
+        conversation_id: Optional conversation ID for tracking
+
+    Yields:
+        ChatChunk lines as UTF-8 bytes (NDJSON format)
+    """
+    conversation_id = conversation_id or str(uuid.uuid4())
+    step_id = str(uuid.uuid4())
+
+    meta_chunk = ChatChunk(
+        type="meta",
+        conversation_id=conversation_id,
+        step_id=step_id
+    )
+    yield encode_chunk(meta_chunk)
+    progress = StreamProgress()
+
+    logger.info(
+        "orchestrator_streaming_start",
+        user_message=user_message,
+        conversation_id=conversation_id,
+        model=llm_client.model
+    )
+
+    # Trivial commands ("open Safari") skip the LLM entirely
+    if config.enable_fast_path:
+        fast_response = await try_fast_path(user_message, conversation_id=conversation_id)
+        if fast_response is not None:
+            yield encode_delta(fast_response.reply)
+            final_chunk = ChatChunk(type="final", message=fast_response.reply)
+            yield encode_chunk(final_chunk)
+            return
+
+    tool_registry = AppAgent.get_tool_registry()
+    available_functions = tool_registry.functions
+    # Only the most relevant tool schemas go into the prompt
+    tool_schemas = get_tool_selector().select(user_message, config.tool_selection_top_k).schemas
+    tool_executor = get_tool_executor(config)
+    compactor = _get_compactor(config)
+
+    # Repeated requests replay their cached plan without calling the LLM
+    if config.enable_plan_cache:
+        cached_response = await replay_cached_plan(
+            user_message, available_functions, SYSTEM_PROMPT, conversation_id=conversation_id
+        )
+        if cached_response is not None:
+            yield encode_delta(cached_response.reply)
+            final_chunk = ChatChunk(type="final", message=cached_response.reply)
+            yield encode_chunk(final_chunk)
+            return
+
+    # A fast path that fell back takes its LLM slot now
+
+    # A fast path that fell back takes its LLM slot now
+    await admit_llm()
+
+    executed_calls: List[FunctionCall] = []
+    executed_results: List[str] = []
+
+    think_policy = _get_think_policy(config)
+    initial_decision = think_policy.decide(user_message) if think_policy else ThinkDecision(level='full', think=True)
+    decision = initial_decision
+    escalated = False
+    tool_failures = 0
+    start = time.perf_counter()
+    run_trace = RunTrace("agent.run", conversation_id=conversation_id, step_id=step_id, think_level=initial_decision.level, stream=True)
+
+    # Idempotent tool calls start as soon as they appear in the stream
+    speculation = _get_speculation(config, tool_executor, available_functions, tool_registry)
+    # Registered so a client disconnect or the cancel endpoint can stop the run
+    cancellations = get_cancellation_registry()
+    step = cancellations.begin(step_id)
+
+    messages: List[Dict[str, Any]] = [
+        {'role': 'system', 'content': SYSTEM_PROMPT},
+        {'role': 'user', 'content': user_message}
+    ]
+
+    accumulated_text = ""
+
+    try:
+        max_iterations = 10  # Prevent infinite loops
+        iteration = 0
+        completed = False
+
+        while iteration < max_iterations:
+            iteration += 1
+            logger.info("llm_call", iteration=iteration, num_messages=len(messages), stream=True)
+
+            turn_content = ""
+            turn_thinking = ""
+            turn_tool_calls: List[Any] = []
+            turn_tokens: Optional[int] = None
+
+            line = progress.enter("model")
+            if line:
+                yield line
+
+            run_trace.llm_start(think_level=decision.level)
+            stream = await llm_client.achat(
+                messages=compact_for_call(messages, compactor, iteration, conversation_id=conversation_id, stream=True),
+                tools=tool_schemas,
+                think=decision.think,
+                think_budget=decision.budget_tokens,
+                stream=True
+            )
+
+            # Closing the stream on cancellation aborts the Ollama request
+            async with aclosing(stream):
+                async for part in stream:
+                    run_trace.first_token()
+                    if part.done:
+                        turn_tokens = part.eval_count
+                    message = part.message
+                    if message.thinking:
+                        turn_thinking += message.thinking
+                        line = progress.enter("thinking")
+                        if line:
+                            yield line
+                    if message.tool_calls:
+                        turn_tool_calls.extend(message.tool_calls)
+                        if speculation is not None:
+                            for tool_call in message.tool_calls:
+                                speculation.start(tool_call.function.name, dict(tool_call.function.arguments or {}))
+                        line = progress.enter("tool_call")
+                        if line:
+                            yield line
+                    if message.content:
+                        line = progress.enter("answering")
+                        if line:
+                            yield line
+                        turn_content += message.content
+                        accumulated_text += message.content
+                        encode_start = time.perf_counter()
+                        line = encode_delta(message.content)
+                        run_trace.encoded(time.perf_counter() - encode_start)
+                        yield line
+            run_trace.llm_end(output_tokens=turn_tokens, tool_calls=len(turn_tool_calls))
+
+            if turn_thinking:
+                logger.info("llm_thinking", thinking=turn_thinking[:200])
+
+            if not turn_tool_calls:
+                # An empty answer usually means the budget ran out while thinking
+                if not turn_content and think_policy is not None:
+                    next_decision = think_policy.escalate(decision, "empty response")
+                    if next_decision is not None:
+                        decision, escalated = next_decision, True
+                        continue
+                # No tool calls - this turn was the final response
+                completed = True
+                break
+
+            logger.info("tool_calls_detected", num_calls=len(turn_tool_calls))
+            messages.append({
+                'role': 'assistant',
+                'content': turn_content,
+                'tool_calls': turn_tool_calls
+            })
+            def run_batch(calls: List[Any]) -> Awaitable[List[Dict[str, Any]]]:
+                if speculation is not None:
+                    # Reuse calls already started mid-stream; run the rest normally
+                    return speculation.resolve(
+                        calls, lambda remaining: tool_executor.run(remaining, available_functions, tool_registry)
+                    )
+                return tool_executor.run(calls, available_functions, tool_registry)
+
+            # Report each tool as it starts and finishes
+            line = progress.enter("tools")
+            if line:
+                yield line
+            call_ids = [uuid.uuid4().hex for _ in turn_tool_calls]
+            for tool_call, call_id in zip(turn_tool_calls, call_ids):
+                yield progress.tool_start(tool_call.function.name, dict(tool_call.function.arguments or {}), call_id)
+            tool_results: List[Dict[str, Any]] = [{} for _ in turn_tool_calls]
+            async for index, tool_result, success in _execute_traced(turn_tool_calls, run_batch, run_trace, call_ids):
+                tool_results[index] = tool_result
+                yield progress.tool_end(turn_tool_calls[index].function.name, call_ids[index], success)
+            if speculation is not None:
+                speculation.finish()
+            messages.extend(tool_results)
+            _record_tool_calls(turn_tool_calls, tool_results, executed_calls, executed_results)
+
+            failures = _count_tool_failures(tool_results)
+            tool_failures += failures
+            if failures and think_policy is not None:
+                next_decision = think_policy.escalate(decision, f"{failures} failed tool call(s)")
+                if next_decision is not None:
+                    decision, escalated = next_decision, True
+        else:
+            logger.warning("max_iterations_reached", max_iterations=max_iterations, step_id=step_id)
+        step.completed = True
+        run_trace.end(iterations=iteration, tool_calls=len(executed_calls))
+
+        if think_policy is not None:
+            think_policy.record(
+                initial_decision, (time.perf_counter() - start) * 1000,
+                len(executed_calls), tool_failures, completed and bool(accumulated_text) and not escalated
+            )
+
+        final_message = accumulated_text or "I completed the task."
+        if config.enable_plan_cache and completed:
+            remember_plan(
+                user_message, executed_calls, executed_results, final_message,
+                available_functions, SYSTEM_PROMPT
+            )
+        final_chunk = ChatChunk(type="final", message=final_message)
+        yield encode_chunk(final_chunk)
+
+        logger.info(
+            "orchestration_streaming_complete",
+            conversation_id=conversation_id,
+            step_id=step_id,
+            total_length=len(final_message),
+            total_iterations=iteration
+        )
+
+    except asyncio.CancelledError:
+        if not cancellations.acknowledge(step):
+            raise
+        yield encode_chunk(ChatChunk(type="final", message=accumulated_text or CANCELLED_REPLY))
+
+    except GeneratorExit:
+        # The reader closed the stream (client gone)
+        step.interrupted = True
+        raise
+
+    except Exception as e:
+        run_trace.end(error=e)
+        if think_policy is not None:
+            think_policy.record(
+                initial_decision, (time.perf_counter() - start) * 1000,
+                len(executed_calls), tool_failures, False
+            )
+        logger.error(
+            "orchestration_streaming_error",
+            error=str(e),
+            error_type=type(e).__name__,
+            conversation_id=conversation_id,
+            step_id=step_id
+        )
+        error_chunk = ChatChunk(type="final", message=f"Error: {str(e)}")
+        yield encode_chunk(error_chunk)
+
+    finally:
+        # Tools that were started early but never confirmed are dropped
+        if speculation is not None:
+            speculation.finish()
+        cancellations.end(step)
+        run_trace.end(cancelled=not step.completed)
@@ -0,0 +1,271 @@
+"""
+Normalized plan cache for repeated requests.
+
+Maps a normalized user message ("Open Spotify!" and "open spotify please"
+share a key) to the tool-call plan the LLM resolved for it and the reply it
+produced, so repeats replay the plan without calling the model.
+"""
+import hashlib
+import inspect
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from pydantic import BaseModel, Field
+import structlog
+
+from src.models.schemas import ChatResponse, FunctionCall, ToolCall
+from src.orchestrator.tool_executor import get_tool_executor
+
+logger = structlog.get_logger()
+
+FILLER_WORDS = {
+    'please', 'pls', 'plz', 'thanks', 'thank', 'you', 'can', 'could', 'would',
+    'kindly', 'for', 'me', 'now', 'just', 'hey', 'hi', 'ok', 'okay',
+    'per', 'favore', 'grazie', 'puoi', 'potresti', 'mi', 'ora', 'adesso',
+    'por', 'favor', 'gracias', 'bitte', 'danke',
+}
+
+_PUNCTUATION = re.compile(r"[^\w\s]", re.UNICODE)
+
+
+def normalize_message(user_message: str) -> str:
+    """Lowercase, strip punctuation and drop filler words"""
+    words = _PUNCTUATION.sub(" ", user_message.lower()).split()
+    return " ".join(w for w in words if w not in FILLER_WORDS)
+
+
+def plan_fingerprint(system_prompt: str, available_functions: Dict[str, Callable]) -> str:
+    """
+    Fingerprint the inputs a cached plan depends on.
+
+    Changes to SYSTEM_PROMPT or to any tool's name, signature or docstring
+    produce a different fingerprint, which invalidates the cache.
+    """
+    digest = hashlib.sha256(system_prompt.encode("utf-8"))
+    for name in sorted(available_functions):
+        func = available_functions[name]
+        digest.update(name.encode("utf-8"))
+        digest.update(str(inspect.signature(func)).encode("utf-8"))
+        digest.update((func.__doc__ or "").encode("utf-8"))
+    return digest.hexdigest()
+
+
+class CachedPlan(BaseModel):
+    """A resolved tool-call plan and the reply it produced"""
+    tool_calls: List[FunctionCall] = Field(default_factory=list, description="Tool calls in execution order")
+    reply: str = Field(description="Final reply to send after replaying the plan")
+
+
+class PlanCache:
+    """Bounded LRU cache with per-entry TTL"""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600.0):
+        """
+        Args:
+            max_entries: Maximum number of cached plans (least recently used evicted first)
+            ttl_seconds: Lifetime of a cached plan
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[CachedPlan, float, int]]" = OrderedDict()
+        self._fingerprint: Optional[str] = None
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _check_fingerprint(self, fingerprint: str) -> None:
+        if self._fingerprint != fingerprint:
+            if self._entries:
+                self.invalidations += 1
+                logger.info("plan_cache_invalidated", entries=len(self._entries))
+            self._entries.clear()
+            self._bytes = 0
+            self._fingerprint = fingerprint
+
+    def _remove(self, key: str) -> None:
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def get(self, user_message: str, fingerprint: str) -> Optional[CachedPlan]:
+        """Return the cached plan for a message, or None on miss/expiry"""
+        key = normalize_message(user_message)
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            plan, expires_at, _ = entry
+            if time.monotonic() >= expires_at:
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return plan
+
+    def put(self, user_message: str, fingerprint: str, plan: CachedPlan) -> None:
+        """Store a plan, evicting least recently used entries beyond max_entries"""
+        key = normalize_message(user_message)
+        if not key:
+            return
+        size = len(key.encode("utf-8")) + len(plan.model_dump_json().encode("utf-8"))
+        with self._lock:
+            self._check_fingerprint(fingerprint)
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (plan, time.monotonic() + self.ttl_seconds, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def discard(self, user_message: str) -> None:
+        """Drop the entry for a message (e.g. when its replay failed)"""
+        key = normalize_message(user_message)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self) -> None:
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit ratio, size and approximate memory usage"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'approx_bytes': self._bytes,
+            }
+
+
+_default_cache: Optional[PlanCache] = None
+
+
+def get_plan_cache(config: Optional[Any] = None) -> PlanCache:
+    """
+    Return the process-wide PlanCache, creating it on first use.
+
+    Args:
+        config: Optional OrchestratorConfig providing plan_cache_* settings
+
+    Returns:
+        Shared PlanCache instance
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = PlanCache(
+            max_entries=getattr(config, 'plan_cache_max_entries', 256),
+            ttl_seconds=getattr(config, 'plan_cache_ttl_seconds', 3600.0),
+        )
+    return _default_cache
+
+
+def is_successful_result(content: str) -> bool:
+    """Tool results report success the same way AppAgent.execute checks it"""
+    return "successfully" in content
+
+
+async def replay_cached_plan(
+    user_message: str,
+    available_functions: Dict[str, Callable],
+    system_prompt: str,
+    conversation_id: Optional[str] = None,
+    cache: Optional[PlanCache] = None,
+) -> Optional[ChatResponse]:
+    """
+    Replay a cached plan for the message without calling the LLM.
+
+    Args:
+        user_message: User's natural language request
+        available_functions: Tools used to replay the plan
+        system_prompt: Current system prompt (part of the cache fingerprint)
+        conversation_id: Optional conversation ID for tracking
+        cache: PlanCache to use (default: process-wide cache)
+
+    Returns:
+        ChatResponse with the cached reply, or None on a miss or failed replay
+    """
+    cache = cache or get_plan_cache()
+    plan = cache.get(user_message, plan_fingerprint(system_prompt, available_functions))
+    if plan is None:
+        return None
+
+    if plan.tool_calls:
+        results = await get_tool_executor().run(
+            [ToolCall(function=call) for call in plan.tool_calls], available_functions
+        )
+        if not all(is_successful_result(result['content']) for result in results):
+            # The world changed (app uninstalled, ...); let the LLM handle it
+            cache.discard(user_message)
+            logger.info("plan_cache_replay_failed", num_calls=len(plan.tool_calls))
+            return None
+
+    conversation_id = conversation_id or str(uuid.uuid4())
+    step_id = str(uuid.uuid4())
+    logger.info(
+        "plan_cache_hit",
+        conversation_id=conversation_id,
+        step_id=step_id,
+        num_calls=len(plan.tool_calls),
+    )
+    return ChatResponse(
+        reply=plan.reply,
+        conversation_id=conversation_id,
+        step_id=step_id,
+        trace=None,
+    )
+
+
+def remember_plan(
+    user_message: str,
+    tool_calls: List[FunctionCall],
+    tool_results: List[str],
+    reply: str,
+    available_functions: Dict[str, Callable],
+    system_prompt: str,
+    cache: Optional[PlanCache] = None,
+) -> None:
+    """
+    Cache a completed run, but only if it called tools and every call
+    succeeded. Tool-less replies (chit-chat, "what time is it?") are not
+    plans and could be stale when replayed.
+
+    Args:
+        user_message: User's natural language request
+        tool_calls: Tool calls the LLM made, in execution order
+        tool_results: Tool result strings, aligned with tool_calls
+        reply: Final reply sent to the user
+        available_functions: Tools the plan will be replayed with
+        system_prompt: Current system prompt (part of the cache fingerprint)
+        cache: PlanCache to use (default: process-wide cache)
+    """
+    if not reply or not tool_calls:
+        return
+    if not all(is_successful_result(result) for result in tool_results):
+        return
+    if any(call.name not in available_functions for call in tool_calls):
+        return
+    cache = cache or get_plan_cache()
+    cache.put(
+        user_message,
+        plan_fingerprint(system_prompt, available_functions),
+        CachedPlan(tool_calls=tool_calls, reply=reply),
+    )
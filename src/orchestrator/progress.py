@@ -0,0 +1,68 @@
+"""
+Progress chunks for the NDJSON stream.
+
+Tool-using turns can spend seconds thinking and running tools before the
+first text delta. StreamProgress turns those steps into phase, tool_start
+and tool_end chunks (with timings relative to the request start) so the
+client can show what is happening instead of silence.
+"""
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from src.models.schemas import ChatChunk
+from src.utils.ndjson import encode_chunk
+
+
+class StreamProgress:
+    """Builds lifecycle chunks for one streaming request"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phase: Optional[str] = None
+        self._tool_starts: Dict[str, float] = {}
+
+    @property
+    def tools_running(self) -> int:
+        """Tools started but not finished yet"""
+        return len(self._tool_starts)
+
+    def _elapsed_ms(self) -> float:
+        return round((time.perf_counter() - self.start) * 1000, 1)
+
+    def enter(self, phase: str) -> Optional[bytes]:
+        """
+        Phase chunk line for a transition, or None when already in that phase.
+
+        Args:
+            phase: model, thinking, tool_call, tools or answering
+        """
+        if phase == self.phase:
+            return None
+        self.phase = phase
+        return encode_chunk(ChatChunk(type="phase", phase=phase, elapsed_ms=self._elapsed_ms()))
+
+    def tool_start(self, tool_name: str, arguments: Optional[Dict[str, Any]], tool_call_id: Optional[str] = None) -> bytes:
+        """tool_start chunk line; remembers the start time under tool_call_id"""
+        tool_call_id = tool_call_id or uuid.uuid4().hex
+        self._tool_starts[tool_call_id] = time.perf_counter()
+        return encode_chunk(ChatChunk(
+            type="tool_start",
+            tool_name=tool_name,
+            tool_call_id=tool_call_id,
+            arguments=arguments or {},
+            elapsed_ms=self._elapsed_ms(),
+        ))
+
+    def tool_end(self, tool_name: str, tool_call_id: str, success: bool) -> bytes:
+        """tool_end chunk line with the tool's duration"""
+        started = self._tool_starts.pop(tool_call_id, None)
+        duration_ms = round((time.perf_counter() - started) * 1000, 1) if started is not None else None
+        return encode_chunk(ChatChunk(
+            type="tool_end",
+            tool_name=tool_name,
+            tool_call_id=tool_call_id,
+            duration_ms=duration_ms,
+            success=success,
+            elapsed_ms=self._elapsed_ms(),
+        ))
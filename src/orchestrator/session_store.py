@@ -0,0 +1,173 @@
+"""
+Bounded in-memory store of multi-turn conversation history.
+
+Each conversation_id maps to its recent turns (a turn is every message one
+request added: user prompt, tool calls, tool results, reply). Per-session
+token budgets evict the oldest turns, and a global token cap evicts the
+least recently used sessions, so prompts and memory stay bounded.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+import structlog
+
+from src.models.config import SessionConfig
+
+logger = structlog.get_logger()
+
+# Number of prompt-size samples kept for percentiles
+_MAX_SAMPLES = 500
+
+
+def estimate_message_tokens(message: Any) -> int:
+    """
+    Rough token count (~4 characters per token) for a history message.
+
+    Handles Ollama message dicts/objects and pydantic-ai ModelMessages.
+    """
+    if isinstance(message, dict):
+        text = str(message.get('content') or '') + str(message.get('tool_calls') or '')
+    elif hasattr(message, 'parts'):
+        text = "".join(
+            str(getattr(part, 'content', None) or getattr(part, 'args', None) or '')
+            for part in message.parts
+        )
+    else:
+        text = str(getattr(message, 'content', None) or '') + str(getattr(message, 'tool_calls', None) or '')
+    return len(text) // 4 + 4  # + per-message framing overhead
+
+
+class _Session:
+    def __init__(self):
+        self.turns: List[List[Any]] = []
+        self.turn_tokens: List[int] = []
+        self.last_used = time.monotonic()
+
+    @property
+    def tokens(self) -> int:
+        return sum(self.turn_tokens)
+
+
+class SessionStore:
+    """conversation_id -> bounded turn history"""
+
+    def __init__(self, config: Optional[SessionConfig] = None):
+        """
+        Args:
+            config: Per-session and global limits
+        """
+        self.config = config or SessionConfig()
+        self._sessions: "OrderedDict[str, _Session]" = OrderedDict()
+        self._total_tokens = 0
+        self._lock = threading.Lock()
+        self._prompt_samples: List[int] = []
+        self.evicted_turns = 0
+        self.evicted_sessions = 0
+
+    def history(self, conversation_id: Optional[str]) -> List[Any]:
+        """Return the retained messages of a conversation, oldest first"""
+        if not conversation_id:
+            return []
+        with self._lock:
+            session = self._sessions.get(conversation_id)
+            if session is None or self._is_idle(session):
+                return []
+            session.last_used = time.monotonic()
+            self._sessions.move_to_end(conversation_id)
+            return [message for turn in session.turns for message in turn]
+
+    def has_history(self, conversation_id: Optional[str]) -> bool:
+        """True when the conversation has retained turns"""
+        return bool(self.history(conversation_id))
+
+    def append_turn(self, conversation_id: str, messages: List[Any]) -> None:
+        """
+        Add one request's messages, then enforce the token budgets.
+
+        Args:
+            conversation_id: Conversation to extend
+            messages: Messages produced by this turn (user prompt first)
+        """
+        if not messages:
+            return
+        tokens = sum(estimate_message_tokens(m) for m in messages)
+        with self._lock:
+            session = self._sessions.get(conversation_id)
+            if session is None:
+                session = _Session()
+                self._sessions[conversation_id] = session
+            session.turns.append(list(messages))
+            session.turn_tokens.append(tokens)
+            session.last_used = time.monotonic()
+            self._sessions.move_to_end(conversation_id)
+            self._total_tokens += tokens
+
+            # Per-session budget: drop oldest turns, always keeping the newest one
+            while session.tokens > self.config.max_tokens_per_session and len(session.turns) > 1:
+                session.turns.pop(0)
+                self._total_tokens -= session.turn_tokens.pop(0)
+                self.evicted_turns += 1
+
+            self._evict_sessions(keep=conversation_id)
+
+    def _is_idle(self, session: _Session) -> bool:
+        return time.monotonic() - session.last_used > self.config.idle_ttl_seconds
+
+    def _drop(self, conversation_id: str) -> None:
+        session = self._sessions.pop(conversation_id)
+        self._total_tokens -= session.tokens
+        self.evicted_sessions += 1
+
+    def _evict_sessions(self, keep: Optional[str] = None) -> None:
+        """Drop idle sessions, then least recently used ones beyond the global caps"""
+        for conversation_id in [cid for cid, s in self._sessions.items() if self._is_idle(s)]:
+            self._drop(conversation_id)
+        while (
+            self._total_tokens > self.config.max_total_tokens
+            or len(self._sessions) > self.config.max_sessions
+        ):
+            oldest = next(iter(self._sessions))
+            if oldest == keep:
+                break
+            self._drop(oldest)
+
+    def record_prompt(self, tokens: int) -> None:
+        """Record the estimated prompt size of one LLM turn"""
+        with self._lock:
+            self._prompt_samples.append(tokens)
+            if len(self._prompt_samples) > _MAX_SAMPLES:
+                del self._prompt_samples[0]
+
+    def clear(self, conversation_id: str) -> None:
+        """Forget a conversation"""
+        with self._lock:
+            if conversation_id in self._sessions:
+                session = self._sessions.pop(conversation_id)
+                self._total_tokens -= session.tokens
+
+    def stats(self) -> Dict[str, Any]:
+        """Session counts, memory use and prompt size per turn"""
+        with self._lock:
+            ordered = sorted(self._prompt_samples)
+            return {
+                'sessions': len(self._sessions),
+                'total_tokens': self._total_tokens,
+                'max_total_tokens': self.config.max_total_tokens,
+                'evicted_turns': self.evicted_turns,
+                'evicted_sessions': self.evicted_sessions,
+                'prompt_tokens_p50': ordered[len(ordered) // 2] if ordered else None,
+                'prompt_tokens_p95': ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] if ordered else None,
+                'prompt_tokens_max': ordered[-1] if ordered else None,
+            }
+
+
+_default_store: Optional[SessionStore] = None
+
+
+def get_session_store(config: Optional[SessionConfig] = None) -> SessionStore:
+    """Return the process-wide SessionStore, creating it on first use"""
+    global _default_store
+    if _default_store is None:
+        _default_store = SessionStore(config)
+    return _default_store
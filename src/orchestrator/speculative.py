@@ -0,0 +1,299 @@
+"""
+Speculative execution of tool calls while the model is still generating.
+
+Tools normally run only after the whole response has streamed in and been
+parsed. An incremental parser follows streamed tool-call fragments and, as
+soon as a call's argument object is complete, starts it on the tool pool if
+the tool is idempotent. When the response is final, each tool call first
+claims a matching speculative execution; calls without one run normally,
+and speculations the final response did not confirm are discarded.
+"""
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+from pydantic_ai.messages import PartDeltaEvent, PartStartEvent, ToolCallPart, ToolCallPartDelta
+import structlog
+from src.orchestrator.tool_executor import ToolExecutor, call_target
+
+logger = structlog.get_logger()
+
+# Tools that are safe to run before the model has committed to the call:
+# running them again (or needlessly) leaves the system in the same state
+SPECULATIVE_TOOLS = frozenset({'open_app'})
+
+# Number of lead-time samples kept for percentiles
+_MAX_SAMPLES = 500
+
+
+def call_key(name: str, arguments: Optional[Dict[str, Any]]) -> Tuple[str, str]:
+    """Identity of a tool call: name plus canonical JSON arguments"""
+    return name, json.dumps(arguments or {}, sort_keys=True, default=str)
+
+
+class _PartialCall:
+    """Fragments of one streamed tool call"""
+
+    def __init__(self):
+        self.name = ""
+        self.buffer = ""
+        self.depth = 0
+        self.started = False
+        self.in_string = False
+        self.escaped = False
+        self.emitted = False
+
+    def scan(self, fragment: str) -> bool:
+        """Append an arguments fragment; True once a top-level object has closed"""
+        self.buffer += fragment
+        for char in fragment:
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == '\\':
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char == '{':
+                self.depth += 1
+                self.started = True
+            elif char == '}':
+                self.depth -= 1
+                if self.started and self.depth == 0:
+                    return True
+        return False
+
+
+class IncrementalToolCallParser:
+    """
+    Reassembles streamed tool calls and reports each one as soon as its
+    arguments form a complete JSON object (before the response ends).
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, _PartialCall] = {}
+
+    def feed(
+        self,
+        key: Hashable,
+        name_delta: Optional[str] = None,
+        args_delta: Any = None,
+        start: bool = False,
+    ) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """
+        Add a fragment of the tool call identified by key.
+
+        Args:
+            key: Identity of the call within the stream (e.g. part index)
+            name_delta: Next piece of the tool name
+            args_delta: Next piece of the arguments (JSON text, or a complete dict)
+            start: True when this fragment starts a new call under key
+
+        Returns:
+            (name, arguments) the first time the call is complete, else None
+        """
+        if start or key not in self._calls:
+            self._calls[key] = _PartialCall()
+        call = self._calls[key]
+        if call.emitted:
+            return None
+        if name_delta:
+            call.name += name_delta
+
+        if isinstance(args_delta, dict):
+            arguments = args_delta
+        elif isinstance(args_delta, str) and args_delta and call.scan(args_delta):
+            try:
+                arguments = json.loads(call.buffer)
+            except json.JSONDecodeError:
+                return None
+            if not isinstance(arguments, dict):
+                return None
+        else:
+            return None
+
+        if not call.name:
+            return None
+        call.emitted = True
+        return call.name, arguments
+
+
+class SpeculationStats:
+    """Process-wide counters for speculative tool execution"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.started = 0
+        self.confirmed = 0
+        self.discarded = 0
+        self._lead_ms: List[float] = []
+
+    def record_started(self) -> None:
+        with self._lock:
+            self.started += 1
+
+    def record_discarded(self) -> None:
+        with self._lock:
+            self.discarded += 1
+
+    def record_confirmed(self, lead_ms: float) -> None:
+        with self._lock:
+            self.confirmed += 1
+            self._lead_ms.append(lead_ms)
+            if len(self._lead_ms) > _MAX_SAMPLES:
+                del self._lead_ms[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Speculations started/confirmed/discarded and how far ahead they started"""
+        with self._lock:
+            ordered = sorted(self._lead_ms)
+            return {
+                'started': self.started,
+                'confirmed': self.confirmed,
+                'discarded': self.discarded,
+                'lead_p50_ms': round(ordered[len(ordered) // 2], 1) if ordered else None,
+                'lead_max_ms': round(ordered[-1], 1) if ordered else None,
+            }
+
+
+_stats = SpeculationStats()
+
+
+def get_speculation_stats() -> SpeculationStats:
+    """Return the process-wide speculation counters"""
+    return _stats
+
+
+class SpeculativeRun:
+    """Speculative tool executions of one request"""
+
+    def __init__(
+        self,
+        execute: Callable[[str, Dict[str, Any]], Any],
+        executor: ToolExecutor,
+        tools: frozenset = SPECULATIVE_TOOLS,
+    ):
+        """
+        Args:
+            execute: Runs a tool by name with arguments (blocking; called on the pool)
+            executor: Tool executor whose pool and per-target locks the calls use
+            tools: Names of tools that may run speculatively
+        """
+        self.execute = execute
+        self.executor = executor
+        self.tools = tools
+        self.parser = IncrementalToolCallParser()
+        self._pending: Dict[Tuple[str, str], Tuple[Future, float]] = {}
+        self._lock = threading.Lock()
+
+    def start(self, name: str, arguments: Dict[str, Any]) -> bool:
+        """Start a complete tool call early if its tool is idempotent"""
+        if name not in self.tools:
+            return False
+        key = call_key(name, arguments)
+        with self._lock:
+            if key in self._pending:
+                return False
+            future = self.executor.submit(call_target(name, arguments), self.execute, name, arguments)
+            self._pending[key] = (future, time.perf_counter())
+        _stats.record_started()
+        logger.info("speculative_tool_started", tool=name, arguments=arguments)
+        return True
+
+    def observe(
+        self,
+        key: Hashable,
+        name_delta: Optional[str] = None,
+        args_delta: Any = None,
+        start: bool = False,
+    ) -> None:
+        """Feed a streamed tool-call fragment; starts the call once it is complete"""
+        complete = self.parser.feed(key, name_delta, args_delta, start)
+        if complete is not None:
+            self.start(*complete)
+
+    def claim(self, name: str, arguments: Optional[Dict[str, Any]]) -> Optional[Future]:
+        """
+        Take over the speculative execution matching a final tool call.
+
+        Returns:
+            The execution's future, or None when the call was not speculated
+        """
+        with self._lock:
+            entry = self._pending.pop(call_key(name, arguments), None)
+        if entry is None:
+            return None
+        future, started_at = entry
+        _stats.record_confirmed((time.perf_counter() - started_at) * 1000)
+        return future
+
+    async def resolve(
+        self,
+        tool_calls: List[Any],
+        run_remaining: Callable[[List[Any]], Awaitable[List[Any]]],
+    ) -> List[Any]:
+        """
+        Produce results for a turn's final Ollama tool calls, in order.
+
+        Call finish() once the whole turn is resolved.
+
+        Args:
+            tool_calls: Final tool calls of the turn
+            run_remaining: Executes the calls that were not speculated
+
+        Returns:
+            One result per tool call, in call order
+        """
+        claimed = [self.claim(tc.function.name, dict(tc.function.arguments or {})) for tc in tool_calls]
+        remaining = [tc for tc, future in zip(tool_calls, claimed) if future is None]
+        remaining_results = iter(await run_remaining(remaining) if remaining else [])
+        results = []
+        for future in claimed:
+            results.append(await asyncio.wrap_future(future) if future is not None else next(remaining_results))
+        return results
+
+    def finish(self) -> None:
+        """Discard speculations the final response did not confirm"""
+        with self._lock:
+            unconfirmed = list(self._pending.items())
+            self._pending.clear()
+        for (name, arguments), (future, _) in unconfirmed:
+            future.cancel()
+            _stats.record_discarded()
+            logger.warning("speculative_tool_discarded", tool=name, arguments=arguments)
+
+    def observe_event(self, event: Any) -> None:
+        """Feed one pydantic-ai stream event (tool-call parts are watched)"""
+        if isinstance(event, PartStartEvent) and isinstance(event.part, ToolCallPart):
+            self.observe(event.index, event.part.tool_name, event.part.args, start=True)
+        elif isinstance(event, PartDeltaEvent) and isinstance(event.delta, ToolCallPartDelta):
+            self.observe(event.index, event.delta.tool_name_delta, event.delta.args_delta)
+
+    async def handle_events(self, ctx: Any, events: Any) -> None:
+        """pydantic-ai event_stream_handler: watch streamed tool-call parts"""
+        async for event in events:
+            self.observe_event(event)
+
+
+def claim_or_run(deps: Any, name: str, arguments: Dict[str, Any], run: Callable[..., Any]) -> Any:
+    """
+    Tool body helper: reuse a speculative execution when the run has one.
+
+    Args:
+        deps: RunContext.deps of the agent run (a SpeculativeRun or None)
+        name: Tool name
+        arguments: Validated tool arguments
+        run: The tool implementation
+
+    Returns:
+        The tool result
+    """
+    if isinstance(deps, SpeculativeRun):
+        future = deps.claim(name, arguments)
+        if future is not None:
+            return future.result()
+    return run(**arguments)
@@ -0,0 +1,206 @@
+"""
+Adaptive reasoning ("think") budget per request.
+
+Thinking models spend hundreds of reasoning tokens even on "open Safari".
+The policy picks one of three levels per request from cheap signals:
+- off: thinking disabled, for messages the intent matcher recognizes
+- brief: thinking with a capped generation budget, the default
+- full: unbounded thinking, for multi-step or open-ended requests
+A failed turn (tool errors, empty answer) escalates to the next level. A
+level whose observed success rate drops too low is skipped. Latency and
+tool-call accuracy are tracked per level so the thresholds can be tuned.
+"""
+import re
+import threading
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+import structlog
+
+from src.orchestrator.intent_matcher import get_intent_matcher
+
+logger = structlog.get_logger()
+
+LEVELS = ['off', 'brief', 'full']
+
+# Number of latency samples kept per level for percentiles
+_MAX_SAMPLES = 500
+
+# Connectors that chain several actions in one request
+_STEP_SPLIT = re.compile(
+    r"\b(?:and|then|after|before|poi|dopo|después|luego|puis|ensuite|dann|danach)\b|[,;]",
+    re.IGNORECASE,
+)
+# Openers of questions that need reasoning rather than a single action
+_REASONING_WORDS = re.compile(
+    r"\b(?:why|how|which|compare|explain|perché|quale|por qué|cómo|pourquoi|comment|warum|wie)\b",
+    re.IGNORECASE,
+)
+
+
+class ThinkDecision(BaseModel):
+    """Reasoning settings for one request"""
+    level: str = Field(description="Policy level: off, brief or full")
+    think: bool = Field(description="Whether the model may think")
+    budget_tokens: Optional[int] = Field(default=None, description="Cap on generated tokens (None = unbounded)")
+    reason: str = Field(default="", description="Why this level was chosen")
+
+
+class _LevelStats:
+    def __init__(self):
+        self.requests = 0
+        self.successes = 0
+        self.escalations = 0
+        self.tool_calls = 0
+        self.tool_failures = 0
+        self.latencies_ms: List[float] = []
+
+
+class ThinkPolicy:
+    """Chooses and escalates reasoning levels and records their outcomes"""
+
+    def __init__(
+        self,
+        budget_tokens: int = 1024,
+        min_success_rate: float = 0.8,
+        min_samples: int = 10,
+        matcher: Any = None,
+    ):
+        """
+        Args:
+            budget_tokens: Generation cap for the 'brief' level
+            min_success_rate: Levels below this success rate are skipped
+            min_samples: Requests needed before a level's success rate counts
+            matcher: IntentMatcher (default: process-wide matcher)
+        """
+        self.budget_tokens = budget_tokens
+        self.min_success_rate = min_success_rate
+        self.min_samples = min_samples
+        self.matcher = matcher or get_intent_matcher()
+        self._stats: Dict[str, _LevelStats] = {level: _LevelStats() for level in LEVELS}
+        self._lock = threading.Lock()
+
+    def _decision(self, level: str, reason: str) -> ThinkDecision:
+        return ThinkDecision(
+            level=level,
+            think=level != 'off',
+            budget_tokens=self.budget_tokens if level == 'brief' else None,
+            reason=reason,
+        )
+
+    def classify(self, user_message: str) -> ThinkDecision:
+        """Pick a level from the message alone"""
+        match = self.matcher.match(user_message)
+        if match is not None and match.confidence >= 0.6:
+            return self._decision('off', f"intent {match.function_name} ({match.confidence:.2f})")
+        steps = len(_STEP_SPLIT.findall(user_message)) + 1
+        if steps >= 3 or _REASONING_WORDS.search(user_message) or len(user_message.split()) > 30:
+            return self._decision('full', f"complex request ({steps} steps)")
+        return self._decision('brief', f"{steps} step(s)")
+
+    def _success_rate(self, level: str) -> Optional[float]:
+        stats = self._stats[level]
+        if stats.requests < self.min_samples:
+            return None
+        return stats.successes / stats.requests
+
+    def decide(self, user_message: str) -> ThinkDecision:
+        """
+        Choose the reasoning level for a request.
+
+        Args:
+            user_message: Raw user message
+
+        Returns:
+            ThinkDecision to pass to the LLM call
+        """
+        decision = self.classify(user_message)
+        with self._lock:
+            while decision.level != LEVELS[-1]:
+                rate = self._success_rate(decision.level)
+                if rate is None or rate >= self.min_success_rate:
+                    break
+                decision = self._decision(
+                    LEVELS[LEVELS.index(decision.level) + 1],
+                    f"{decision.level} success rate {rate:.2f} below {self.min_success_rate}",
+                )
+        logger.info("think_policy_decision", level=decision.level, reason=decision.reason)
+        return decision
+
+    def escalate(self, decision: ThinkDecision, reason: str) -> Optional[ThinkDecision]:
+        """
+        Next level up after a failed turn.
+
+        Returns:
+            The escalated decision, or None when already at the top level
+        """
+        if decision.level == LEVELS[-1]:
+            return None
+        with self._lock:
+            self._stats[decision.level].escalations += 1
+        escalated = self._decision(LEVELS[LEVELS.index(decision.level) + 1], f"escalated: {reason}")
+        logger.info("think_policy_escalated", from_level=decision.level, to_level=escalated.level, reason=reason)
+        return escalated
+
+    def record(
+        self,
+        decision: ThinkDecision,
+        latency_ms: float,
+        tool_calls: int,
+        tool_failures: int,
+        success: bool,
+    ) -> None:
+        """
+        Record the outcome of a request under the level it started with.
+
+        Args:
+            decision: Initial decision of the request
+            latency_ms: End-to-end latency
+            tool_calls: Tool calls the model made
+            tool_failures: Tool calls that failed (bad arguments, errors)
+            success: Whether the request finished without escalation or failures
+        """
+        with self._lock:
+            stats = self._stats[decision.level]
+            stats.requests += 1
+            stats.successes += success
+            stats.tool_calls += tool_calls
+            stats.tool_failures += tool_failures
+            stats.latencies_ms.append(latency_ms)
+            if len(stats.latencies_ms) > _MAX_SAMPLES:
+                del stats.latencies_ms[0]
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-level request counts, success rate, latency and tool-call accuracy"""
+        with self._lock:
+            result = {}
+            for level, stats in self._stats.items():
+                ordered = sorted(stats.latencies_ms)
+
+                def percentile(q: float) -> Optional[float]:
+                    if not ordered:
+                        return None
+                    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 1)
+
+                result[level] = {
+                    'requests': stats.requests,
+                    'success_rate': round(stats.successes / stats.requests, 3) if stats.requests else None,
+                    'escalations': stats.escalations,
+                    'latency_p50_ms': percentile(0.5),
+                    'latency_p95_ms': percentile(0.95),
+                    'tool_calls': stats.tool_calls,
+                    'tool_call_accuracy': (
+                        round(1 - stats.tool_failures / stats.tool_calls, 3) if stats.tool_calls else None
+                    ),
+                }
+            return result
+
+
+_default_policy: Optional[ThinkPolicy] = None
+
+
+def get_think_policy(budget_tokens: int = 1024) -> ThinkPolicy:
+    """Return the process-wide ThinkPolicy, creating it on first use"""
+    global _default_policy
+    if _default_policy is None:
+        _default_policy = ThinkPolicy(budget_tokens=budget_tokens)
+    return _default_policy
@@ -0,0 +1,215 @@
+"""Concurrent execution of the tool calls requested in one LLM turn"""
+import asyncio
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from pydantic import ValidationError
+import structlog
+from src.agents.app_index import get_app_index
+
+logger = structlog.get_logger()
+
+
+def execute_tool_call(
+    tool_call: Any,
+    available_functions: Dict[str, Any],
+    registry: Optional[Any] = None
+) -> Dict[str, Any]:
+    """
+    Execute a single tool call requested by the LLM.
+
+    Args:
+        tool_call: Ollama tool call with function name and arguments
+        available_functions: Mapping of function names to callables
+        registry: Optional ToolRegistry whose cached validators check the arguments
+
+    Returns:
+        Tool message dict to append to the conversation history
+    """
+    function_name = tool_call.function.name
+    function_args = tool_call.function.arguments
+
+    if registry is not None and function_name in registry:
+        try:
+            function_args = registry.validate(function_name, function_args)
+        except ValidationError as ve:
+            logger.warning("tool_arguments_invalid", function=function_name, error=str(ve))
+            # Report back so the LLM can correct its arguments
+            return {
+                'role': 'tool',
+                'content': f"Invalid arguments for {function_name}: {ve.errors(include_url=False)}",
+                'tool_name': function_name
+            }
+
+    logger.info(
+        "executing_tool",
+        function=function_name,
+        arguments=function_args
+    )
+
+    # Get the function and execute it
+    if function_to_call := available_functions.get(function_name):
+        try:
+            # Execute the tool function
+            tool_result = function_to_call(**function_args)
+            logger.info(
+                "tool_executed",
+                function=function_name,
+                result_preview=str(tool_result)[:100]
+            )
+
+            return {
+                'role': 'tool',
+                'content': str(tool_result),
+                'tool_name': function_name
+            }
+
+        except Exception as tool_error:
+            error_msg = f"Error executing {function_name}: {str(tool_error)}"
+            logger.error("tool_execution_error", function=function_name, error=str(tool_error))
+
+            # Return error as tool result
+            return {
+                'role': 'tool',
+                'content': error_msg,
+                'tool_name': function_name
+            }
+    else:
+        logger.error("unknown_function", function=function_name)
+        return {
+            'role': 'tool',
+            'content': f"Unknown function: {function_name}",
+            'tool_name': function_name
+        }
+
+
+def call_target(name: str, arguments: Optional[Dict[str, Any]]) -> str:
+    """
+    Return the key that calls of tool name with arguments are serialized on.
+
+    Calls acting on the same application share a key, whatever name the
+    LLM used for it ("chrome", "Google Chrome.app"); calls without an app
+    argument are keyed by function name.
+    """
+    app_name = (arguments or {}).get('appName')
+    if isinstance(app_name, str) and app_name.strip():
+        # lookup() never refreshes the index, so this is safe on the event loop
+        resolved = get_app_index().lookup(app_name) or app_name.strip()
+        return f"app:{resolved.lower()}"
+    return f"fn:{name}"
+
+
+def tool_target(tool_call: Any) -> str:
+    """Return the key that an Ollama tool call must be serialized on"""
+    return call_target(tool_call.function.name, tool_call.function.arguments)
+
+
+class ToolExecutor:
+    """
+    Runs tool calls on a worker thread pool.
+
+    Calls in one turn are dispatched concurrently, except that calls on the
+    same target are serialized (in request order) by a per-target lock that
+    is also shared across concurrent requests. Results are returned in the
+    original call order.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        """
+        Args:
+            max_workers: Number of worker threads for blocking tool calls
+        """
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="baby-ai-tool")
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    def _lock_for(self, target: str) -> asyncio.Lock:
+        lock = self._locks.get(target)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[target] = lock
+        return lock
+
+    async def _run_one(
+        self,
+        tool_call: Any,
+        available_functions: Dict[str, Any],
+        registry: Optional[Any]
+    ) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        async with self._lock_for(tool_target(tool_call)):
+            return await loop.run_in_executor(
+                self._pool, execute_tool_call, tool_call, available_functions, registry
+            )
+
+    async def run(
+        self,
+        tool_calls: List[Any],
+        available_functions: Dict[str, Any],
+        registry: Optional[Any] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Execute all tool calls from one LLM turn.
+
+        Args:
+            tool_calls: Tool calls in the order the LLM returned them
+            available_functions: Mapping of function names to callables
+            registry: Optional ToolRegistry used to validate arguments
+
+        Returns:
+            Tool message dicts in the same order as tool_calls
+        """
+        if len(tool_calls) == 1:
+            return [await self._run_one(tool_calls[0], available_functions, registry)]
+
+        logger.info("tool_calls_dispatched", num_calls=len(tool_calls), max_workers=self.max_workers)
+        return list(await asyncio.gather(
+            *(self._run_one(tool_call, available_functions, registry) for tool_call in tool_calls)
+        ))
+
+    def submit(self, target: str, fn: Callable[..., Any], *args: Any) -> Future:
+        """
+        Run fn(*args) on the pool under target's lock (call from the event loop).
+
+        Used for speculative tool calls, so they are serialized with regular
+        calls on the same target.
+
+        Returns:
+            Future of the result, usable from the loop and from worker threads
+        """
+        loop = asyncio.get_running_loop()
+
+        async def locked() -> Any:
+            async with self._lock_for(target):
+                return await loop.run_in_executor(self._pool, fn, *args)
+
+        return asyncio.run_coroutine_threadsafe(locked(), loop)
+
+    @property
+    def pool(self) -> ThreadPoolExecutor:
+        """Worker pool of the tool calls"""
+        return self._pool
+
+    def shutdown(self) -> None:
+        """Stop the worker pool (waits for running tools to finish)"""
+        self._pool.shutdown(wait=True)
+
+
+_default_executor: Optional[ToolExecutor] = None
+
+
+def get_tool_executor(config: Optional[Any] = None) -> ToolExecutor:
+    """
+    Return the process-wide ToolExecutor, creating it on first use.
+
+    Args:
+        config: Optional OrchestratorConfig providing tool_max_workers
+
+    Returns:
+        Shared ToolExecutor instance
+    """
+    global _default_executor
+    if _default_executor is None:
+        max_workers = getattr(config, 'tool_max_workers', 4)
+        _default_executor = ToolExecutor(max_workers=max_workers)
+    return _default_executor
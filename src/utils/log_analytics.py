@@ -0,0 +1,470 @@
+"""
+Streaming analytics over the JSON log written by setup_logging.
+
+    python -m src.utils.log_analytics [--log-file logs/baby_ai.jsonl] [--json]
+
+The log is read line by line from the last processed byte offset, which is
+kept with the running aggregates in a small state file next to the log, so
+each run only parses what was appended since the previous one (a rotated
+log is finished from its .1.gz before the new file is read). Lines are
+matched against the few events the report needs before any JSON parsing.
+
+Requests are joined from their start event to their completion, error,
+fast-path or plan-cache hit event by conversation_id; agent runs are
+summarized by their agent_run_finished line (step_id, LLM calls, TTFT,
+tool outcomes).
+Memory stays bounded whatever the log size: latencies go into fixed
+log-scale histograms, unfinished requests into a capped LRU and only the
+top-N slowest requests are kept.
+"""
+import argparse
+import gzip
+import heapq
+import json
+import math
+import os
+import re
+import sys
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from src.utils.logger import LOG_FILE_PATH
+
+STATE_VERSION = 1
+
+# Start events and whether they begin a streaming request
+START_EVENTS = {
+    'pydantic_agent_start': False,
+    'pydantic_agent_streaming_start': True,
+    'orchestrator_start': False,
+    'orchestrator_streaming_start': True,
+}
+# Events that finish a request, with its outcome
+END_EVENTS = {
+    'pydantic_agent_complete': 'completed',
+    'pydantic_agent_streaming_complete': 'completed',
+    'orchestration_complete': 'completed',
+    'orchestration_streaming_complete': 'completed',
+    'pydantic_agent_error': 'error',
+    'pydantic_agent_streaming_error': 'error',
+    'orchestration_error': 'error',
+    'orchestration_streaming_error': 'error',
+    # Requests answered without the LLM log only these after their start event
+    'fast_path_hit': 'completed',
+    'plan_cache_hit': 'completed',
+}
+RUN_EVENT = 'agent_run_finished'
+CANCEL_EVENT = 'agent_run_cancelled'
+
+# structlog's JSONRenderer writes '"event": "<name>"'; quotes inside string
+# values are escaped, so this cannot match message text
+_EVENT_PATTERN = re.compile(
+    rb'"event": "(?:'
+    + b"|".join(re.escape(name.encode()) for name in (*START_EVENTS, *END_EVENTS, RUN_EVENT, CANCEL_EVENT))
+    + rb')"'
+)
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+class LogHistogram:
+    """
+    Fixed-size histogram with log-scale buckets: percentiles are accurate
+    to within `growth` (2% by default) and memory does not grow with the
+    number of samples.
+    """
+
+    def __init__(self, growth: float = 1.02):
+        self.growth = growth
+        self._log_growth = math.log(growth)
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        index = math.ceil(math.log(value) / self._log_growth) if value > 0.01 else -1000
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, pct: float) -> Optional[float]:
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(self.count * pct / 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self.growth ** index, self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        result: Dict[str, Any] = {'count': self.count}
+        if self.count:
+            result['mean'] = round(self.total / self.count, 1)
+            for pct in PERCENTILES:
+                result[f'p{pct}'] = round(self.percentile(pct), 1)
+            result['max'] = round(self.max, 1)
+        return result
+
+    def to_state(self) -> Dict[str, Any]:
+        return {
+            'growth': self.growth,
+            'counts': {str(index): count for index, count in self.counts.items()},
+            'count': self.count,
+            'total': self.total,
+            'max': self.max,
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any]) -> "LogHistogram":
+        histogram = cls(state['growth'])
+        histogram.counts = {int(index): count for index, count in state['counts'].items()}
+        histogram.count = state['count']
+        histogram.total = state['total']
+        histogram.max = state['max']
+        return histogram
+
+
+def _timestamp(record: Dict[str, Any]) -> Optional[float]:
+    value = record.get('timestamp')
+    if not isinstance(value, str):
+        return None
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        return None
+
+
+class LogAnalytics:
+    """Running aggregates over log records (serializable to resume later)"""
+
+    def __init__(self, top: int = 10, max_pending: int = 10000):
+        """
+        Args:
+            top: Number of slowest requests to keep
+            max_pending: Started requests awaiting their end event (oldest dropped beyond this)
+        """
+        self.top = top
+        self.max_pending = max_pending
+        # conversation_id -> [started_at, stream, timestamp]
+        self.pending: "OrderedDict[str, List[Any]]" = OrderedDict()
+        self.latency = {'all': LogHistogram(), 'stream': LogHistogram(), 'non_stream': LogHistogram()}
+        self.outcomes: Dict[str, int] = {}
+        self.unmatched = 0
+        self.slowest: List[Tuple[float, int, Dict[str, Any]]] = []
+        self.runs = 0
+        self.run_outcomes: Dict[str, int] = {}
+        self.iterations: Dict[int, int] = {}
+        self.ttft = LogHistogram()
+        self.run_duration = LogHistogram()
+        self.tools: Dict[str, List[int]] = {}
+        self.cancelled: Dict[str, int] = {}
+
+    def feed(self, record: Dict[str, Any]) -> None:
+        """Account for one log record"""
+        event = record.get('event')
+        if event in START_EVENTS:
+            self._start(record, START_EVENTS[event])
+        elif event in END_EVENTS:
+            self._end(record, END_EVENTS[event])
+        elif event == RUN_EVENT:
+            self._run(record)
+        elif event == CANCEL_EVENT:
+            reason = str(record.get('reason'))
+            self.cancelled[reason] = self.cancelled.get(reason, 0) + 1
+
+    def _start(self, record: Dict[str, Any], stream: bool) -> None:
+        conversation_id, started_at = record.get('conversation_id'), _timestamp(record)
+        if conversation_id is None or started_at is None:
+            return
+        if self.pending.pop(conversation_id, None) is not None:
+            # The previous request of this conversation never logged an end
+            self.unmatched += 1
+        self.pending[conversation_id] = [started_at, stream, record['timestamp']]
+        if len(self.pending) > self.max_pending:
+            self.pending.popitem(last=False)
+            self.unmatched += 1
+
+    def _end(self, record: Dict[str, Any], outcome: str) -> None:
+        start = self.pending.pop(record.get('conversation_id'), None)
+        ended_at = _timestamp(record)
+        if start is None or ended_at is None:
+            return
+        started_at, stream, started = start
+        latency_ms = max(0.0, (ended_at - started_at) * 1000)
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        if outcome == 'completed':
+            self.latency['all'].add(latency_ms)
+            self.latency['stream' if stream else 'non_stream'].add(latency_ms)
+        # The running request count breaks ties between equal latencies
+        entry = (latency_ms, sum(self.outcomes.values()), {
+            'latency_ms': round(latency_ms, 1),
+            'conversation_id': record.get('conversation_id'),
+            'step_id': record.get('step_id'),
+            'started': started,
+            'stream': stream,
+            'outcome': outcome,
+        })
+        if len(self.slowest) < self.top:
+            heapq.heappush(self.slowest, entry)
+        elif self.slowest and entry[:2] > self.slowest[0][:2]:
+            heapq.heapreplace(self.slowest, entry)
+
+    def _run(self, record: Dict[str, Any]) -> None:
+        self.runs += 1
+        outcome = str(record.get('outcome', 'completed'))
+        self.run_outcomes[outcome] = self.run_outcomes.get(outcome, 0) + 1
+        llm_calls = record.get('llm_calls')
+        if isinstance(llm_calls, int):
+            self.iterations[llm_calls] = self.iterations.get(llm_calls, 0) + 1
+        if isinstance(record.get('ttft_ms'), (int, float)):
+            self.ttft.add(record['ttft_ms'])
+        if isinstance(record.get('duration_ms'), (int, float)):
+            self.run_duration.add(record['duration_ms'])
+        for tool, (calls, failures) in (record.get('tools') or {}).items():
+            counts = self.tools.setdefault(tool, [0, 0])
+            counts[0] += calls
+            counts[1] += failures
+        if outcome != 'completed' and record.get('conversation_id') in self.pending:
+            # Cancelled and failed runs may not log a completion event
+            self._end(record, outcome)
+
+    def report(self) -> Dict[str, Any]:
+        runs_with_calls = sum(self.iterations.values())
+        return {
+            'requests': {
+                'outcomes': dict(self.outcomes),
+                'latency_ms': {name: histogram.summary() for name, histogram in self.latency.items()},
+                'unfinished': len(self.pending),
+                'unmatched': self.unmatched,
+            },
+            'runs': {
+                'count': self.runs,
+                'outcomes': dict(self.run_outcomes),
+                'cancelled': dict(self.cancelled),
+                'duration_ms': self.run_duration.summary(),
+                'ttft_ms': self.ttft.summary(),
+                'iterations': {
+                    'mean': round(sum(n * c for n, c in self.iterations.items()) / runs_with_calls, 2)
+                    if runs_with_calls else None,
+                    'max': max(self.iterations) if self.iterations else None,
+                    'distribution': {str(n): self.iterations[n] for n in sorted(self.iterations)},
+                },
+            },
+            'tools': {
+                tool: {'calls': calls, 'failures': failures, 'failure_rate': round(failures / calls, 4) if calls else 0.0}
+                for tool, (calls, failures) in sorted(self.tools.items())
+            },
+            'slowest': [entry[2] for entry in sorted(self.slowest, reverse=True)],
+        }
+
+    def to_state(self) -> Dict[str, Any]:
+        return {
+            'pending': [[key, *value] for key, value in self.pending.items()],
+            'latency': {name: histogram.to_state() for name, histogram in self.latency.items()},
+            'outcomes': self.outcomes,
+            'unmatched': self.unmatched,
+            'slowest': [list(entry) for entry in self.slowest],
+            'runs': self.runs,
+            'run_outcomes': self.run_outcomes,
+            'iterations': {str(n): count for n, count in self.iterations.items()},
+            'ttft': self.ttft.to_state(),
+            'run_duration': self.run_duration.to_state(),
+            'tools': self.tools,
+            'cancelled': self.cancelled,
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any], top: int = 10, max_pending: int = 10000) -> "LogAnalytics":
+        analytics = cls(top, max_pending)
+        analytics.pending = OrderedDict((key, value) for key, *value in state['pending'])
+        analytics.latency = {name: LogHistogram.from_state(h) for name, h in state['latency'].items()}
+        analytics.outcomes = state['outcomes']
+        analytics.unmatched = state['unmatched']
+        analytics.slowest = [tuple(entry) for entry in state['slowest']]
+        heapq.heapify(analytics.slowest)
+        while len(analytics.slowest) > top:
+            heapq.heappop(analytics.slowest)
+        analytics.runs = state['runs']
+        analytics.run_outcomes = state['run_outcomes']
+        analytics.iterations = {int(n): count for n, count in state['iterations'].items()}
+        analytics.ttft = LogHistogram.from_state(state['ttft'])
+        analytics.run_duration = LogHistogram.from_state(state['run_duration'])
+        analytics.tools = state['tools']
+        analytics.cancelled = state['cancelled']
+        return analytics
+
+
+def _open(path: str) -> BinaryIO:
+    return gzip.open(path, 'rb') if path.endswith('.gz') else open(path, 'rb')
+
+
+def read_records(stream: BinaryIO, stats: Dict[str, int]) -> Iterator[Dict[str, Any]]:
+    """
+    Parse the relevant records of a log stream positioned at a line start.
+
+    stats['offset'] advances past every complete line; a trailing line
+    still being written is left for the next run.
+    """
+    for line in stream:
+        if not line.endswith(b"\n"):
+            break
+        stats['offset'] += len(line)
+        stats['lines'] += 1
+        if not _EVENT_PATTERN.search(line):
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            stats['malformed'] += 1
+            continue
+        if isinstance(record, dict):
+            yield record
+
+
+def _load_state(state_file: Optional[str]) -> Optional[Dict[str, Any]]:
+    if not state_file or not os.path.exists(state_file):
+        return None
+    with open(state_file, encoding='utf-8') as f:
+        state = json.load(f)
+    return state if state.get('version') == STATE_VERSION else None
+
+
+def _save_state(state_file: str, state: Dict[str, Any]) -> None:
+    tmp_path = state_file + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, state_file)
+
+
+def analyze(
+    log_file: str = LOG_FILE_PATH,
+    state_file: Optional[str] = None,
+    top: int = 10,
+    max_pending: int = 10000,
+) -> Dict[str, Any]:
+    """
+    Process the log from where the previous run stopped and report.
+
+    Args:
+        log_file: JSON-lines log (plain or .gz)
+        state_file: Offset and aggregates of earlier runs (None: full one-shot scan)
+        top: Number of slowest requests to report
+        max_pending: Bound on started requests awaiting their end event
+
+    Returns:
+        Report dict (requests, runs, tools, slowest, plus what this run read)
+    """
+    state = _load_state(state_file)
+    file_id = os.stat(log_file).st_ino
+    offset = 0
+    analytics = LogAnalytics(top, max_pending)
+    stats = {'offset': 0, 'lines': 0, 'malformed': 0}
+    rotated = False
+    if state is not None:
+        analytics = LogAnalytics.from_state(state['analytics'], top, max_pending)
+        offset = state['offset']
+        if state['inode'] != file_id or os.path.getsize(log_file) < offset:
+            # Rotated since the last run: finish the old file from its backup
+            rotated = True
+            backup = next((p for p in (log_file + '.1.gz', log_file + '.1') if os.path.exists(p)), None)
+            if backup is not None:
+                with _open(backup) as stream:
+                    stream.seek(offset)
+                    stats['offset'] = offset
+                    for record in read_records(stream, stats):
+                        analytics.feed(record)
+            offset = 0
+
+    stats['offset'] = offset
+    with _open(log_file) as stream:
+        stream.seek(offset)
+        for record in read_records(stream, stats):
+            analytics.feed(record)
+
+    if state_file:
+        _save_state(state_file, {
+            'version': STATE_VERSION,
+            'log_file': os.path.abspath(log_file),
+            'inode': file_id,
+            'offset': stats['offset'],
+            'analytics': analytics.to_state(),
+        })
+
+    return {
+        'log_file': log_file,
+        'read': {
+            'resumed_from': offset,
+            'rotated': rotated,
+            'offset': stats['offset'],
+            'lines': stats['lines'],
+            'malformed': stats['malformed'],
+        },
+        **analytics.report(),
+    }
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Human-readable summary of an analyze() report"""
+    read = report['read']
+    requests, runs = report['requests'], report['runs']
+    lines = [
+        f"{report['log_file']}: {read['lines']} new lines (from byte {read['resumed_from']}"
+        f"{', after rotation' if read['rotated'] else ''})",
+        "",
+        f"Requests: {requests['outcomes'] or 'none'}, {requests['unfinished']} unfinished",
+    ]
+    for name, summary in requests['latency_ms'].items():
+        if summary['count']:
+            pcts = "  ".join(f"p{pct}={summary[f'p{pct}']}" for pct in PERCENTILES)
+            lines.append(f"  latency {name:<10} n={summary['count']:<6} {pcts}  max={summary['max']} ms")
+    lines.append(f"Agent runs: {runs['count']} {runs['outcomes'] or ''}  cancelled: {runs['cancelled'] or 0}")
+    if runs['ttft_ms']['count']:
+        lines.append(f"  TTFT p50={runs['ttft_ms']['p50']} p99={runs['ttft_ms']['p99']} ms")
+    if runs['iterations']['mean'] is not None:
+        lines.append(
+            f"  LLM calls per run: mean={runs['iterations']['mean']} max={runs['iterations']['max']}"
+            f"  {runs['iterations']['distribution']}"
+        )
+    if report['tools']:
+        lines.append("Tools:")
+        for tool, counts in report['tools'].items():
+            lines.append(f"  {tool:<24} {counts['calls']:>6} calls  {counts['failure_rate']:.1%} failed")
+    if report['slowest']:
+        lines.append("Slowest requests:")
+        for entry in report['slowest']:
+            lines.append(
+                f"  {entry['latency_ms']:>10} ms  {entry['started']}  step={entry['step_id']}"
+                f"  {'stream' if entry['stream'] else 'non-stream'}  {entry['outcome']}"
+            )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Latency, tool and iteration statistics from the Baby AI JSON log")
+    parser.add_argument("--log-file", default=LOG_FILE_PATH)
+    parser.add_argument("--state", help="Resume state file (default: <log>.analytics.json)")
+    parser.add_argument("--no-state", action="store_true", help="Scan the whole log without resuming or saving")
+    parser.add_argument("--reset", action="store_true", help="Discard saved state and start over")
+    parser.add_argument("--top", type=int, default=10, help="Slowest requests to list")
+    parser.add_argument("--max-pending", type=int, default=10000, help="Unfinished requests tracked at once")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args(argv)
+
+    state_file = None if args.no_state else (args.state or os.path.splitext(args.log_file)[0] + ".analytics.json")
+    if args.reset and state_file and os.path.exists(state_file):
+        os.remove(state_file)
+    if not os.path.exists(args.log_file):
+        print(f"No log file at {args.log_file}", file=sys.stderr)
+        return 1
+    report = analyze(args.log_file, state_file, args.top, args.max_pending)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,18 @@
 """Structured logging setup for Baby AI"""
 import structlog
+import atexit
+import gzip
 import logging
-import sys
+import logging.handlers
 import os
+import queue
+import shutil
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional, TextIO
+
+from src.models.config import LoggingConfig
 
 # Define a log directory and ensure it exists
 LOG_DIR = "logs"
@@ -11,12 +21,143 @@ if not os.path.exists(LOG_DIR):
 
 LOG_FILE_PATH = os.path.join(LOG_DIR, "baby_ai.jsonl")
 
+# Background writer of the queued pipeline (replaced on every setup_logging call)
+_listener: Optional["_DrainingQueueListener"] = None
+_queue_handler: Optional["NonBlockingQueueHandler"] = None
+
+
+class CompressingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    Rotates when the file reaches max_bytes or gets older than max_age_seconds.
+    Rotated files are gzip-compressed (baby_ai.jsonl.1.gz, .2.gz, ...).
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        max_bytes: int,
+        backup_count: int,
+        max_age_seconds: Optional[float] = None,
+        compress: bool = True,
+    ):
+        super().__init__(filename, mode="a", maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        self.max_age_seconds = max_age_seconds
+        self.opened_at = time.time()
+        if compress:
+            self.namer = lambda name: name + ".gz"
+            self.rotator = self._compress
+
+    @staticmethod
+    def _compress(source: str, dest: str) -> None:
+        with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(source)
 
-def setup_logging(log_level: str = "INFO"):
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.max_age_seconds is not None and time.time() - self.opened_at >= self.max_age_seconds:
+            return True
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self) -> None:
+        super().doRollover()
+        self.opened_at = time.time()
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the writer thread without doing any I/O on the caller.
+
+    When the queue is full, records are dropped ('drop') or the caller waits
+    up to block_timeout_ms for space ('block'). ERROR and above always get
+    that grace before being dropped. Drops are counted and reported once
+    space is available again.
+    """
+
+    def __init__(self, record_queue: "queue.Queue[Any]", overflow: str = "drop", block_timeout_ms: float = 50.0):
+        super().__init__(record_queue)
+        self.overflow = overflow
+        self.block_timeout = block_timeout_ms / 1000
+        self.dropped = 0
+        self._unreported = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Rendering happens on the writer thread (structlog keeps the event
+        # dict in record.msg for ProcessorFormatter)
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            if self.overflow == "block" or record.levelno >= logging.ERROR:
+                self.queue.put(record, timeout=self.block_timeout)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                self._unreported += 1
+            return
+        if self._unreported:
+            with self._lock:
+                unreported, self._unreported = self._unreported, 0
+            structlog.get_logger("baby_ai").warning("log_records_dropped", dropped=unreported, total_dropped=self.dropped)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'queued': self.queue.qsize(),
+            'capacity': self.queue.maxsize,
+            'overflow': self.overflow,
+            'dropped': self.dropped,
+        }
+
+
+class _DrainingQueueListener(logging.handlers.QueueListener):
+    """QueueListener whose stop() waits for queue space instead of failing when full"""
+
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
+
+def logging_stats() -> Dict[str, Any]:
+    """Queue depth and dropped records of the log pipeline"""
+    if _queue_handler is None:
+        return {'mode': 'sync'}
+    return {'mode': 'queued', **_queue_handler.stats()}
+
+
+def _stop_listener() -> None:
+    global _listener, _queue_handler
+    if _listener is not None:
+        # Drains the queue before returning
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+    _listener = None
+    _queue_handler = None
+
+
+def setup_logging(
+    log_level: str = "INFO",
+    config: Optional[LoggingConfig] = None,
+    log_file: str = LOG_FILE_PATH,
+    console_stream: Optional[TextIO] = None,
+):
     """
     Configure structured logging to output to both console and a file.
     This setup is robust and safe for hot-reloading environments like Uvicorn.
+
+    With config.queued (the default) the root logger only enqueues records;
+    a background thread renders and writes them, so log calls on the event
+    loop never wait for the disk or the terminal.
+
+    Args:
+        log_level: Root log level
+        config: Pipeline settings (queueing, rotation, compression)
+        log_file: JSON log file
+        console_stream: Console output (default: stdout)
     """
+    config = config or LoggingConfig()
+
     # Shared processors for consistent log structure
     shared_processors = [
         structlog.stdlib.filter_by_level,
@@ -51,11 +192,17 @@ def setup_logging(log_level: str = "INFO"):
 
     # --- Handler Definitions ---
     # Console handler
-    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler = logging.StreamHandler(console_stream or sys.stdout)
     console_handler.setFormatter(console_formatter)
 
-    # File handler (mode 'a' for appending)
-    file_handler = logging.FileHandler(LOG_FILE_PATH, mode="a", encoding="utf-8")
+    # File handler (appends; rotated by size and age, old files gzipped)
+    file_handler = CompressingRotatingFileHandler(
+        log_file,
+        max_bytes=config.max_bytes,
+        backup_count=config.backup_count,
+        max_age_seconds=config.max_age_seconds,
+        compress=config.compress,
+    )
     file_handler.setFormatter(file_formatter)
 
     # --- Root Logger Configuration ---
@@ -65,11 +212,32 @@ def setup_logging(log_level: str = "INFO"):
     # Clear any existing handlers to prevent duplicate log entries
     if root_logger.hasHandlers():
         root_logger.handlers.clear()
+    _stop_listener()
 
     # Add the configured handlers
-    root_logger.addHandler(console_handler)
-    root_logger.addHandler(file_handler)
+    if config.queued:
+        global _listener, _queue_handler
+        _queue_handler = NonBlockingQueueHandler(
+            queue.Queue(maxsize=config.queue_size), config.overflow, config.block_timeout_ms
+        )
+        _listener = _DrainingQueueListener(
+            _queue_handler.queue, console_handler, file_handler, respect_handler_level=True
+        )
+        _listener.start()
+        root_logger.addHandler(_queue_handler)
+    else:
+        root_logger.addHandler(console_handler)
+        root_logger.addHandler(file_handler)
     root_logger.setLevel(log_level.upper())
 
     logger = structlog.get_logger("baby_ai")
-    logger.info("Logging configured successfully", console_output=True, file_output=LOG_FILE_PATH)
+    logger.info(
+        "Logging configured successfully",
+        console_output=True,
+        file_output=log_file,
+        queued=config.queued,
+    )
+
+
+# Flush queued records on interpreter exit
+atexit.register(_stop_listener)
@@ -0,0 +1,139 @@
+"""
+Low-overhead NDJSON encoding for the chat stream.
+
+Chunks are serialized straight to UTF-8 bytes with one shared, pre-built
+JSON encoder (no model_dump, no per-chunk json.dumps setup), and text
+deltas skip ChatChunk entirely. coalesce_frames() then batches consecutive
+delta lines into one HTTP write per time window or size threshold, while
+meta/final and lifecycle chunks are flushed immediately. The stream can
+also be ended early by a stop condition such as a client disconnect.
+"""
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Union
+
+from src.models.schemas import ChatChunk
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), check_circular=False)
+_encode = _encoder.encode
+
+# Every delta frame starts with these bytes ("type" is always the first key)
+DELTA_PREFIX = b'{"type":"delta","content":'
+
+# Queue markers for the end of the upstream stream and for an early stop
+_END = object()
+_STOP = object()
+
+
+class _Failure:
+    """Upstream exception carried through the frame queue"""
+
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+def encode_chunk(chunk: Union[ChatChunk, Dict[str, Any]]) -> bytes:
+    """Serialize a chunk (fields that are None are omitted) as one NDJSON line"""
+    fields = chunk if isinstance(chunk, dict) else chunk.__dict__
+    return (_encode({k: v for k, v in fields.items() if v is not None}) + "\n").encode()
+
+
+def encode_delta(content: str) -> bytes:
+    """Serialize a text delta without building a ChatChunk"""
+    return DELTA_PREFIX + (_encode(content) + "}\n").encode()
+
+
+async def coalesce_frames(
+    frames: AsyncIterator[Union[bytes, str]],
+    interval_ms: float = 25.0,
+    max_bytes: int = 4096,
+    stop_when: Optional[Callable[[], Awaitable[Any]]] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Batch delta lines into one write per interval or size threshold.
+
+    Non-delta lines (meta, phase, tool, final) flush pending deltas and are
+    written immediately. A pending batch is also flushed when the upstream
+    stays quiet for the rest of the window, so text is never held back
+    longer than interval_ms.
+
+    Args:
+        frames: NDJSON lines (bytes or str)
+        interval_ms: Maximum time a delta waits before being written
+        max_bytes: Flush as soon as the pending batch reaches this size
+        stop_when: Coroutine factory; the stream ends (and upstream is
+            cancelled) as soon as it returns, e.g. on client disconnect
+
+    Yields:
+        Byte frames, each holding one or more complete NDJSON lines
+    """
+    interval = interval_ms / 1000
+    queue: "asyncio.Queue[Any]" = asyncio.Queue()
+
+    async def pump() -> None:
+        # One task drives the upstream so its cancel scopes stay in one task
+        try:
+            async for frame in frames:
+                queue.put_nowait(frame)
+            queue.put_nowait(_END)
+        except Exception as e:
+            queue.put_nowait(_Failure(e))
+
+    async def watch() -> None:
+        await stop_when()
+        queue.put_nowait(_STOP)
+
+    pump_task = asyncio.create_task(pump())
+    watch_task = asyncio.create_task(watch()) if stop_when is not None else None
+    pending: List[bytes] = []
+    pending_size = 0
+    window_start = 0.0
+    try:
+        while True:
+            if pending:
+                timeout = max(0.0, window_start + interval - time.perf_counter())
+                try:
+                    frame = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    # Window elapsed while upstream was idle
+                    yield b"".join(pending)
+                    pending, pending_size = [], 0
+                    continue
+            else:
+                frame = await queue.get()
+
+            if frame is _END:
+                break
+            if frame is _STOP:
+                # Nobody is reading: drop the pending batch
+                return
+            if isinstance(frame, _Failure):
+                if pending:
+                    yield b"".join(pending)
+                raise frame.error
+            if isinstance(frame, str):
+                frame = frame.encode()
+
+            if frame.startswith(DELTA_PREFIX):
+                if not pending:
+                    window_start = time.perf_counter()
+                pending.append(frame)
+                pending_size += len(frame)
+                if pending_size >= max_bytes or time.perf_counter() - window_start >= interval:
+                    yield b"".join(pending)
+                    pending, pending_size = [], 0
+            else:
+                pending.append(frame)
+                yield b"".join(pending)
+                pending, pending_size = [], 0
+        if pending:
+            yield b"".join(pending)
+    finally:
+        if watch_task is not None and not watch_task.done():
+            watch_task.cancel()
+            await asyncio.gather(watch_task, return_exceptions=True)
+        if not pump_task.done():
+            # The reader went away: stop producing
+            pump_task.cancel()
+            await asyncio.gather(pump_task, return_exceptions=True)
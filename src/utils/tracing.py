@@ -0,0 +1,261 @@
+"""
+Per-request stage timing with OpenTelemetry spans.
+
+Each chat request gets a root span; under it the agent run records one
+span per LLM call (with time-to-first-token), one span per tool execution
+and the time spent encoding stream chunks. Spans are exported to a local
+JSON-lines file or the console, no collector needed. The same stage
+timings feed the /metrics histograms whether or not a run is sampled,
+and every run ends with one "agent_run_finished" log line summarizing
+them (read back by src.utils.log_analytics).
+
+Tracing is off unless a sample ratio above zero is configured. When off,
+no SDK provider is installed: spans come from the OpenTelemetry API's
+no-op tracer and RunTrace only keeps its perf_counter timings.
+"""
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from opentelemetry import trace
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import (
+    BatchSpanProcessor,
+    ConsoleSpanExporter,
+    SpanExporter,
+    SpanExportResult,
+)
+from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
+from pydantic_ai import AgentRunResultEvent, FunctionToolCallEvent, FunctionToolResultEvent, PartDeltaEvent, PartStartEvent
+from pydantic_ai.messages import ToolReturnPart
+import structlog
+
+from src.models.config import TracingConfig
+from src.orchestrator.plan_cache import is_successful_result
+from src.utils import metrics
+
+logger = structlog.get_logger()
+
+_tracer: trace.Tracer = trace.NoOpTracer()
+_provider: Optional[TracerProvider] = None
+
+
+class JsonFileSpanExporter(SpanExporter):
+    """Appends finished spans to a file, one JSON object per line"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        for span in spans:
+            self._file.write(span.to_json(indent=None) + "\n")
+        self._file.flush()
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        self._file.close()
+
+
+def setup_tracing(config: TracingConfig, exporter: Optional[SpanExporter] = None) -> bool:
+    """
+    Install the span pipeline when sampling is enabled.
+
+    Args:
+        config: Sampling ratio and exporter choice
+        exporter: Explicit exporter (overrides config.exporter)
+
+    Returns:
+        True when spans are being recorded
+    """
+    global _tracer, _provider
+    shutdown_tracing()
+    if config.sample_ratio <= 0:
+        return False
+    if exporter is None:
+        exporter = JsonFileSpanExporter(config.file_path) if config.exporter == "file" else ConsoleSpanExporter()
+    _provider = TracerProvider(sampler=ParentBased(TraceIdRatioBased(config.sample_ratio)))
+    _provider.add_span_processor(BatchSpanProcessor(exporter))
+    _tracer = _provider.get_tracer("baby_ai")
+    logger.info("tracing_enabled", sample_ratio=config.sample_ratio, exporter=type(exporter).__name__)
+    return True
+
+
+def shutdown_tracing() -> None:
+    """Flush pending spans and go back to the no-op tracer"""
+    global _tracer, _provider
+    if _provider is not None:
+        _provider.shutdown()
+    _provider = None
+    _tracer = trace.NoOpTracer()
+
+
+def get_tracer() -> trace.Tracer:
+    """Tracer of the current pipeline (no-op while tracing is off)"""
+    return _tracer
+
+
+class RunTrace:
+    """
+    Stage timing of one agent run: LLM calls, time-to-first-token, tools
+    and stream encoding. Driven explicitly (legacy loop) or from
+    pydantic-ai agent events via observe().
+
+    Stage durations always feed the /metrics histograms; spans are only
+    created when the run is sampled.
+    """
+
+    def __init__(self, name: str, **attributes: Any):
+        self.attributes = attributes
+        self.started_at = time.perf_counter()
+        self.span = _tracer.start_span(name, attributes=attributes)
+        self.recording = self.span.is_recording()
+        self._context = trace.set_span_in_context(self.span) if self.recording else None
+        self._llm: Optional[trace.Span] = None
+        self._llm_start: Optional[float] = None
+        self._first_token_at: Optional[float] = None
+        self._tools: Dict[str, Tuple[str, float, Optional[trace.Span]]] = {}
+        self._ended = False
+        self.ttft_ms: Optional[float] = None
+        self.tool_outcomes: Dict[str, List[int]] = {}
+        self.llm_calls = 0
+        self.output_tokens = 0
+        self.generation_seconds = 0.0
+        self.encode_seconds = 0.0
+
+    def llm_start(self, **attributes: Any) -> None:
+        self.llm_end()
+        self.llm_calls += 1
+        self._llm_start = time.perf_counter()
+        self._first_token_at = None
+        if self.recording:
+            self._llm = _tracer.start_span(
+                "llm.call", context=self._context, attributes={'iteration': self.llm_calls, **attributes}
+            )
+
+    def first_token(self) -> None:
+        if self._llm_start is None or self._first_token_at is not None:
+            return
+        self._first_token_at = time.perf_counter()
+        ttft = self._first_token_at - self._llm_start
+        metrics.TTFT.observe(ttft)
+        if self.ttft_ms is None:
+            self.ttft_ms = round(ttft * 1000, 2)
+        if self._llm is not None:
+            self._llm.set_attribute('ttft_ms', round(ttft * 1000, 2))
+            self._llm.add_event('first_token')
+
+    def llm_end(self, output_tokens: Optional[int] = None, **attributes: Any) -> None:
+        if self._llm_start is None:
+            return
+        now = time.perf_counter()
+        metrics.LLM_CALL_LATENCY.observe(now - self._llm_start)
+        if self._first_token_at is not None:
+            self.generation_seconds += now - self._first_token_at
+        if output_tokens:
+            self.output_tokens += output_tokens
+        self._llm_start = None
+        if self._llm is not None:
+            self._llm.set_attributes(attributes)
+            self._llm.end()
+            self._llm = None
+
+    def tool_start(self, call_id: str, name: str) -> None:
+        span = (
+            _tracer.start_span("tool.execute", context=self._context, attributes={'tool': name})
+            if self.recording else None
+        )
+        self._tools[call_id] = (name, time.perf_counter(), span)
+
+    def tool_end(self, call_id: str, success: bool) -> None:
+        entry = self._tools.pop(call_id, None)
+        if entry is None:
+            return
+        name, started_at, span = entry
+        outcome = 'true' if success else 'false'
+        metrics.TOOL_LATENCY.observe(time.perf_counter() - started_at, tool=name, success=outcome)
+        metrics.TOOL_CALLS.inc(tool=name, success=outcome)
+        # [calls, failures] per tool for the run summary
+        counts = self.tool_outcomes.setdefault(name, [0, 0])
+        counts[0] += 1
+        counts[1] += not success
+        if span is not None:
+            span.set_attribute('success', success)
+            span.end()
+
+    def encoded(self, seconds: float) -> None:
+        """Add time spent serializing stream chunks"""
+        self.encode_seconds += seconds
+
+    def observe(self, event: Any) -> None:
+        """Follow one pydantic-ai agent event"""
+        if isinstance(event, (PartStartEvent, PartDeltaEvent)):
+            self.first_token()
+        elif isinstance(event, FunctionToolCallEvent):
+            self.llm_end(tool_calls=True)
+            self.tool_start(event.part.tool_call_id, event.part.tool_name)
+        elif isinstance(event, FunctionToolResultEvent):
+            result = event.result
+            # Tools report failures in their return value ("Failed to open ..."),
+            # so a ToolReturnPart alone does not mean success
+            success = isinstance(result, ToolReturnPart) and is_successful_result(str(result.content))
+            self.tool_end(result.tool_call_id, success)
+            if not self._tools:
+                # The next model request starts once all tool results are in
+                self.llm_start()
+        elif isinstance(event, AgentRunResultEvent):
+            self.llm_end()
+
+    def end(
+        self,
+        error: Optional[BaseException] = None,
+        output_tokens: Optional[int] = None,
+        **attributes: Any,
+    ) -> None:
+        """Close the run (later calls are ignored)"""
+        if self._ended:
+            return
+        self._ended = True
+        # A model request still open here was cut short: it is not timed
+        self._llm_start = None
+        for call_id in list(self._tools):
+            self.tool_end(call_id, False)
+        if output_tokens:
+            self.output_tokens += output_tokens
+        if self.llm_calls:
+            metrics.AGENT_ITERATIONS.observe(self.llm_calls)
+        if self.output_tokens and self.generation_seconds > 0:
+            metrics.TOKENS_PER_SECOND.observe(self.output_tokens / self.generation_seconds)
+        if error is not None:
+            outcome = 'error'
+        elif attributes.get('cancelled') or attributes.get('completed') is False:
+            outcome = 'cancelled'
+        elif attributes.get('success') is False:
+            outcome = 'failed'
+        else:
+            outcome = 'completed'
+        logger.info(
+            "agent_run_finished",
+            **{**self.attributes, **attributes},
+            duration_ms=round((time.perf_counter() - self.started_at) * 1000, 1),
+            llm_calls=self.llm_calls,
+            ttft_ms=self.ttft_ms,
+            output_tokens=self.output_tokens,
+            tools=self.tool_outcomes,
+            outcome=outcome,
+            error=type(error).__name__ if error is not None else None,
+        )
+        if not self.recording:
+            return
+        if self._llm is not None:
+            self._llm.end()
+            self._llm = None
+        self.span.set_attributes({
+            'llm_calls': self.llm_calls,
+            'output_tokens': self.output_tokens,
+            'stream.encode_ms': round(self.encode_seconds * 1000, 3),
+            **attributes,
+        })
+        if error is not None:
+            self.span.record_exception(error)
+            self.span.set_status(trace.Status(trace.StatusCode.ERROR, type(error).__name__))
+        self.span.end()
@@ -0,0 +1,145 @@
+"""
+Tests for LLM admission control.
+"""
+
+import asyncio
+import pytest
+from pydantic_ai.models.function import FunctionModel
+from src.agents import pydantic_agent
+from src.models.config import AdmissionConfig
+from src.orchestrator import intent_matcher
+from src.orchestrator.admission import (
+    AdmissionController,
+    AdmissionRejected,
+    AdmissionTicket,
+    set_admission_ticket,
+)
+from src.orchestrator.intent_matcher import IntentMatcher
+
+
+def _controller(**overrides):
+    defaults = dict(max_concurrency=1, max_queue_depth=8, queue_latency_budget_seconds=60,
+                    initial_service_estimate_seconds=1)
+    defaults.update(overrides)
+    return AdmissionController(AdmissionConfig(**defaults))
+
+
+# Test 1: concurrency is bounded and the slot is handed to the next waiter
+@pytest.mark.asyncio
+async def test_bounded_concurrency():
+    controller = _controller(max_concurrency=2)
+    await controller.acquire()
+    await controller.acquire()
+    waiter = asyncio.create_task(controller.acquire())
+    await asyncio.sleep(0)
+    assert controller.active == 2
+    assert controller.queue_depth == 1
+    assert not waiter.done()
+
+    controller.release(100)
+    await waiter
+    assert controller.active == 2
+    assert controller.queue_depth == 0
+
+
+# Test 2: interactive requests are admitted ahead of background ones
+@pytest.mark.asyncio
+async def test_priority_lanes():
+    controller = _controller()
+    order = []
+    await controller.acquire()
+
+    async def request(name, priority):
+        await controller.acquire(priority)
+        order.append(name)
+
+    background = asyncio.create_task(request("batch", "background"))
+    await asyncio.sleep(0)
+    interactive = asyncio.create_task(request("chat", "interactive"))
+    await asyncio.sleep(0)
+
+    controller.release(10)
+    await interactive
+    controller.release(10)
+    await background
+    assert order == ["chat", "batch"]
+
+
+# Test 3: requests over the latency budget or queue bound are shed immediately
+@pytest.mark.asyncio
+async def test_load_shedding():
+    controller = _controller(queue_latency_budget_seconds=1.5, max_queue_depth=5)
+    await controller.acquire()
+    first = asyncio.create_task(controller.acquire())  # estimated wait 1s: admitted to queue
+    await asyncio.sleep(0)
+    with pytest.raises(AdmissionRejected) as excinfo:
+        await controller.acquire()  # estimated wait 2s: over budget
+    assert excinfo.value.reason == "over_latency_budget"
+    assert controller.stats()["rejected"] == 1
+
+    first.cancel()
+    await asyncio.gather(first, return_exceptions=True)
+    controller.release(10)
+    assert controller.active == 0
+
+
+# Test 4: a cancelled waiter does not leak its slot
+@pytest.mark.asyncio
+async def test_cancelled_waiter():
+    controller = _controller()
+    async with controller.slot():
+        waiter = asyncio.create_task(controller.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+    assert controller.active == 0
+    stats = controller.stats()
+    assert stats["admitted"] == 1
+    assert stats["wait_p50_ms"] is not None
+
+
+# Test 5: a fast path that falls back to the LLM holds a slot while the model runs
+@pytest.mark.asyncio
+async def test_fast_path_fallback_takes_slot(monkeypatch):
+    def open_app(appName: str) -> str:
+        return f"Failed to open '{appName}': Application not found"
+
+    monkeypatch.setattr(intent_matcher, "_default_matcher", IntentMatcher({"open_app": open_app}))
+    controller = _controller()
+    ticket = AdmissionTicket(controller)
+    active_during_model = []
+
+    async def stream(messages, info):
+        active_during_model.append(controller.active)
+        yield "There is no app called Chromee."
+
+    async def request():
+        # Own task, like the chat endpoint's: the ticket is task-local
+        set_admission_ticket(ticket)
+        return await pydantic_agent.run_agent_non_streaming("open Chromee")
+
+    with pydantic_agent.agent.override(model=FunctionModel(stream_function=stream)):
+        response = await asyncio.create_task(request())
+
+    assert response.reply == "There is no app called Chromee."
+    assert active_during_model == [1] and controller.stats()["admitted"] == 1
+    ticket.release()
+    assert controller.active == 0
+
+
+# Test 6: a fallback is shed like any other LLM request when over budget
+@pytest.mark.asyncio
+async def test_fast_path_fallback_shed(monkeypatch):
+    def open_app(appName: str) -> str:
+        return f"Failed to open '{appName}': Application not found"
+
+    monkeypatch.setattr(intent_matcher, "_default_matcher", IntentMatcher({"open_app": open_app}))
+    controller = _controller(queue_latency_budget_seconds=0.5)
+    await controller.acquire()
+
+    async def request():
+        set_admission_ticket(AdmissionTicket(controller))
+        return await pydantic_agent.run_agent_non_streaming("open Chromee")
+
+    with pytest.raises(AdmissionRejected):
+        await asyncio.create_task(request())
@@ -0,0 +1,84 @@
+"""
+Tests for the installed-application index.
+Uses a fixture directory of fake .app bundles so it runs on any OS.
+"""
+
+import plistlib
+import shutil
+import pytest
+from src.agents.app_index import AppIndex, bundle_directory_enumerator
+
+
+def _make_bundle(directory, name, bundle_name=None):
+    contents = directory / f"{name}.app" / "Contents"
+    contents.mkdir(parents=True)
+    if bundle_name:
+        with open(contents / "Info.plist", "wb") as f:
+            plistlib.dump({"CFBundleName": bundle_name}, f)
+
+
+@pytest.fixture
+def apps_dir(tmp_path):
+    for name in ("Google Chrome", "Spotify", "Safari", "Visual Studio Code", "Final Cut Pro", "Logic Pro"):
+        _make_bundle(tmp_path, name)
+    _make_bundle(tmp_path, "zoom.us", bundle_name="Zoom")
+    (tmp_path / "README.txt").write_text("not an app")
+    return tmp_path
+
+
+@pytest.fixture
+def index(apps_dir):
+    app_index = AppIndex(enumerators=[bundle_directory_enumerator([str(apps_dir)])])
+    app_index.refresh()
+    return app_index
+
+
+# Test 1: enumerator finds bundles and plist names only
+def test_bundle_enumerator(apps_dir):
+    names = set(bundle_directory_enumerator([str(apps_dir), str(apps_dir / "missing")])())
+    assert "Google Chrome" in names
+    assert "Zoom" in names
+    assert "README" not in names
+
+
+# Test 2: exact, alias, token and fuzzy lookups
+@pytest.mark.parametrize("query, expected", [
+    ("safari", "Safari"),
+    ("Spotify.app", "Spotify"),
+    ("Chrome", "Google Chrome"),
+    ("vscode", "Visual Studio Code"),
+    ("Spotfy", "Spotify"),
+    ("google chrom", "Google Chrome"),
+    ("zoom", "Zoom"),
+])
+def test_lookup(index, query, expected):
+    assert index.lookup(query) == expected
+
+
+# Test 3: shared tokens are not aliases and unrelated names are rejected
+def test_lookup_rejects_ambiguous(index):
+    assert index.lookup("pro") is None
+    assert index.lookup("Photoshop") is None
+    assert index.resolve("Photoshop") == "Photoshop"
+
+
+# Test 4: refresh applies only the differences
+def test_incremental_refresh(index, apps_dir):
+    _make_bundle(apps_dir, "Slack")
+    shutil.rmtree(apps_dir / "Spotify.app")
+    added, removed = index.refresh()
+    assert (added, removed) == (1, 1)
+    assert index.lookup("slack") == "Slack"
+    assert index.lookup("spotify") is None
+    assert index.refresh() == (0, 0)
+
+
+# Test 5: a miss triggers a refresh so newly installed apps resolve
+def test_resolve_refreshes_on_miss(apps_dir):
+    app_index = AppIndex(
+        enumerators=[bundle_directory_enumerator([str(apps_dir)])],
+        min_refresh_interval_seconds=0,
+    )
+    app_index.refresh()
+    _make_bundle(apps_dir, "Obsidian")
+    assert app_index.resolve("obsidian") == "Obsidian"
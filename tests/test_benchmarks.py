@@ -0,0 +1,70 @@
+"""
+Tests for the benchmark helpers: corpus replay and baseline comparison.
+"""
+
+import argparse
+import random
+import pytest
+from benchmarks.chat_e2e import compare
+from benchmarks.replay import _requests
+from src.models.schemas import ChatRequest
+
+
+def _args(**overrides):
+    defaults = dict(requests=6, stream_ratio=None, repeat_identical=False, from_log=None)
+    defaults.update(overrides)
+    return argparse.Namespace(**defaults)
+
+
+def _corpus():
+    return [(0.0, ChatRequest(message="open Safari")), (1.5, ChatRequest(message="close Mail"))]
+
+
+def _results(throughput_rps, p50):
+    return {"scenarios": {"chat": {"throughput_rps": throughput_rps, "latency_ms": {"p50": p50}}}}
+
+
+# Test 1: later corpus cycles send distinct messages and repeat the arrival pattern
+def test_requests_cycles_distinct_messages():
+    items = list(_requests(_corpus(), _args(), random.Random(0)))
+    messages = [request.message for _, request in items]
+    assert len(messages) == 6 and len(set(messages)) == 6
+    assert messages[:2] == ["open Safari", "close Mail"]
+    assert [offset for offset, _ in items] == [0.0, 1.5, 2.5, 4.0, 5.0, 6.5]
+
+
+# Test 2: synthesized (from_log) messages stay distinct and keep their length
+def test_requests_cycles_synthesized_messages():
+    items = list(_requests(_corpus(), _args(from_log="logs/baby_ai.jsonl"), random.Random(0)))
+    later = [request.message for _, request in items[2:]]
+    assert len(set(later)) == 4
+    assert [len(message) for message in later] == [len("open Safari"), len("close Mail")] * 2
+
+
+# Test 3: repeat_identical replays the corpus verbatim, stream_ratio sets the mix
+def test_requests_repeat_identical_and_stream_mix():
+    items = list(_requests(_corpus(), _args(repeat_identical=True, stream_ratio=1.0), random.Random(0)))
+    assert [request.message for _, request in items] == ["open Safari", "close Mail"] * 3
+    assert all(request.stream for _, request in items)
+
+
+# Test 4: regressions follow each metric's direction and the tolerance
+@pytest.mark.parametrize("throughput_rps, p50, flagged", [
+    (10.0, 100.0, []),
+    (8.0, 100.0, ["throughput_rps"]),          # 20% less throughput
+    (12.0, 100.0, []),                         # more throughput is better
+    (10.0, 120.0, ["latency_ms.p50"]),         # 20% slower
+    (10.0, 80.0, []),                          # faster is better
+    (9.5, 105.0, []),                          # within tolerance
+])
+def test_compare_directions(throughput_rps, p50, flagged):
+    regressions = compare(_results(throughput_rps, p50), _results(10.0, 100.0), tolerance=0.1)
+    assert [r["metric"] for r in regressions] == flagged
+    assert all(r["scenario"] == "chat" for r in regressions)
+
+
+# Test 5: scenarios or metrics missing from the baseline are not compared
+def test_compare_skips_missing_baseline():
+    assert compare(_results(1.0, 500.0), {"scenarios": {}}, tolerance=0.1) == []
+    baseline = {"scenarios": {"chat": {"throughput_rps": 10.0}}}
+    assert compare(_results(10.0, 500.0), baseline, tolerance=0.1) == []
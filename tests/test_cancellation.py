@@ -0,0 +1,108 @@
+"""
+Tests for cancelling in-flight agent runs (disconnect and cancel endpoint).
+The model is a pydantic-ai FunctionModel so no Ollama server is needed.
+"""
+
+import asyncio
+import json
+import pytest
+from pydantic_ai.models.function import FunctionModel
+from src.agents import pydantic_agent
+from src.orchestrator import cancellation
+from src.orchestrator.cancellation import CLIENT_DISCONNECT, USER_CANCEL, CancellationRegistry
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = CancellationRegistry()
+    monkeypatch.setattr(cancellation, "_default_registry", registry)
+    return registry
+
+
+@pytest.fixture
+def slow_model():
+    """Streams one delta, then stalls until cancelled"""
+    state = {"aborted": False}
+
+    async def stream(messages, info):
+        yield "Once upon"
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            state["aborted"] = True
+            raise
+        yield " a time"
+
+    with pydantic_agent.agent.override(model=FunctionModel(stream_function=stream)):
+        yield state
+
+
+# Test 1: reclaimed time is the expected run time minus the time already spent
+@pytest.mark.asyncio
+async def test_registry_reclaimed_time(registry):
+    done = registry.begin("a")
+    done.completed = True
+    done.started_at -= 2.0
+    registry.end(done)
+
+    async def run():
+        step = registry.begin("b")
+        try:
+            await asyncio.sleep(10)
+        finally:
+            registry.end(step)
+
+    task = asyncio.create_task(run())
+    await asyncio.sleep(0.01)
+    assert registry.cancel("missing") is None
+    assert registry.cancel("b", CLIENT_DISCONNECT) is not None
+    await asyncio.gather(task, return_exceptions=True)
+
+    stats = registry.stats()
+    assert stats["active"] == 0 and stats["completed"] == 1
+    assert stats["cancelled"] == {CLIENT_DISCONNECT: 1, USER_CANCEL: 0}
+    assert 1900 < stats["reclaimed_ms"] < 2000
+
+
+# Test 2: the cancel endpoint path aborts the model request and ends the stream with a final chunk
+@pytest.mark.asyncio
+async def test_user_cancel_aborts_model(registry, slow_model):
+    chunks = []
+    async for line in pydantic_agent.run_agent_streaming("tell me a story about dragons"):
+        chunks.append(json.loads(line))
+        if chunks[-1]["type"] == "delta":
+            assert registry.cancel(chunks[0]["step_id"]) is not None
+
+    assert chunks[-1] == {"type": "final", "message": "Once upon"}
+    assert slow_model["aborted"]
+    assert registry.stats()["cancelled"][USER_CANCEL] == 1
+
+
+# Test 3: a reader that goes away (closed stream) stops the model run
+@pytest.mark.asyncio
+async def test_disconnect_aborts_model(registry, slow_model):
+    stream = pydantic_agent.run_agent_streaming("tell me a story about dragons")
+    async for line in stream:
+        if json.loads(line)["type"] == "delta":
+            break
+    await stream.aclose()
+
+    assert slow_model["aborted"]
+    stats = registry.stats()
+    assert stats["cancelled"][CLIENT_DISCONNECT] == 1 and stats["active"] == 0
+
+
+# Test 4: a run that fails with an error is not counted as a cancellation
+@pytest.mark.asyncio
+async def test_error_is_not_a_cancellation(registry):
+    async def stream(messages, info):
+        raise RuntimeError("model crashed")
+        yield
+
+    with pydantic_agent.agent.override(model=FunctionModel(stream_function=stream)):
+        chunks = [json.loads(line) async for line in pydantic_agent.run_agent_streaming("tell me a story about dragons")]
+
+    assert chunks[-1]["message"].startswith("Error")
+    stats = registry.stats()
+    assert stats["failed"] == 1 and stats["reclaimed_ms"] == 0.0
+    assert stats["cancelled"] == {CLIENT_DISCONNECT: 0, USER_CANCEL: 0}
@@ -0,0 +1,200 @@
+"""
+Tests for single-flight coalescing of identical requests.
+"""
+
+import asyncio
+import pytest
+from src.orchestrator.coalescing import SingleFlight
+
+
+# Test 1: concurrent identical calls execute once and share the result
+@pytest.mark.asyncio
+async def test_run_coalesces():
+    flights = SingleFlight()
+    executions = []
+
+    async def execute():
+        executions.append(1)
+        await asyncio.sleep(0.01)
+        return "reply"
+
+    results = await asyncio.gather(*(flights.run("key", execute) for _ in range(3)))
+    assert results == ["reply"] * 3
+    assert len(executions) == 1
+    assert flights.stats()["coalesced"] == 2
+
+
+# Test 2: different keys run independently; failures are not replayed later
+@pytest.mark.asyncio
+async def test_run_separate_keys_and_failures():
+    flights = SingleFlight()
+    calls = []
+
+    async def execute(value):
+        calls.append(value)
+        if value == "bad":
+            raise ValueError("boom")
+        return value
+
+    assert await flights.run("a", lambda: execute("a")) == "a"
+    assert await flights.run("b", lambda: execute("b")) == "b"
+    with pytest.raises(ValueError):
+        await flights.run("c", lambda: execute("bad"))
+    assert await flights.run("c", lambda: execute("c")) == "c"
+    assert calls == ["a", "b", "bad", "c"]
+
+
+# Test 3: a late duplicate within the linger window reuses the finished result
+@pytest.mark.asyncio
+async def test_run_linger_window():
+    flights = SingleFlight(linger_seconds=60)
+    calls = []
+
+    async def execute():
+        calls.append(1)
+        return "done"
+
+    await flights.run("key", execute)
+    await flights.run("key", execute)
+    assert len(calls) == 1
+
+
+# Test 4: stream followers receive the full stream, including chunks before they joined
+@pytest.mark.asyncio
+async def test_stream_fan_out():
+    flights = SingleFlight()
+    produced = []
+    gate = asyncio.Event()
+
+    async def prepare():
+        return "ctx"
+
+    async def make_stream(prepared):
+        for chunk in ("meta", "delta", "final"):
+            produced.append(chunk)
+            yield chunk
+            if chunk == "meta":
+                await gate.wait()
+
+    leader = flights.stream("key", prepare, make_stream)
+    await leader.wait_ready()
+    first = leader.subscribe()
+    assert await first.__anext__() == "meta"
+
+    follower = flights.stream("key", prepare, make_stream)
+    assert follower is leader
+    gate.set()
+    rest = [chunk async for chunk in first]
+    replay = [chunk async for chunk in follower.subscribe()]
+    assert rest == ["delta", "final"]
+    assert replay == ["meta", "delta", "final"]
+    assert produced == ["meta", "delta", "final"]
+
+
+# Test 5: preparation errors (e.g. load shedding) reach every caller
+@pytest.mark.asyncio
+async def test_stream_prepare_error():
+    flights = SingleFlight()
+
+    async def prepare():
+        raise RuntimeError("busy")
+
+    async def make_stream(prepared):
+        yield "never"
+
+    flight = flights.stream("key", prepare, make_stream)
+    with pytest.raises(RuntimeError):
+        await flight.wait_ready()
+
+
+# Test 6: the producer is cancelled when the last subscriber leaves
+@pytest.mark.asyncio
+async def test_stream_cancelled_without_subscribers():
+    flights = SingleFlight()
+    cancelled = asyncio.Event()
+
+    async def prepare():
+        return None
+
+    async def make_stream(prepared):
+        yield "meta"
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    flight = flights.stream("key", prepare, make_stream)
+    await flight.wait_ready()
+    subscription = flight.subscribe()
+    assert await subscription.__anext__() == "meta"
+    await subscription.aclose()
+    await asyncio.wait_for(cancelled.wait(), 1)
+
+
+# Test 7: non-streaming work stops when its only caller goes away, not before
+@pytest.mark.asyncio
+async def test_run_cancelled_when_all_callers_leave():
+    flights = SingleFlight()
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def execute():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    callers = [asyncio.create_task(flights.run("key", execute)) for _ in range(2)]
+    await started.wait()
+    callers[0].cancel()
+    await asyncio.sleep(0.01)
+    assert not cancelled.is_set()
+
+    callers[1].cancel()
+    await asyncio.wait_for(cancelled.wait(), 1)
+    await asyncio.gather(*callers, return_exceptions=True)
+
+
+# Test 8: a slow admission does not count against the subscribe grace period
+@pytest.mark.asyncio
+async def test_stream_grace_starts_after_admission(monkeypatch):
+    monkeypatch.setattr("src.orchestrator.coalescing._SUBSCRIBE_GRACE_SECONDS", 0.05)
+    flights = SingleFlight()
+
+    async def prepare():
+        await asyncio.sleep(0.2)
+        return None
+
+    async def make_stream(prepared):
+        yield "meta"
+        yield "final"
+
+    flight = flights.stream("key", prepare, make_stream)
+    await flight.wait_ready()
+    assert [chunk async for chunk in flight.subscribe()] == ["meta", "final"]
+
+
+# Test 9: an admitted stream nobody subscribes to is abandoned after the grace period
+@pytest.mark.asyncio
+async def test_stream_abandoned_without_subscribe(monkeypatch):
+    monkeypatch.setattr("src.orchestrator.coalescing._SUBSCRIBE_GRACE_SECONDS", 0.05)
+    flights = SingleFlight()
+    cancelled = asyncio.Event()
+
+    async def prepare():
+        return None
+
+    async def make_stream(prepared):
+        try:
+            await asyncio.sleep(10)
+            yield "never"
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    flight = flights.stream("key", prepare, make_stream)
+    await flight.wait_ready()
+    await asyncio.wait_for(cancelled.wait(), 1)
@@ -0,0 +1,70 @@
+"""
+Tests for context compaction in the agentic loop.
+"""
+
+from ollama import Message
+from pydantic_ai.messages import ModelRequest, ModelResponse, ToolCallPart, ToolReturnPart, UserPromptPart
+from src.orchestrator.context_compactor import ContextCompactor, summarize_result, truncate_text
+
+
+def tool_turn(name: str, result: str):
+    call = Message.ToolCall(function=Message.ToolCall.Function(name=name, arguments={}))
+    return [
+        Message(role='assistant', content='Let me do that.', thinking='long reasoning ' * 50, tool_calls=[call]),
+        {'role': 'tool', 'content': result, 'tool_name': name},
+    ]
+
+
+# Test 1: long texts keep head and tail
+def test_truncate_and_summarize():
+    text = "a" * 3000 + "z" * 100
+    truncated = truncate_text(text, max_tokens=100)
+    assert truncated.startswith("a" * 300) and truncated.endswith("z" * 100)
+    assert "characters omitted" in truncated
+    assert truncate_text("short", 100) == "short"
+
+    assert summarize_result("Documents\nDownloads\nMusic") == "Documents [+2 more lines]"
+
+
+# Test 2: superseded turns are summarized, the latest is truncated, the base is untouched
+def test_compact_ollama_messages():
+    listing = "\n".join(f"file_{i}.txt" for i in range(500))
+    messages = [
+        {'role': 'system', 'content': 'system prompt'},
+        {'role': 'user', 'content': 'list my files then open Safari'},
+        *tool_turn('list_files', listing),
+        *tool_turn('open_app', listing),
+    ]
+
+    compacted, report = ContextCompactor(max_tool_result_tokens=64).compact(messages)
+
+    assert compacted[:2] == messages[:2]
+    assert compacted[2]['content'] == '' and compacted[2]['tool_calls']
+    assert compacted[3]['content'] == "file_0.txt [+499 more lines]"
+    assert compacted[4]['content'] == 'Let me do that.'
+    assert len(compacted[5]['content']) < 400
+    assert report.summarized_turns == 1 and report.truncated_results == 1
+    assert report.tokens_after < report.tokens_before // 5
+    # The full history is not modified
+    assert messages[3]['content'] == listing
+
+
+# Test 3: pydantic-ai histories are compacted the same way
+def test_compact_model_messages():
+    big = "x" * 5000
+    messages = [
+        ModelRequest(parts=[UserPromptPart(content='list files twice')]),
+        ModelResponse(parts=[ToolCallPart(tool_name='list_files', args={}, tool_call_id='1')]),
+        ModelRequest(parts=[ToolReturnPart(tool_name='list_files', content=big, tool_call_id='1')]),
+        ModelResponse(parts=[ToolCallPart(tool_name='list_files', args={}, tool_call_id='2')]),
+        ModelRequest(parts=[ToolReturnPart(tool_name='list_files', content=big, tool_call_id='2')]),
+    ]
+
+    compacted, report = ContextCompactor(max_tool_result_tokens=64).compact_model_messages(messages)
+
+    assert len(compacted) == len(messages)
+    assert len(compacted[2].parts[0].content) <= 170
+    assert "characters omitted" in compacted[4].parts[0].content
+    assert compacted[4].parts[0].tool_call_id == '2'
+    assert messages[2].parts[0].content == big
+    assert report.tokens_after < report.tokens_before
@@ -0,0 +1,97 @@
+"""
+Tests for the deterministic intent fast path.
+"""
+
+import pytest
+from src.agents.app_index import AppIndex
+from src.orchestrator.intent_matcher import IntentMatcher, render_reply, try_fast_path
+
+
+def _open_app(appName: str) -> str:
+    return f"Application '{appName}' activated successfully"
+
+
+def _close_app(appName: str) -> str:
+    if appName == "Ghost":
+        return f"Failed to close '{appName}': Application not found"
+    return f"Application '{appName}' closed successfully"
+
+
+@pytest.fixture
+def matcher():
+    return IntentMatcher({"open_app": _open_app, "close_app": _close_app})
+
+
+# Test 1: simple multilingual commands match with full confidence
+@pytest.mark.parametrize("message, function_name, app_names, language", [
+    ("Open Spotify", "open_app", ["Spotify"], "en"),
+    ("please launch the Safari app!", "open_app", ["Safari"], "en"),
+    ("apri Safari per favore", "open_app", ["Safari"], "it"),
+    ("esci da Google Chrome", "close_app", ["Google Chrome"], "it"),
+    ("cierra Spotify.", "close_app", ["Spotify"], "es"),
+    ("close Chrome, Slack and Mail", "close_app", ["Chrome", "Slack", "Mail"], "en"),
+])
+def test_match_trivial_commands(matcher, message, function_name, app_names, language):
+    match = matcher.match(message)
+    assert match is not None
+    assert match.function_name == function_name
+    assert match.app_names == app_names
+    assert match.language == language
+    assert match.confidence >= matcher.min_confidence
+
+
+# Test 2: requests needing reasoning get zero confidence or no match
+@pytest.mark.parametrize("message", [
+    "Open Spotify and then close it",
+    "close it",
+    "What's the weather?",
+    "open the app that plays music?",
+])
+def test_match_ambiguous_falls_through(matcher, message):
+    match = matcher.match(message)
+    assert match is None or match.confidence < matcher.min_confidence
+
+
+# Test 3: tools missing from the vocabulary produce no patterns
+def test_match_respects_vocabulary():
+    matcher = IntentMatcher({"open_app": _open_app})
+    assert matcher.match("close Safari") is None
+    assert matcher.match("open Safari") is not None
+
+
+# Test 4: replies are templated per language
+def test_render_reply(matcher):
+    assert render_reply(matcher.match("close Chrome, Slack and Mail")) == "I've closed Chrome, Slack and Mail for you!"
+    assert render_reply(matcher.match("chiudi Mail")) == "Ho chiuso Mail!"
+
+
+# Test 5: counters track hits, misses and tool-failure fallbacks
+@pytest.mark.asyncio
+async def test_try_fast_path_counters(matcher):
+    response = await try_fast_path("open Safari", matcher=matcher)
+    assert response.reply == "I've opened Safari for you!"
+    assert await try_fast_path("what time is it?", matcher=matcher) is None
+    assert await try_fast_path("close Ghost", matcher=matcher) is None
+    stats = matcher.stats()
+    assert (stats["hits"], stats["misses"], stats["fallbacks"]) == (1, 1, 1)
+
+
+# Test 6: when only some apps fail, the reply names them instead of re-running everything through the LLM
+@pytest.mark.asyncio
+async def test_try_fast_path_partial_failure(matcher):
+    response = await try_fast_path("close Chrome, Ghost and Mail", matcher=matcher)
+    assert response.reply == "I've closed Chrome and Mail for you! I couldn't close Ghost."
+    italian = await try_fast_path("chiudi Ghost e Mail", matcher=matcher)
+    assert italian.reply == "Ho chiuso Mail! Non sono riuscito a chiudere Ghost."
+    assert matcher.stats()["partials"] == 2
+
+
+# Test 7: verb-led messages whose target is not an installed app go to the LLM
+def test_match_gated_on_app_index():
+    index = AppIndex(enumerators=[lambda: ["Safari", "Spotify", "Google Chrome"]])
+    index.refresh()
+    matcher = IntentMatcher({"open_app": _open_app, "close_app": _close_app}, app_index=index)
+    assert matcher.match("open Safari").confidence == 1.0
+    assert matcher.match("close safari and Google Chrome").confidence >= matcher.min_confidence
+    for message in ("open the door", "run a marathon", "start over", "close Safari and the door"):
+        assert matcher.match(message).confidence < matcher.min_confidence
@@ -26,3 +26,47 @@ def test_import_modules():
     from src.llm.ollama_adapter import OllamaAdapter
     assert LLMClient is not None
     assert OllamaAdapter is not None
+
+# Test 4: achat reuses a single pooled async client across calls
+@pytest.mark.asyncio
+async def test_ollama_adapter_achat_reuses_client(monkeypatch):
+    calls = []
+    async def dummy_chat(self, **params):
+        calls.append((id(self), params))
+        return {"message": {"content": "ok"}}
+    monkeypatch.setattr("ollama.AsyncClient.chat", dummy_chat)
+    adapter = OllamaAdapter(timeout_seconds=5, max_connections=2)
+    await adapter.achat([{"role": "user", "content": "hi"}])
+    await adapter.achat([{"role": "user", "content": "again"}])
+    assert len(calls) == 2
+    assert calls[0][0] == calls[1][0]
+    assert calls[0][1]["model"] == adapter.model
+    http_client = adapter._http_client
+    await adapter.aclose()
+    assert http_client.is_closed
+    assert adapter._async_client is None
+
+# Test 5: from_config wires pool size and timeout from OrchestratorConfig
+def test_ollama_adapter_from_config():
+    from src.models.config import OrchestratorConfig
+    config = OrchestratorConfig(llm_timeout_seconds=12, llm_max_connections=4)
+    adapter = OllamaAdapter.from_config(config, model="qwen3:4b")
+    assert adapter.timeout_seconds == 12
+    assert adapter.max_connections == 4
+    assert adapter.model == "qwen3:4b"
+
+
+# Test 6: thinking is sent explicitly with tools and a budget caps generation
+def test_build_chat_params_think_settings():
+    adapter = OllamaAdapter(model="test-model")
+    messages = [{"role": "user", "content": "hi"}]
+
+    params = adapter._build_chat_params(messages, ["tool"], think=False, stream=False)
+    assert params["think"] is False
+    assert "options" not in params
+
+    params = adapter._build_chat_params(messages, ["tool"], think=True, stream=False, think_budget=256)
+    assert params["think"] is True
+    assert params["options"] == {"num_predict": 256}
+
+    assert "think" not in adapter._build_chat_params(messages, None, think=True, stream=False)
@@ -0,0 +1,134 @@
+"""
+Tests for the streaming log analytics CLI.
+"""
+
+import gzip
+import json
+from structlog.testing import capture_logs
+from src.utils.log_analytics import LogHistogram, analyze, main
+from src.utils.tracing import RunTrace
+
+
+def _line(event, second, **fields):
+    return json.dumps({**fields, "event": event, "level": "info", "timestamp": f"2026-01-01T00:00:{second:06.3f}Z"}) + "\n"
+
+
+def _request(conversation_id, start, end, stream=False, llm_calls=2, tools=None):
+    prefix = "pydantic_agent_streaming" if stream else "pydantic_agent"
+    step_id = f"step-{conversation_id}"
+    return (
+        _line(f"{prefix}_start", start, conversation_id=conversation_id, user_message="open Safari")
+        + _line("llm_call", start, iteration=1)
+        + _line(f"{prefix}_complete", end, conversation_id=conversation_id, step_id=step_id)
+        + _line(
+            "agent_run_finished", end, conversation_id=conversation_id, step_id=step_id, stream=stream,
+            duration_ms=(end - start) * 1000, llm_calls=llm_calls, ttft_ms=120.0, output_tokens=40,
+            tools=tools or {}, outcome="completed", error=None,
+        )
+    )
+
+
+# Test 1: requests are joined by conversation and summarized
+def test_report_joins_requests(tmp_path):
+    log_file = tmp_path / "baby_ai.jsonl"
+    log_file.write_text(
+        _line("Logging configured successfully", 0)
+        + _request("c1", 1.0, 2.0, tools={"open_app": [2, 1]})
+        + _request("c2", 3.0, 3.5, stream=True, llm_calls=1, tools={"open_app": [1, 0], "close_app": [1, 0]})
+        + _request("c3", 4.0, 9.0, llm_calls=3)
+        + _line("pydantic_agent_start", 10.0, conversation_id="c4")
+        + _line("pydantic_agent_error", 10.5, conversation_id="c4", error="boom")
+        + _line("agent_run_cancelled", 11.0, step_id="s5", reason="user_cancel", elapsed_ms=5.0)
+        + "not json\n"
+    )
+
+    report = analyze(str(log_file), top=2)
+
+    assert report["requests"]["outcomes"] == {"completed": 3, "error": 1}
+    latency = report["requests"]["latency_ms"]
+    assert latency["all"]["count"] == 3 and latency["stream"]["count"] == 1
+    assert abs(latency["all"]["p50"] - 1000) <= 20 and latency["all"]["max"] == 5000
+    assert report["runs"]["iterations"]["distribution"] == {"1": 1, "2": 1, "3": 1}
+    assert report["runs"]["cancelled"] == {"user_cancel": 1}
+    assert report["tools"]["open_app"] == {"calls": 3, "failures": 1, "failure_rate": 0.3333}
+    assert [entry["step_id"] for entry in report["slowest"]] == ["step-c3", "step-c1"]
+
+
+# Test 2: later runs only read what was appended, across rotation
+def test_incremental_resume_and_rotation(tmp_path):
+    log_file = tmp_path / "baby_ai.jsonl"
+    state_file = str(tmp_path / "state.json")
+    first = _request("c1", 1.0, 2.0)
+    log_file.write_text(first + _line("pydantic_agent_start", 3.0, conversation_id="c2")[:-20])
+
+    report = analyze(str(log_file), state_file)
+    assert report["read"]["offset"] == len(first)
+    assert report["requests"]["outcomes"] == {"completed": 1}
+
+    # Finish the half-written line and the request
+    log_file.write_text(
+        first + _line("pydantic_agent_start", 3.0, conversation_id="c2")
+        + _line("pydantic_agent_complete", 4.0, conversation_id="c2", step_id="s2")
+    )
+    report = analyze(str(log_file), state_file)
+    assert report["read"]["resumed_from"] == len(first) and report["read"]["lines"] == 2
+    assert report["requests"]["outcomes"] == {"completed": 2}
+
+    # Rotation: the remainder of the old file is read from its backup
+    rotated = log_file.read_text() + _request("c3", 5.0, 6.0)
+    with gzip.open(str(log_file) + ".1.gz", "wt") as f:
+        f.write(rotated)
+    log_file.unlink()
+    log_file.write_text(_request("c4", 7.0, 8.0))
+    report = analyze(str(log_file), state_file)
+    assert report["read"]["rotated"]
+    assert report["requests"]["outcomes"] == {"completed": 4}
+
+
+# Test 3: requests answered by the fast path or the plan cache count in the latencies
+def test_fast_path_and_plan_cache_hits(tmp_path):
+    log_file = tmp_path / "baby_ai.jsonl"
+    log_file.write_text(
+        _request("c1", 1.0, 3.0)
+        + _line("pydantic_agent_start", 4.0, conversation_id="c2")
+        + _line("fast_path_hit", 4.05, conversation_id="c2", step_id="s2", function="open_app")
+        + _line("pydantic_agent_streaming_start", 5.0, conversation_id="c3")
+        + _line("plan_cache_hit", 5.1, conversation_id="c3", step_id="s3", num_calls=1)
+    )
+
+    report = analyze(str(log_file))
+
+    assert report["requests"]["outcomes"] == {"completed": 3}
+    assert report["requests"]["unmatched"] == 0
+    latency = report["requests"]["latency_ms"]
+    assert latency["all"]["count"] == 3 and latency["stream"]["count"] == 1
+    assert abs(latency["all"]["p50"] - 100) <= 2
+
+
+# Test 4: percentiles stay within the bucket resolution
+def test_histogram_percentiles():
+    histogram = LogHistogram()
+    for value in range(1, 1001):
+        histogram.add(float(value))
+    for pct in (50, 90, 99):
+        assert abs(histogram.percentile(pct) - pct * 10) <= pct * 10 * 0.02
+    assert len(histogram.counts) < 400
+
+
+# Test 5: RunTrace logs the summary line the analytics read back
+def test_run_summary_is_logged(tmp_path, capsys):
+    with capture_logs() as logs:
+        run_trace = RunTrace("agent.run", conversation_id="c1", step_id="s1")
+        run_trace.llm_start()
+        run_trace.tool_start("t1", "open_app")
+        run_trace.tool_end("t1", False)
+        run_trace.end(completed=True)
+    summary = next(entry for entry in logs if entry["event"] == "agent_run_finished")
+    assert summary["step_id"] == "s1" and summary["llm_calls"] == 1
+    assert summary["tools"] == {"open_app": [1, 1]} and summary["outcome"] == "completed"
+
+    log_file = tmp_path / "baby_ai.jsonl"
+    log_file.write_text(json.dumps({**summary, "timestamp": "2026-01-01T00:00:01Z"}) + "\n")
+    assert main(["--log-file", str(log_file), "--no-state", "--json"]) == 0
+    report = json.loads(capsys.readouterr().out)
+    assert report["tools"]["open_app"]["failure_rate"] == 1.0
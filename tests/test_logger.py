@@ -0,0 +1,81 @@
+"""
+Tests for the queued, rotating log pipeline.
+"""
+
+import gzip
+import io
+import json
+import logging
+import queue
+import pytest
+import structlog
+from src.models.config import LoggingConfig
+from src.utils import logger as log_setup
+from src.utils.logger import CompressingRotatingFileHandler, NonBlockingQueueHandler, logging_stats, setup_logging
+
+
+@pytest.fixture
+def restore_logging():
+    root = logging.getLogger()
+    handlers, level = list(root.handlers), root.level
+    config = structlog.get_config()
+    yield
+    log_setup._stop_listener()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+    structlog.configure(**config)
+
+
+def _lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines()]
+
+
+# Test 1: queued mode writes JSON lines from the writer thread
+def test_queued_pipeline_writes_json(tmp_path, restore_logging):
+    log_file = tmp_path / "app.jsonl"
+    console = io.StringIO()
+    setup_logging(config=LoggingConfig(), log_file=str(log_file), console_stream=console)
+    assert isinstance(logging.getLogger().handlers[0], NonBlockingQueueHandler)
+
+    structlog.get_logger("test").info("tool_executed", tool="open_app", duration_ms=1.5)
+    log_setup._stop_listener()  # drains the queue
+
+    events = _lines(log_file)
+    assert events[-1]["event"] == "tool_executed" and events[-1]["tool"] == "open_app"
+    assert events[-1]["level"] == "info" and "timestamp" in events[-1]
+    assert "tool_executed" in console.getvalue()
+
+
+# Test 2: a full queue drops records (errors wait briefly first) and counts them
+def test_queue_overflow_drops_records():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1), overflow="drop", block_timeout_ms=1)
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, "event", None, None)
+    handler.enqueue(record)
+    handler.enqueue(record)
+    handler.enqueue(logging.LogRecord("test", logging.ERROR, __file__, 1, "failure", None, None))
+    assert handler.stats() == {'queued': 1, 'capacity': 1, 'overflow': 'drop', 'dropped': 2}
+
+
+# Test 3: rotation by size and by age, with gzip-compressed backups
+def test_rotation_compresses_backups(tmp_path):
+    log_file = tmp_path / "app.jsonl"
+    handler = CompressingRotatingFileHandler(str(log_file), max_bytes=200, backup_count=2, max_age_seconds=3600)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    for i in range(10):
+        handler.emit(logging.LogRecord("test", logging.INFO, __file__, 1, "x" * 60 + str(i), None, None))
+
+    backups = sorted(p.name for p in tmp_path.iterdir() if p.name != "app.jsonl")
+    assert backups == ["app.jsonl.1.gz", "app.jsonl.2.gz"]
+    assert gzip.open(tmp_path / "app.jsonl.1.gz", "rt").read().startswith("x" * 60)
+
+    handler.opened_at -= 3600
+    handler.emit(logging.LogRecord("test", logging.INFO, __file__, 1, "after", None, None))
+    handler.close()
+    assert log_file.read_text() == "after\n"
+
+
+# Test 4: synchronous mode keeps the direct handlers
+def test_sync_mode(tmp_path, restore_logging):
+    setup_logging(config=LoggingConfig(queued=False), log_file=str(tmp_path / "app.jsonl"), console_stream=io.StringIO())
+    assert logging_stats() == {'mode': 'sync'}
+    assert not any(isinstance(h, NonBlockingQueueHandler) for h in logging.getLogger().handlers)
@@ -0,0 +1,82 @@
+"""
+Tests for the in-process Prometheus metrics.
+"""
+
+from pydantic_ai import FunctionToolCallEvent, FunctionToolResultEvent
+from pydantic_ai.messages import ToolCallPart, ToolReturnPart
+from src.utils import metrics
+from src.utils.metrics import Counter, Gauge, Histogram, MetricsRegistry
+from src.utils.tracing import RunTrace
+
+
+# Test 1: histograms render cumulative buckets, sum and count per label set
+def test_histogram_exposition():
+    registry = MetricsRegistry()
+    histogram = registry.register(Histogram("chat_seconds", "Chat latency", ["stream"], buckets=(0.1, 1.0)))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value, stream="true")
+
+    text = registry.render()
+    assert "# TYPE chat_seconds histogram" in text
+    assert 'chat_seconds_bucket{stream="true",le="0.1"} 1' in text
+    assert 'chat_seconds_bucket{stream="true",le="1"} 3' in text
+    assert 'chat_seconds_bucket{stream="true",le="+Inf"} 4' in text
+    assert 'chat_seconds_sum{stream="true"} 4.25' in text
+    assert 'chat_seconds_count{stream="true"} 4' in text
+
+
+# Test 2: counters keep one series per label set; gauges can be read at scrape time
+def test_counter_and_gauge():
+    registry = MetricsRegistry()
+    calls = registry.register(Counter("tool_calls_total", "Tool calls", ["tool", "success"]))
+    calls.inc(tool="open_app", success="true")
+    calls.inc(tool="open_app", success="true")
+    calls.inc(tool='say "hi"', success="false")
+    depth = [3]
+    registry.register(Gauge("queue_depth", "Waiting requests", callback=lambda: depth[0]))
+
+    text = registry.render()
+    assert 'tool_calls_total{tool="open_app",success="true"} 2' in text
+    assert 'tool_calls_total{tool="say \\"hi\\"",success="false"} 1' in text
+    assert "queue_depth 3" in text
+    depth[0] = 0
+    assert "queue_depth 0" in registry.render()
+
+
+# Test 3: agent run stages feed the shared histograms even when tracing is off
+def test_run_trace_records_metrics():
+    ttft_before = metrics.TTFT.count()
+    iterations_before = metrics.AGENT_ITERATIONS.count()
+    calls_before = metrics.TOOL_CALLS.value(tool="metrics_probe", success="false")
+
+    run_trace = RunTrace("agent.run")
+    run_trace.llm_start()
+    run_trace.first_token()
+    run_trace.llm_end(output_tokens=20)
+    run_trace.tool_start("c1", "metrics_probe")
+    run_trace.tool_end("c1", success=False)
+    run_trace.end()
+
+    assert metrics.TTFT.count() == ttft_before + 1
+    assert metrics.AGENT_ITERATIONS.count() == iterations_before + 1
+    assert metrics.TOOL_CALLS.value(tool="metrics_probe", success="false") == calls_before + 1
+    assert metrics.TOOL_LATENCY.count(tool="metrics_probe", success="false") >= 1
+
+
+
+# Test 4: a tool that reports a failure in its return value is counted as failed
+def test_failed_tool_result_counts_as_failure():
+    failed_before = metrics.TOOL_CALLS.value(tool="open_app", success="false")
+    succeeded_before = metrics.TOOL_CALLS.value(tool="open_app", success="true")
+
+    run_trace = RunTrace("agent.run")
+    call = ToolCallPart(tool_name="open_app", args={"appName": "Chromee"}, tool_call_id="c1")
+    run_trace.observe(FunctionToolCallEvent(part=call))
+    run_trace.observe(FunctionToolResultEvent(result=ToolReturnPart(
+        tool_name="open_app", content="Failed to open 'Chromee': Application not found", tool_call_id="c1",
+    )))
+    run_trace.end()
+
+    assert metrics.TOOL_CALLS.value(tool="open_app", success="false") == failed_before + 1
+    assert metrics.TOOL_CALLS.value(tool="open_app", success="true") == succeeded_before
+    assert run_trace.tool_outcomes == {"open_app": [1, 1]}
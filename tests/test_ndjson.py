@@ -0,0 +1,103 @@
+"""
+Tests for the NDJSON encoder and delta coalescing.
+"""
+
+import asyncio
+import json
+import pytest
+from src.models.schemas import ChatChunk
+from src.utils.ndjson import coalesce_frames, encode_chunk, encode_delta
+
+
+async def _paced(frames, delay):
+    for frame in frames:
+        await asyncio.sleep(delay)
+        yield frame
+
+
+# Test 1: byte encoding matches the pydantic serialization
+def test_encode_matches_model_dump():
+    chunks = [
+        ChatChunk(type="meta", conversation_id="c1", step_id="s1"),
+        ChatChunk(type="tool_start", tool_name="open_app", tool_call_id="t1", arguments={"appName": "Café"}, elapsed_ms=1.5),
+        ChatChunk(type="final", message="Done ✓"),
+    ]
+    for chunk in chunks:
+        line = encode_chunk(chunk)
+        assert line.endswith(b"\n")
+        assert json.loads(line) == chunk.model_dump(exclude_none=True)
+
+    assert json.loads(encode_delta('say "hi"\n')) == {"type": "delta", "content": 'say "hi"\n'}
+
+
+# Test 2: deltas are batched per window, other chunks flush immediately
+@pytest.mark.asyncio
+async def test_coalesce_batches_deltas():
+    frames = [encode_chunk(ChatChunk(type="meta", conversation_id="c", step_id="s"))]
+    frames += [encode_delta(f"t{i} ") for i in range(20)]
+    frames += [encode_chunk(ChatChunk(type="final", message="done"))]
+
+    out = [frame async for frame in coalesce_frames(_paced(frames, 0.002), interval_ms=20)]
+
+    assert b"".join(out) == b"".join(frames)
+    assert out[0] == frames[0]  # meta is not held back
+    assert len(out) < len(frames) / 2
+    assert all(frame.endswith(b"\n") for frame in out)
+
+
+# Test 3: a pending batch is flushed when upstream goes quiet
+@pytest.mark.asyncio
+async def test_coalesce_flushes_on_idle():
+    async def source():
+        yield encode_delta("hello")
+        await asyncio.sleep(0.2)
+        yield encode_delta(" world")
+
+    received = []
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    async for frame in coalesce_frames(source(), interval_ms=10):
+        received.append((loop.time() - start, frame))
+
+    assert [frame for _, frame in received] == [encode_delta("hello"), encode_delta(" world")]
+    assert received[0][0] < 0.1
+
+
+# Test 4: size threshold and upstream errors
+@pytest.mark.asyncio
+async def test_coalesce_size_threshold_and_errors():
+    async def source():
+        for _ in range(10):
+            yield encode_delta("x" * 100)
+        raise RuntimeError("upstream failed")
+
+    out = []
+    with pytest.raises(RuntimeError):
+        async for frame in coalesce_frames(source(), interval_ms=10_000, max_bytes=300):
+            out.append(frame)
+    assert sum(len(frame) for frame in out) == 10 * len(encode_delta("x" * 100))
+    assert all(len(frame) < 600 for frame in out)
+
+
+# Test 5: a stop condition (client disconnect) ends the stream and cancels upstream
+@pytest.mark.asyncio
+async def test_coalesce_stop_when_cancels_upstream():
+    disconnected = asyncio.Event()
+    upstream_cancelled = asyncio.Event()
+
+    async def source():
+        yield encode_chunk(ChatChunk(type="meta", conversation_id="c", step_id="s"))
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            upstream_cancelled.set()
+            raise
+        yield encode_delta("never sent")
+
+    out = []
+    async for frame in coalesce_frames(source(), interval_ms=10, stop_when=disconnected.wait):
+        out.append(frame)
+        disconnected.set()
+
+    assert len(out) == 1
+    assert upstream_cancelled.is_set()
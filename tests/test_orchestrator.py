@@ -0,0 +1,166 @@
+"""
+Tests for the legacy Ollama orchestrator loop.
+The LLM client is replaced with a scripted fake so no Ollama server is needed.
+"""
+
+import json
+import pytest
+from ollama import ChatResponse as OllamaChatResponse, Message
+from src.agents.tool_registry import ToolRegistry
+from src.models.config import OrchestratorConfig
+from src.orchestrator import orchestrator
+from src.orchestrator.orchestrator import orchestrate_with_retry, orchestrate_streaming
+from src.utils import metrics
+
+
+def _tool_call(name, **arguments):
+    return Message.ToolCall(function=Message.ToolCall.Function(name=name, arguments=arguments))
+
+
+class FakeLLMClient:
+    """Replays one scripted list of response parts per LLM call"""
+
+    model = "fake-model"
+
+    def __init__(self, turns):
+        self.turns = list(turns)
+        self.calls = []
+        self.think_settings = []
+
+    async def achat(self, messages, tools=None, think=True, stream=False, **kwargs):
+        self.calls.append(list(messages))
+        self.think_settings.append((think, kwargs.get("think_budget")))
+        parts = self.turns.pop(0)
+        if not stream:
+            content = "".join(p.content or "" for p in parts)
+            tool_calls = [tc for p in parts for tc in (p.tool_calls or [])]
+            return OllamaChatResponse(message=Message(role="assistant", content=content, tool_calls=tool_calls or None))
+
+        async def _iter():
+            for part in parts:
+                yield OllamaChatResponse(message=part)
+        return _iter()
+
+
+@pytest.fixture
+def fake_tools(monkeypatch):
+    executed = []
+
+    def open_app(appName: str) -> str:
+        executed.append(("open_app", appName))
+        return f"Application '{appName}' activated successfully"
+
+    registry = ToolRegistry([open_app])
+    monkeypatch.setattr(orchestrator.AppAgent, "get_tool_registry", classmethod(lambda cls: registry))
+    return executed
+
+
+def _llm_only_config():
+    return OrchestratorConfig(enable_fast_path=False, enable_plan_cache=False)
+
+
+def _script():
+    return [
+        [Message(role="assistant", tool_calls=[_tool_call("open_app", appName="Safari")])],
+        [Message(role="assistant", content="I've opened "), Message(role="assistant", content="Safari!")],
+    ]
+
+
+# Test 1: non-streaming loop executes tools and returns final reply
+@pytest.mark.asyncio
+async def test_orchestrate_with_retry_runs_tools(fake_tools):
+    client = FakeLLMClient(_script())
+    response = await orchestrate_with_retry("Open Safari", client, _llm_only_config())
+    assert response.reply == "I've opened Safari!"
+    assert fake_tools == [("open_app", "Safari")]
+    assert client.calls[1][-1]["role"] == "tool"
+
+
+# Test 1b: the non-streaming loop records tool metrics like the streaming one
+@pytest.mark.asyncio
+async def test_orchestrate_with_retry_records_tool_metrics(fake_tools):
+    calls_before = metrics.TOOL_CALLS.value(tool="open_app", success="true")
+    latency_before = metrics.TOOL_LATENCY.count(tool="open_app", success="true")
+    await orchestrate_with_retry("Open Safari", FakeLLMClient(_script()), _llm_only_config())
+    assert metrics.TOOL_CALLS.value(tool="open_app", success="true") == calls_before + 1
+    assert metrics.TOOL_LATENCY.count(tool="open_app", success="true") == latency_before + 1
+
+
+# Test 2: streaming loop yields meta, deltas and final across tool iterations
+@pytest.mark.asyncio
+async def test_orchestrate_streaming_chunks(fake_tools):
+    client = FakeLLMClient(_script())
+    lines = [line async for line in orchestrate_streaming("Open Safari", client, _llm_only_config())]
+    chunks = [json.loads(line) for line in lines]
+    assert chunks[0]["type"] == "meta"
+    assert [c["content"] for c in chunks if c["type"] == "delta"] == ["I've opened ", "Safari!"]
+    assert chunks[-1] == {"type": "final", "message": "I've opened Safari!"}
+    assert fake_tools == [("open_app", "Safari")]
+    assert client.calls[1][-1]["content"] == "Application 'Safari' activated successfully"
+
+    # Phase and tool lifecycle chunks arrive before the answer
+    lifecycle = [(c["type"], c.get("phase") or c.get("tool_name")) for c in chunks if c["type"] in ("phase", "tool_start", "tool_end")]
+    assert lifecycle == [
+        ("phase", "model"), ("phase", "tool_call"), ("phase", "tools"),
+        ("tool_start", "open_app"), ("tool_end", "open_app"),
+        ("phase", "model"), ("phase", "answering"),
+    ]
+    tool_end = next(c for c in chunks if c["type"] == "tool_end")
+    assert tool_end["success"] is True and tool_end["duration_ms"] >= 0
+
+
+# Test 3: trivial commands are answered by the intent fast path without the LLM
+@pytest.mark.asyncio
+async def test_orchestrate_fast_path_skips_llm(monkeypatch):
+    from src.orchestrator.intent_matcher import IntentMatcher
+    executed = []
+
+    def open_app(appName: str) -> str:
+        executed.append(appName)
+        return f"Application '{appName}' activated successfully"
+
+    monkeypatch.setattr(
+        "src.orchestrator.intent_matcher._default_matcher", IntentMatcher({"open_app": open_app})
+    )
+    client = FakeLLMClient([])
+    response = await orchestrate_with_retry("open Safari please", client, OrchestratorConfig(enable_plan_cache=False))
+    assert response.reply == "I've opened Safari for you!"
+    assert executed == ["Safari"]
+    assert client.calls == []
+
+
+# Test 4: a repeated request replays the cached plan instead of calling the LLM
+@pytest.mark.asyncio
+async def test_orchestrate_replays_cached_plan(fake_tools, monkeypatch):
+    from src.orchestrator.plan_cache import PlanCache
+    monkeypatch.setattr("src.orchestrator.plan_cache._default_cache", PlanCache())
+    config = OrchestratorConfig(enable_fast_path=False)
+
+    client = FakeLLMClient(_script())
+    first = await orchestrate_with_retry("Open Safari!", client, config)
+    second = await orchestrate_with_retry("open safari please", client, config)
+
+    assert first.reply == second.reply == "I've opened Safari!"
+    assert len(client.calls) == 2  # Only the first request reached the LLM
+    assert fake_tools == [("open_app", "Safari"), ("open_app", "Safari")]
+
+
+# Test: an empty answer escalates the reasoning level and retries the turn
+@pytest.mark.asyncio
+async def test_empty_answer_escalates_think_level(fake_tools, monkeypatch):
+    from src.orchestrator.think_policy import ThinkPolicy
+    policy = ThinkPolicy(budget_tokens=256)
+    monkeypatch.setattr(orchestrator, "get_think_policy", lambda budget_tokens: policy)
+    client = FakeLLMClient([
+        [Message(role="assistant", content="")],
+        [Message(role="assistant", content="Your Mac has 3 windows open.")],
+    ])
+
+    response = await orchestrate_with_retry("count my open windows", client, _llm_only_config())
+
+    assert response.reply == "Your Mac has 3 windows open."
+    # brief (capped) first, then full reasoning
+    assert client.think_settings == [(True, 256), (True, None)]
+    stats = policy.stats()
+    assert stats["brief"]["escalations"] == 1
+    assert stats["brief"]["requests"] == 1 and stats["brief"]["success_rate"] == 0
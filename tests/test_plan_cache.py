@@ -0,0 +1,90 @@
+"""
+Tests for the normalized plan cache.
+"""
+
+import pytest
+from src.models.schemas import FunctionCall
+from src.orchestrator.plan_cache import (
+    CachedPlan,
+    PlanCache,
+    normalize_message,
+    plan_fingerprint,
+    remember_plan,
+    replay_cached_plan,
+)
+
+
+def open_app(appName: str) -> str:
+    """Open an app"""
+    return f"Application '{appName}' activated successfully"
+
+
+FUNCTIONS = {"open_app": open_app}
+PLAN = CachedPlan(tool_calls=[FunctionCall(name="open_app", arguments={"appName": "Spotify"})], reply="Opened!")
+
+
+# Test 1: case, punctuation and filler words are normalized away
+def test_normalize_message():
+    assert normalize_message("Open Spotify") == "open spotify"
+    assert normalize_message("open spotify, please!") == "open spotify"
+    assert normalize_message("Can you open Spotify for me?") == "open spotify"
+
+
+# Test 2: LRU eviction and TTL expiry
+def test_lru_and_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.orchestrator.plan_cache.time.monotonic", lambda: now[0])
+    cache = PlanCache(max_entries=2, ttl_seconds=10)
+    cache.put("a", "fp", PLAN)
+    cache.put("b", "fp", PLAN)
+    assert cache.get("a", "fp") is not None  # 'a' is now most recently used
+    cache.put("c", "fp", PLAN)
+    assert cache.get("b", "fp") is None
+    assert cache.stats()["evictions"] == 1
+
+    now[0] += 11
+    assert cache.get("a", "fp") is None
+    assert cache.stats()["entries"] == 1
+
+
+# Test 3: a new fingerprint (tool set or prompt change) invalidates everything
+def test_fingerprint_invalidation():
+    cache = PlanCache()
+    fp = plan_fingerprint("prompt", FUNCTIONS)
+    cache.put("open spotify", fp, PLAN)
+    assert cache.get("open spotify", fp) is not None
+    assert plan_fingerprint("prompt v2", FUNCTIONS) != fp
+    assert cache.get("open spotify", plan_fingerprint("prompt v2", FUNCTIONS)) is None
+    assert cache.stats()["invalidations"] == 1
+
+
+# Test 4: stats report hit ratio and memory usage
+def test_stats():
+    cache = PlanCache()
+    cache.put("open spotify", "fp", PLAN)
+    cache.get("open spotify", "fp")
+    cache.get("close spotify", "fp")
+    stats = cache.stats()
+    assert stats["hit_ratio"] == 0.5
+    assert stats["approx_bytes"] > 0
+
+
+# Test 5: only fully successful runs are remembered, and replays re-run the tools
+@pytest.mark.asyncio
+async def test_remember_and_replay():
+    cache = PlanCache()
+    remember_plan("open Spotify", PLAN.tool_calls, ["Failed to open"], "Sorry", FUNCTIONS, "p", cache=cache)
+    assert await replay_cached_plan("open Spotify", FUNCTIONS, "p", cache=cache) is None
+
+    remember_plan("open Spotify", PLAN.tool_calls, ["activated successfully"], "Opened!", FUNCTIONS, "p", cache=cache)
+    response = await replay_cached_plan("Open Spotify please", FUNCTIONS, "p", cache=cache)
+    assert response.reply == "Opened!"
+
+
+# Test 6: runs without tool calls are not cached (their reply may be time-dependent)
+@pytest.mark.asyncio
+async def test_tool_less_run_not_cached():
+    cache = PlanCache()
+    remember_plan("what time is it", [], [], "It is 10:42.", FUNCTIONS, "p", cache=cache)
+    assert await replay_cached_plan("what time is it", FUNCTIONS, "p", cache=cache) is None
+    assert cache.stats()["entries"] == 0
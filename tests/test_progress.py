@@ -0,0 +1,47 @@
+"""
+Tests for phase and tool lifecycle chunks of streamed responses.
+"""
+
+import json
+import pytest
+from pydantic_ai.models.function import DeltaToolCall, FunctionModel
+from src.agents import pydantic_agent
+from src.orchestrator.progress import StreamProgress
+
+
+# Test 1: phases are emitted on transitions only, tool_end carries the tool's duration
+def test_stream_progress_chunks():
+    progress = StreamProgress()
+    assert json.loads(progress.enter("model"))["phase"] == "model"
+    assert progress.enter("model") is None
+
+    start = json.loads(progress.tool_start("open_app", {"appName": "Safari"}, "c1"))
+    assert start["type"] == "tool_start" and start["arguments"] == {"appName": "Safari"}
+    assert progress.tools_running == 1
+
+    end = json.loads(progress.tool_end("open_app", "c1", success=True))
+    assert end["type"] == "tool_end" and end["success"] is True
+    assert end["duration_ms"] >= 0 and end["elapsed_ms"] >= start["elapsed_ms"]
+    assert progress.tools_running == 0
+    assert "duration_ms" not in json.loads(progress.tool_end("open_app", "unknown", success=False))
+
+
+# Test 2: the pydantic-ai streaming runner reports the tool call before the answer
+@pytest.mark.asyncio
+async def test_agent_stream_lifecycle():
+    async def stream(messages, info):
+        if len(messages) == 1:
+            yield {0: DeltaToolCall(name="open_app", json_args='{"appName": "Safari"}', tool_call_id="c1")}
+        else:
+            yield "Safari is open."
+
+    with pydantic_agent.agent.override(model=FunctionModel(stream_function=stream)):
+        chunks = [json.loads(line) async for line in pydantic_agent.run_agent_streaming("could you help me with Safari")]
+
+    assert chunks[0]["type"] == "meta" and chunks[-1] == {"type": "final", "message": "Safari is open."}
+    lifecycle = [(c["type"], c.get("phase") or c.get("tool_name")) for c in chunks if c["type"] in ("phase", "tool_start", "tool_end")]
+    assert lifecycle.index(("tool_start", "open_app")) < lifecycle.index(("tool_end", "open_app"))
+    assert lifecycle[0] == ("phase", "model") and lifecycle[-1] == ("phase", "answering")
+    tool_end = next(c for c in chunks if c["type"] == "tool_end")
+    assert tool_end["tool_call_id"] == "c1" and tool_end["success"] is True
+    assert [c["content"] for c in chunks if c["type"] == "delta"] == ["Safari is open."]
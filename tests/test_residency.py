@@ -0,0 +1,101 @@
+"""
+Tests for the model residency manager.
+"""
+
+import asyncio
+import pytest
+from src.llm.residency import ModelResidencyManager
+from src.models.config import ResidencyConfig
+
+
+class FakeAdapter:
+    """Records load/unload calls instead of talking to Ollama"""
+
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    async def aload(self, keep_alive="5m", model=None):
+        if self.fail:
+            raise ConnectionError("ollama not running")
+        self.calls.append(("load", model, keep_alive))
+
+    async def aunload(self, model=None):
+        self.calls.append(("unload", model))
+
+
+def _config(**overrides):
+    defaults = dict(models=["m1"], keep_alive="10m", refresh_interval_seconds=60, idle_unload_seconds=300)
+    defaults.update(overrides)
+    return ResidencyConfig(**defaults)
+
+
+async def _drain(manager):
+    await asyncio.gather(*manager._load_tasks.values())
+
+
+# Test 1: start preloads with the configured keep_alive and records a cold load
+@pytest.mark.asyncio
+async def test_start_preloads():
+    adapter = FakeAdapter()
+    manager = ModelResidencyManager(adapter, _config())
+    await manager.start()
+    await _drain(manager)
+    await manager.stop()
+    assert adapter.calls == [("load", "m1", "10m")]
+    assert manager.resident == {"m1": True}
+    assert manager.stats()["cold_load"]["count"] == 1
+
+
+# Test 2: idle models are unloaded and reloaded on the next activity
+@pytest.mark.asyncio
+async def test_idle_unload_and_reload(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.llm.residency.time.monotonic", lambda: now[0])
+    adapter = FakeAdapter()
+    manager = ModelResidencyManager(adapter, _config())
+    assert manager.touch() is False  # Cold: triggers a load
+    await _drain(manager)
+
+    now[0] += 301
+    await manager.check()
+    assert manager.resident == {"m1": False}
+    assert ("unload", "m1") in adapter.calls
+
+    assert manager.touch() is False
+    await _drain(manager)
+    assert manager.resident == {"m1": True}
+    assert manager.touch() is True
+
+
+# Test 3: active models get their keep-alive refreshed
+@pytest.mark.asyncio
+async def test_refresh_while_active(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.llm.residency.time.monotonic", lambda: now[0])
+    adapter = FakeAdapter()
+    manager = ModelResidencyManager(adapter, _config())
+    manager.touch()
+    await _drain(manager)
+
+    now[0] += 61
+    manager.touch()
+    await manager.check()
+    await _drain(manager)
+    assert [c[0] for c in adapter.calls] == ["load", "load"]
+    assert manager.stats()["warm_refresh"]["count"] == 1
+
+
+# Test 4: load failures are tolerated and latency buckets are reported
+@pytest.mark.asyncio
+async def test_failures_and_latency_stats():
+    manager = ModelResidencyManager(FakeAdapter(fail=True), _config())
+    manager.touch()
+    await _drain(manager)
+    assert manager.resident == {"m1": False}
+
+    manager.record_request(False, 5000.0)
+    manager.record_request(True, 800.0)
+    stats = manager.stats()
+    assert stats["cold_requests"]["last_ms"] == 5000.0
+    assert stats["warm_requests"]["last_ms"] == 800.0
@@ -0,0 +1,78 @@
+"""
+Tests for the bounded multi-turn session store.
+"""
+
+from src.models.config import SessionConfig
+from src.orchestrator.session_store import SessionStore, estimate_message_tokens
+
+
+def turn(text: str):
+    return [{'role': 'user', 'content': text}, {'role': 'assistant', 'content': 'ok'}]
+
+
+# Test 1: turns accumulate per conversation, oldest first
+def test_history_accumulates():
+    store = SessionStore()
+    store.append_turn("c1", turn("open Safari"))
+    store.append_turn("c1", turn("now close it"))
+    store.append_turn("c2", turn("hello"))
+
+    history = store.history("c1")
+    assert [m['content'] for m in history] == ["open Safari", "ok", "now close it", "ok"]
+    assert store.history(None) == []
+    assert store.history("unknown") == []
+
+
+# Test 2: per-session budget evicts oldest turns but keeps the newest
+def test_per_session_budget_evicts_oldest_turns():
+    per_turn = sum(estimate_message_tokens(m) for m in turn("x" * 40))
+    store = SessionStore(SessionConfig(max_tokens_per_session=per_turn * 2))
+    for i in range(5):
+        store.append_turn("c1", turn(f"{i}" * 40))
+
+    history = store.history("c1")
+    assert len(history) == 4
+    assert history[0]['content'] == "3" * 40
+    assert store.stats()['evicted_turns'] == 3
+
+    # A single oversized turn is still kept
+    store.append_turn("c2", turn("y" * 10_000))
+    assert len(store.history("c2")) == 2
+
+
+# Test 3: global caps evict least recently used sessions
+def test_global_cap_evicts_lru_sessions():
+    store = SessionStore(SessionConfig(max_sessions=2))
+    store.append_turn("a", turn("first"))
+    store.append_turn("b", turn("second"))
+    store.history("a")  # 'a' is now most recently used
+    store.append_turn("c", turn("third"))
+
+    assert store.history("b") == []
+    assert store.history("a") and store.history("c")
+    assert store.stats()['evicted_sessions'] == 1
+
+
+# Test 4: idle sessions expire
+def test_idle_sessions_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.orchestrator.session_store.time.monotonic", lambda: now[0])
+    store = SessionStore(SessionConfig(idle_ttl_seconds=60))
+    store.append_turn("a", turn("open Safari"))
+
+    now[0] += 61
+    assert store.history("a") == []
+    store.append_turn("b", turn("hello"))
+    assert store.stats()['sessions'] == 1
+    assert store.stats()['total_tokens'] == sum(estimate_message_tokens(m) for m in turn("hello"))
+
+
+# Test 5: prompt size percentiles
+def test_prompt_size_stats():
+    store = SessionStore()
+    assert store.stats()['prompt_tokens_p50'] is None
+    for tokens in (10, 20, 30, 40, 500):
+        store.record_prompt(tokens)
+    stats = store.stats()
+    assert stats['prompt_tokens_p50'] == 30
+    assert stats['prompt_tokens_max'] == 500
@@ -0,0 +1,82 @@
+"""
+Tests for speculative tool execution from streamed tool calls.
+"""
+
+import asyncio
+import threading
+import pytest
+from ollama import Message
+from src.orchestrator.speculative import IncrementalToolCallParser, SpeculativeRun, claim_or_run
+from src.orchestrator.tool_executor import ToolExecutor, call_target
+
+
+def _tool_call(name, **arguments):
+    return Message.ToolCall(function=Message.ToolCall.Function(name=name, arguments=arguments))
+
+
+# Test 1: a call is reported as soon as its argument object closes
+def test_parser_detects_complete_arguments():
+    parser = IncrementalToolCallParser()
+    assert parser.feed(0, "open_", '{"appN', start=True) is None
+    assert parser.feed(0, "app", 'ame": "Safari {beta} \\"x\\"') is None
+    assert parser.feed(0, None, '"}') == ("open_app", {"appName": 'Safari {beta} "x"'})
+    # Later fragments of the same call are ignored
+    assert parser.feed(0, None, " ") is None
+
+    # Dict arguments are complete immediately; a new start resets the slot
+    assert parser.feed(0, "close_app", {"appName": "Mail"}, start=True) == ("close_app", {"appName": "Mail"})
+
+
+# Test 2: idempotent calls run early, are claimed once, and unconfirmed ones are discarded
+@pytest.mark.asyncio
+async def test_resolve_claims_speculated_calls():
+    executed = []
+    lock = threading.Lock()
+
+    def execute(name, arguments):
+        with lock:
+            executed.append((name, arguments["appName"]))
+        return {"role": "tool", "content": f"{name} {arguments['appName']} done successfully"}
+
+    executor = ToolExecutor(max_workers=2)
+    run = SpeculativeRun(execute, executor)
+    run.observe(0, "open_app", '{"appName": "Safari"}', start=True)
+    run.observe(1, "open_app", '{"appName": "Notes"}', start=True)
+    assert not run.start("close_app", {"appName": "Mail"})  # not idempotent
+
+    async def run_remaining(calls):
+        return [execute(tc.function.name, tc.function.arguments) for tc in calls]
+
+    final_calls = [_tool_call("close_app", appName="Mail"), _tool_call("open_app", appName="Safari")]
+    results = await run.resolve(final_calls, run_remaining)
+    run.finish()
+    executor.shutdown()
+
+    assert [r["content"] for r in results] == [
+        "close_app Mail done successfully",
+        "open_app Safari done successfully",
+    ]
+    # Safari ran once (speculatively); Notes was never confirmed
+    assert executed.count(("open_app", "Safari")) == 1
+    assert run.claim("open_app", {"appName": "Notes"}) is None
+
+
+# Test 3: a speculative call waits for a running call on the same app
+@pytest.mark.asyncio
+async def test_speculation_takes_target_lock():
+    executed = []
+    executor = ToolExecutor(max_workers=2)
+    run = SpeculativeRun(lambda name, arguments: executed.append(name) or "done successfully", executor)
+
+    async with executor._lock_for(call_target("close_app", {"appName": "Safari"})):
+        assert run.start("open_app", {"appName": "Safari"})
+        await asyncio.sleep(0.05)
+        assert executed == []
+    assert await asyncio.wrap_future(run.claim("open_app", {"appName": "Safari"})) == "done successfully"
+    assert executed == ["open_app"]
+    executor.shutdown()
+
+
+# Test 4: tool bodies fall back to direct execution without a speculation
+def test_claim_or_run_fallback():
+    assert claim_or_run(None, "open_app", {"appName": "Safari"}, lambda appName: f"ran {appName}") == "ran Safari"
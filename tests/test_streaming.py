@@ -70,9 +70,9 @@ class TestStreamingFlow:
             assert chunks[0]["type"] == "meta"  # First chunk is meta
             assert chunks[-1]["type"] == "final"  # Last chunk is final
             
-            # Verify all middle chunks are deltas
+            # Verify all middle chunks are deltas or progress events
             for chunk in chunks[1:-1]:
-                assert chunk["type"] == "delta"
+                assert chunk["type"] in ("delta", "phase", "tool_start", "tool_end")
 
     def test_streaming_meta_chunk_structure(self, client, streaming_request):
         """Test that meta chunk contains correct metadata."""
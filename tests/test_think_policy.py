@@ -0,0 +1,114 @@
+"""
+Tests for the adaptive reasoning (think) policy.
+"""
+
+import json
+import pytest
+from pydantic_ai.models.function import DeltaToolCall, FunctionModel
+from src.agents import pydantic_agent
+from src.orchestrator import think_policy
+from src.orchestrator.intent_matcher import IntentMatcher
+from src.orchestrator.think_policy import ThinkPolicy
+
+
+def open_app(appName: str) -> str:
+    """Open an app"""
+    return f"Application '{appName}' activated successfully"
+
+
+def close_app(appName: str) -> str:
+    """Close an app"""
+    return f"Application '{appName}' closed successfully"
+
+
+def make_policy(**kwargs):
+    matcher = IntentMatcher({"open_app": open_app, "close_app": close_app})
+    return ThinkPolicy(matcher=matcher, **kwargs)
+
+
+# Test 1: recognized commands skip thinking, chained or open-ended ones think fully
+def test_classify_levels():
+    policy = make_policy(budget_tokens=512)
+
+    off = policy.decide("open Safari")
+    assert off.level == "off" and off.think is False
+
+    brief = policy.decide("play some music")
+    assert brief.level == "brief" and brief.think and brief.budget_tokens == 512
+
+    assert policy.decide("open Mail, then reply to Anna and archive the thread").level == "full"
+    assert policy.decide("why is my Mac slow?").level == "full"
+
+
+# Test 2: escalation climbs one level at a time up to full
+def test_escalation():
+    policy = make_policy()
+    decision = policy.decide("open Safari")
+    decision = policy.escalate(decision, "tool failed")
+    assert decision.level == "brief"
+    decision = policy.escalate(decision, "empty response")
+    assert decision.level == "full" and decision.budget_tokens is None
+    assert policy.escalate(decision, "still failing") is None
+    assert policy.stats()["off"]["escalations"] == 1
+
+
+# Test 3: a level with a poor success history is skipped
+def test_success_history_raises_level():
+    policy = make_policy(min_samples=4, min_success_rate=0.75)
+    off = policy.decide("open Safari")
+    for success in (True, False, False, True):
+        policy.record(off, latency_ms=100, tool_calls=1, tool_failures=0 if success else 1, success=success)
+
+    assert policy.decide("open Safari").level == "brief"
+    stats = policy.stats()["off"]
+    assert stats["success_rate"] == 0.5
+    assert stats["tool_call_accuracy"] == 0.5
+    assert stats["latency_p50_ms"] == 100
+
+
+@pytest.fixture
+def policy(monkeypatch):
+    policy = ThinkPolicy()
+    monkeypatch.setattr(think_policy, "_default_policy", policy)
+    return policy
+
+
+def _runs_model(runs, call_tool):
+    """Model that never answers; with call_tool it first calls open_app once per run"""
+    async def stream(messages, info):
+        if len(messages) == 1:
+            # First request of a run (no history, no tool results or retries yet)
+            runs.append(1)
+            if call_tool:
+                yield {0: DeltaToolCall(name="open_app", json_args='{"appName": "Safari"}', tool_call_id="c1")}
+                return
+        yield ""
+
+    return FunctionModel(stream_function=stream)
+
+
+# Test 4: a failed turn without tool calls is re-run at a higher level (both runners)
+@pytest.mark.asyncio
+async def test_agent_escalates_tool_less_failure(policy):
+    runs = []
+    with pydantic_agent.agent.override(model=_runs_model(runs, call_tool=False)):
+        await pydantic_agent.run_agent_non_streaming("tell me something nice please")
+        assert len(runs) > 1
+        runs.clear()
+        async for _ in pydantic_agent.run_agent_streaming("tell me something else nice please"):
+            pass
+        assert len(runs) > 1
+
+
+# Test 5: a failed turn that already ran tools is not re-run (no repeated side effects)
+@pytest.mark.asyncio
+async def test_agent_does_not_escalate_after_tool_calls(policy):
+    runs = []
+    with pydantic_agent.agent.override(model=_runs_model(runs, call_tool=True)):
+        await pydantic_agent.run_agent_non_streaming("hmm can you help me with something")
+        assert len(runs) == 1
+        runs.clear()
+        lines = [json.loads(line) async for line in pydantic_agent.run_agent_streaming("hmm can you help me with another thing")]
+        assert len(runs) == 1
+    assert [line["type"] for line in lines].count("tool_start") == 1
+    assert all(stats["escalations"] == 0 for stats in policy.stats().values())
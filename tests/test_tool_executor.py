@@ -0,0 +1,85 @@
+"""
+Tests for concurrent tool-call execution.
+"""
+
+import threading
+import time
+import pytest
+from ollama import Message
+from src.agents.app_index import AppIndex
+from src.orchestrator import tool_executor
+from src.orchestrator.tool_executor import ToolExecutor, tool_target
+
+
+def _tool_call(name, **arguments):
+    return Message.ToolCall(function=Message.ToolCall.Function(name=name, arguments=arguments))
+
+
+# Test 1: calls on different apps overlap, results keep original order
+@pytest.mark.asyncio
+async def test_run_concurrent_keeps_order():
+    barrier = threading.Barrier(3, timeout=2)
+
+    def close_app(appName: str) -> str:
+        barrier.wait()  # Only passes if all three run at the same time
+        return f"closed {appName}"
+
+    executor = ToolExecutor(max_workers=3)
+    calls = [_tool_call("close_app", appName=name) for name in ("Chrome", "Slack", "Mail")]
+    results = await executor.run(calls, {"close_app": close_app})
+    executor.shutdown()
+
+    assert [r["content"] for r in results] == ["closed Chrome", "closed Slack", "closed Mail"]
+    assert all(r["role"] == "tool" and r["tool_name"] == "close_app" for r in results)
+
+
+# Test 2: calls on the same app are serialized in request order
+@pytest.mark.asyncio
+async def test_run_serializes_same_target():
+    events = []
+
+    def step(appName: str, label: str) -> str:
+        events.append(("start", label))
+        time.sleep(0.02)
+        events.append(("end", label))
+        return label
+
+    executor = ToolExecutor(max_workers=4)
+    calls = [_tool_call("step", appName="Spotify", label="open"), _tool_call("step", appName="spotify ", label="close")]
+    await executor.run(calls, {"step": step})
+    executor.shutdown()
+
+    assert events == [("start", "open"), ("end", "open"), ("start", "close"), ("end", "close")]
+
+
+# Test 3: tool errors and unknown functions become tool messages
+@pytest.mark.asyncio
+async def test_run_reports_errors():
+    def broken(appName: str) -> str:
+        raise RuntimeError("boom")
+
+    executor = ToolExecutor(max_workers=2)
+    results = await executor.run(
+        [_tool_call("broken", appName="A"), _tool_call("missing", appName="B")],
+        {"broken": broken},
+    )
+    executor.shutdown()
+
+    assert results[0]["content"] == "Error executing broken: boom"
+    assert results[1]["content"] == "Unknown function: missing"
+
+
+# Test 4: target key normalizes app names and falls back to function name
+def test_tool_target():
+    assert tool_target(_tool_call("open_app", appName=" Safari ")) == "app:safari"
+    assert tool_target(_tool_call("list_apps")) == "fn:list_apps"
+
+
+# Test 5: names of the same app share a key once resolved through the app index
+def test_tool_target_resolves_app(monkeypatch):
+    index = AppIndex(enumerators=[lambda: ["Google Chrome", "Safari"]])
+    index.refresh()
+    monkeypatch.setattr(tool_executor, "get_app_index", lambda: index)
+    assert tool_target(_tool_call("open_app", appName="google chrome.app")) == "app:google chrome"
+    assert tool_target(_tool_call("close_app", appName="Google Chrome")) == "app:google chrome"
+    assert tool_target(_tool_call("open_app", appName=" Not An App ")) == "app:not an app"
@@ -0,0 +1,73 @@
+"""
+Tests for the tool registry (precompiled schemas and validators).
+"""
+
+import pytest
+from ollama import Message
+from ollama._utils import convert_function_to_tool
+from pydantic import ValidationError
+from src.agents.tool_registry import ToolRegistry, parse_docstring
+from src.orchestrator.tool_executor import execute_tool_call
+
+
+def open_app(appName: str) -> str:
+    """Open a macOS application by name.
+
+    Args:
+        appName: The name of the application to open (e.g., "Spotify", "Chrome")
+
+    Returns:
+        A success message or error description
+    """
+    return f"Application '{appName}' activated successfully"
+
+
+def set_volume(level: int, muted: bool = False) -> str:
+    """Set the output volume.
+
+    Args:
+        level: Volume between 0 and 100
+        muted: Mute after setting
+            the level
+    """
+    return f"volume {level} muted={muted}"
+
+
+# Test 1: docstring parsing extracts summary and (multi-line) argument descriptions
+def test_parse_docstring():
+    summary, args = parse_docstring(set_volume)
+    assert summary == "Set the output volume."
+    assert args == {"level": "Volume between 0 and 100", "muted": "Mute after setting the level"}
+
+
+# Test 2: compiled schema matches what the ollama client would introspect
+def test_schema_matches_ollama_conversion():
+    registry = ToolRegistry([open_app])
+    expected = convert_function_to_tool(open_app).model_dump(exclude_none=True)
+    assert registry.schemas[0].model_dump(exclude_none=True) == expected
+
+
+# Test 3: schema is built once and reused
+def test_schemas_are_cached():
+    registry = ToolRegistry([open_app, set_volume])
+    assert registry.schemas[0] is registry.get("open_app").schema
+    params = registry.get("set_volume").schema.function.parameters
+    assert params.required == ["level"]
+
+
+# Test 4: validators coerce, reject missing/extra arguments
+def test_validate_arguments():
+    registry = ToolRegistry([set_volume])
+    assert registry.validate("set_volume", {"level": "40"}) == {"level": 40, "muted": False}
+    with pytest.raises(ValidationError):
+        registry.validate("set_volume", {})
+    with pytest.raises(ValidationError):
+        registry.validate("set_volume", {"level": 10, "volume": 3})
+
+
+# Test 5: invalid arguments are reported back as a tool message instead of raising
+def test_execute_tool_call_reports_invalid_arguments():
+    registry = ToolRegistry([open_app])
+    tool_call = Message.ToolCall(function=Message.ToolCall.Function(name="open_app", arguments={"app": "Safari"}))
+    result = execute_tool_call(tool_call, registry.functions, registry)
+    assert result["content"].startswith("Invalid arguments for open_app")
@@ -0,0 +1,135 @@
+"""
+Tests for relevance-based tool subset selection.
+"""
+
+import pytest
+from pydantic_ai.models.function import DeltaToolCall, FunctionModel
+from src.agents import pydantic_agent
+from src.agents.app_agent import AppAgent
+from src.agents.tool_registry import ToolRegistry
+from src.agents.tool_selector import ToolSelector, tokenize
+from src.orchestrator.plan_cache import PlanCache
+
+
+def open_app(appName: str) -> str:
+    """Open a macOS application by name.
+
+    Args:
+        appName: The name of the application to open (e.g., "Spotify", "Chrome")
+    """
+
+
+def close_app(appName: str) -> str:
+    """Close (quit) a macOS application by name.
+
+    Args:
+        appName: The name of the application to close
+    """
+
+
+def set_volume(level: int) -> str:
+    """Set the system output volume.
+
+    Args:
+        level: Volume level between 0 and 100
+    """
+
+
+def open_url(url: str) -> str:
+    """Open a web page in the browser.
+
+    Args:
+        url: Address of the web page
+    """
+
+
+def copy_to_clipboard(text: str) -> str:
+    """Copy text to the clipboard.
+
+    Args:
+        text: Text to copy
+    """
+
+
+def take_screenshot() -> str:
+    """Take a screenshot of the display."""
+
+
+TOOLS = [open_app, close_app, set_volume, open_url, copy_to_clipboard, take_screenshot]
+
+# Labelled request corpus: message -> tools the model needs
+CORPUS = [
+    ("Open Spotify", ["open_app"]),
+    ("quit Slack", ["close_app"]),
+    ("turn the volume down to 20", ["set_volume"]),
+    ("open the web page github.com in the browser", ["open_url"]),
+    ("copy this text to the clipboard", ["copy_to_clipboard"]),
+    ("take a screenshot", ["take_screenshot"]),
+    ("close Chrome and set volume to 50", ["close_app", "set_volume"]),
+]
+
+
+@pytest.fixture
+def selector():
+    return ToolSelector(ToolRegistry(TOOLS), examples={"set_volume": ["turn the volume up", "mute the sound"]})
+
+
+# Test 1: snake_case names are split into words
+def test_tokenize():
+    assert tokenize("copy_to_clipboard(Text)") == ["copy", "to", "clipboard", "text"]
+
+
+# Test 2: relevant tools rank first and the prompt shrinks
+def test_select_top_k(selector):
+    selection = selector.select("please set the volume to 30", top_k=2)
+    assert selection.names[0] == "set_volume"
+    assert not selection.fallback
+    assert selection.prompt_tokens < selection.full_prompt_tokens
+    assert selection.tokens_saved > 0
+
+
+# Test 3: a message matching nothing falls back to the full set
+def test_select_fallback_on_miss(selector):
+    selection = selector.select("xyzzy", top_k=2)
+    assert selection.fallback
+    assert len(selection.names) == len(TOOLS)
+    assert selection.tokens_saved == 0
+
+
+# Test 4: small catalogs are never reduced
+def test_select_small_catalog():
+    selector = ToolSelector(ToolRegistry([open_app, close_app]))
+    assert selector.select("open Safari", top_k=8).fallback
+
+
+# Test 5: recall and savings against the labelled corpus
+def test_evaluate_corpus(selector):
+    report = selector.evaluate(CORPUS, top_k=3)
+    assert report["recall"] == 1.0
+    assert report["avg_prompt_tokens_saved"] > 0
+    assert selector.stats()["selections"] == len(CORPUS)
+
+
+# Test 6: the agent counts one selection per run, not one per model request
+@pytest.mark.asyncio
+async def test_agent_records_selection_once_per_run(monkeypatch):
+    selector = ToolSelector(AppAgent.get_tool_registry())
+    monkeypatch.setattr(pydantic_agent, "get_tool_selector", lambda: selector)
+    # An earlier run of the same message would be replayed from the plan cache
+    monkeypatch.setattr("src.orchestrator.plan_cache._default_cache", PlanCache())
+    model_requests = []
+
+    async def stream(messages, info):
+        model_requests.append(len(messages))
+        if len(messages) == 1:
+            yield {0: DeltaToolCall(name="open_app", json_args='{"appName": "Safari"}', tool_call_id="c1")}
+        else:
+            yield "Safari is open."
+
+    with pydantic_agent.agent.override(model=FunctionModel(stream_function=stream)):
+        await pydantic_agent.run_agent_non_streaming("could you help me with Safari")
+
+    assert len(model_requests) == 2
+    assert selector.stats()["selections"] == 1
+    selector.select("open Safari", top_k=8, record=False)
+    assert selector.stats()["selections"] == 1
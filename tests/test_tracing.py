@@ -0,0 +1,80 @@
+"""
+Tests for per-request stage spans.
+"""
+
+import asyncio
+import pytest
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from pydantic_ai import FunctionToolCallEvent, FunctionToolResultEvent, PartStartEvent
+from pydantic_ai.messages import TextPart, ToolCallPart, ToolReturnPart
+from pydantic_ai.models.function import FunctionModel
+from src.agents import pydantic_agent
+from src.models.config import TracingConfig
+from src.utils import tracing
+from src.utils.tracing import RunTrace, setup_tracing, shutdown_tracing
+
+
+@pytest.fixture
+def exporter():
+    exporter = InMemorySpanExporter()
+    assert setup_tracing(TracingConfig(sample_ratio=1.0), exporter=exporter)
+    yield exporter
+    shutdown_tracing()
+
+
+def _finished(exporter):
+    tracing._provider.force_flush()
+    return {span.name: span for span in exporter.get_finished_spans()}
+
+
+# Test 1: with sampling off nothing is recorded
+def test_disabled_is_noop():
+    assert not setup_tracing(TracingConfig(sample_ratio=0.0))
+    run_trace = RunTrace("agent.run")
+    run_trace.llm_start()
+    run_trace.first_token()
+    run_trace.end()
+    assert not run_trace.recording and not run_trace.span.is_recording()
+
+
+# Test 2: agent events become LLM-call and tool spans under the run span
+def test_spans_from_agent_events(exporter):
+    run_trace = RunTrace("agent.run", step_id="s1")
+    run_trace.llm_start()
+    call = ToolCallPart(tool_name="open_app", args={"appName": "Safari"}, tool_call_id="c1")
+    run_trace.observe(PartStartEvent(index=0, part=call))
+    run_trace.observe(FunctionToolCallEvent(part=call))
+    run_trace.observe(FunctionToolResultEvent(
+        result=ToolReturnPart(tool_name="open_app", content="Application 'Safari' activated successfully", tool_call_id="c1")
+    ))
+    run_trace.observe(PartStartEvent(index=0, part=TextPart(content="Done")))
+    run_trace.encoded(0.002)
+    run_trace.end(completed=True)
+
+    tracing._provider.force_flush()
+    spans = exporter.get_finished_spans()
+    names = [span.name for span in spans]
+    assert names.count("llm.call") == 2 and names.count("tool.execute") == 1
+    root = next(span for span in spans if span.name == "agent.run")
+    assert all(span.parent.span_id == root.context.span_id for span in spans if span is not root)
+    assert root.attributes["llm_calls"] == 2 and root.attributes["stream.encode_ms"] == 2.0
+    first_call = next(span for span in spans if span.name == "llm.call")
+    assert "ttft_ms" in first_call.attributes and first_call.attributes["tool_calls"] is True
+    tool = next(span for span in spans if span.name == "tool.execute")
+    assert tool.attributes == {"tool": "open_app", "success": True}
+
+
+# Test 3: the streaming runner records a run span with time-to-first-token
+@pytest.mark.asyncio
+async def test_streaming_runner_spans(exporter):
+    async def stream(messages, info):
+        await asyncio.sleep(0.01)
+        yield "Once upon a time"
+
+    with pydantic_agent.agent.override(model=FunctionModel(stream_function=stream)):
+        async for _ in pydantic_agent.run_agent_streaming("tell me a story about dragons"):
+            pass
+
+    spans = _finished(exporter)
+    assert spans["agent.run"].attributes["completed"] is True
+    assert spans["llm.call"].attributes["ttft_ms"] >= 10
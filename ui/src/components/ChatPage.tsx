@@ -8,12 +8,23 @@ interface Message {
   content: string;
 }
 
+// Progress text shown for each streamed phase chunk
+const PHASE_LABELS: Record<string, string | null> = {
+  model: 'Waiting for the model...',
+  thinking: 'Thinking...',
+  tool_call: 'Preparing actions...',
+  tools: 'Running actions...',
+  answering: null,
+};
+
 export function ChatPage() {
   const [messages, setMessages] = useState<Message[]>([]);
   const [input, setInput] = useState('');
   const [isLoading, setIsLoading] = useState(false);
   const [isConnected, setIsConnected] = useState(false);
-  const [_conversationId, setConversationId] = useState<string | null>(null);
+  const [conversationId, setConversationId] = useState<string | null>(null);
+  const [progress, setProgress] = useState<string | null>(null);
+  const [stepId, setStepId] = useState<string | null>(null);
   const chatContainerRef = useRef<HTMLDivElement>(null);
 
   // Check backend health on mount and every 5 seconds
@@ -65,6 +76,7 @@ export function ChatPage() {
           body: JSON.stringify({
             message: userMessage.content,
             stream: true,
+            conversation_id: conversationId ?? undefined,
           }),
           signal: controller.signal,
         });
@@ -104,6 +116,7 @@ export function ChatPage() {
                 if (data.conversation_id) {
                   setConversationId(data.conversation_id);
                 }
+                setStepId(data.step_id ?? null);
               } else if (data.type === 'delta') {
                 // Handle incremental content chunks
                 assistantContent += data.content;
@@ -114,9 +127,18 @@ export function ChatPage() {
                       : msg
                   )
                 );
+              } else if (data.type === 'phase') {
+                // Model/agent phase transitions (shown until the answer streams)
+                setProgress(PHASE_LABELS[data.phase] ?? null);
+              } else if (data.type === 'tool_start') {
+                setProgress(`Running ${data.tool_name}...`);
+              } else if (data.type === 'tool_end') {
+                setProgress(
+                  `${data.tool_name} ${data.success ? 'done' : 'failed'} (${Math.round(data.duration_ms ?? 0)} ms)`
+                );
               } else if (data.type === 'final') {
                 // Final chunk - message already complete from deltas
-                // No action needed, all content already displayed
+                setProgress(null);
               }
             } catch (e) {
               console.error('Failed to parse NDJSON line:', line, e);
@@ -134,6 +156,7 @@ export function ChatPage() {
           body: JSON.stringify({
             message: userMessage.content,
             stream: false,
+            conversation_id: conversationId ?? undefined,
           }),
           signal: controller.signal,
         });
@@ -173,6 +196,18 @@ export function ChatPage() {
       setMessages((prev) => [...prev, errorMessage]);
     } finally {
       setIsLoading(false);
+      setProgress(null);
+      setStepId(null);
+    }
+  };
+
+  const cancelMessage = async () => {
+    if (!stepId) return;
+    try {
+      // The backend stops the model and ends the stream with a final chunk
+      await fetch(`${API_BASE_URL}/api/chat/${stepId}/cancel`, { method: 'POST' });
+    } catch (e) {
+      console.error('Failed to cancel request:', e);
     }
   };
 
@@ -234,6 +269,9 @@ export function ChatPage() {
             </div>
           </div>
         ))}
+        {isLoading && progress && (
+          <p className="text-xs text-gray-500 italic">{progress}</p>
+        )}
       </div>
 
       {/* Input area */}
@@ -255,6 +293,14 @@ export function ChatPage() {
           >
             {isLoading ? 'Sending...' : 'Send'}
           </button>
+          {isLoading && stepId && (
+            <button
+              onClick={cancelMessage}
+              className="px-4 py-2 bg-gray-200 text-gray-700 rounded-lg hover:bg-gray-300 transition-colors"
+            >
+              Stop
+            </button>
+          )}
         </div>
         <p className="text-xs text-gray-500 mt-2">
           Backend: {API_BASE_URL}